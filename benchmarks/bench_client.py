@@ -0,0 +1,203 @@
+"""
+Client benchmarks against a local cluster
+
+Measures throughput and p50/p99 latency of ``AWSElastiCacheClient`` for single-key and multi-key operations,
+with and without connection pooling and periodic auto discovery, across thread counts. Results are written as
+JSON (stdout by default) so runs can be compared over time; a summary table goes to stderr.
+
+    python -m benchmarks.bench_client --nodes 3 --threads 1,4,16 --duration 2 --output results.json
+
+The local nodes are Python servers, so absolute numbers are bounded by them; compare runs made on the same
+machine with the same parameters.
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from django_elastipymemcache.client import AWSElastiCacheClient
+
+from .common import metadata, print_table, summarize, write_results
+from .server import LocalCluster
+
+Operation = Callable[[AWSElastiCacheClient, random.Random], Any]
+
+KEYSPACE = 1000
+
+
+def _key(rng: random.Random) -> str:
+    return f"bench:{rng.randrange(KEYSPACE)}"
+
+
+def _operations(value: bytes, batch: int) -> dict[str, Operation]:
+    def get(client: AWSElastiCacheClient, rng: random.Random) -> Any:
+        return client.get(_key(rng))
+
+    def gets(client: AWSElastiCacheClient, rng: random.Random) -> Any:
+        return client.gets(_key(rng))
+
+    def set_(client: AWSElastiCacheClient, rng: random.Random) -> Any:
+        return client.set(_key(rng), value)
+
+    def delete(client: AWSElastiCacheClient, rng: random.Random) -> Any:
+        return client.delete(_key(rng))
+
+    def get_many(client: AWSElastiCacheClient, rng: random.Random) -> Any:
+        return client.get_many([_key(rng) for _ in range(batch)])
+
+    def set_many(client: AWSElastiCacheClient, rng: random.Random) -> Any:
+        return client.set_many({_key(rng): value for _ in range(batch)})
+
+    def refresh(client: AWSElastiCacheClient, rng: random.Random) -> Any:
+        return client._refresh_clients(force=True)
+
+    return {
+        "get": get,
+        "gets": gets,
+        "set": set_,
+        "delete": delete,
+        "get_many": get_many,
+        "set_many": set_many,
+        "refresh": refresh,
+    }
+
+
+def _run(
+    make_client: Callable[[], AWSElastiCacheClient],
+    operation: Operation,
+    threads: int,
+    duration: float,
+    shared: bool,
+) -> dict[str, Any]:
+    """Run ``operation`` from ``threads`` threads for ``duration`` seconds.
+
+    Pooled clients are shared by the threads; plain clients are not thread-safe, so each thread gets its
+    own, like Django's per-thread cache backends.
+    """
+    shared_client = make_client() if shared else None
+    clients = [shared_client or make_client() for _ in range(threads)]
+    latencies: list[list[float]] = [[] for _ in range(threads)]
+    errors = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+    deadline = 0.0
+
+    def worker(index: int) -> None:
+        client, samples, rng = clients[index], latencies[index], random.Random(index)
+        barrier.wait()
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                return
+            try:
+                operation(client, rng)
+            except Exception:
+                errors[index] += 1
+                continue
+            samples.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    started = time.perf_counter()
+    deadline = started + duration
+    barrier.wait()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    for client in {id(client): client for client in clients}.values():
+        client.close()
+    return summarize([sample for samples in latencies for sample in samples], elapsed, sum(errors))
+
+
+def run(
+    nodes: int = 3,
+    threads: list[int] | None = None,
+    duration: float = 2.0,
+    scenarios: list[str] | None = None,
+    batch: int = 20,
+    value_size: int = 100,
+) -> dict[str, Any]:
+    threads = threads or [1, 4, 16]
+    value = b"x" * value_size
+    operations = _operations(value, batch)
+    scenarios = scenarios or [name for name in operations if name != "refresh"]
+    unknown = set(scenarios) - operations.keys()
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    variants: list[dict[str, Any]] = [
+        {"use_pooling": False, "discovery_interval": 0.0},
+        {"use_pooling": True, "discovery_interval": 0.0},
+        {"use_pooling": True, "discovery_interval": 1.0},
+    ]
+
+    results: list[dict[str, Any]] = []
+    with LocalCluster(nodes) as cluster:
+
+        def make_client(**options: Any) -> AWSElastiCacheClient:
+            return AWSElastiCacheClient(cluster.configuration_endpoint, default_noreply=False, **options)
+
+        seed = make_client()
+        seed.set_many({f"bench:{i}": value for i in range(KEYSPACE)})
+        seed.close()
+
+        for scenario in scenarios:
+            for variant in variants:
+                for thread_count in threads:
+                    summary = _run(
+                        partial(make_client, **variant),
+                        operations[scenario],
+                        thread_count,
+                        duration,
+                        shared=variant["use_pooling"],
+                    )
+                    results.append(
+                        {
+                            "scenario": scenario,
+                            "pooled": variant["use_pooling"],
+                            "discovery": bool(variant["discovery_interval"]),
+                            "threads": thread_count,
+                            **summary,
+                        }
+                    )
+
+    return {
+        "benchmark": "client",
+        **metadata(nodes=nodes, threads=threads, duration=duration, batch=batch, value_size=value_size),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=3, help="number of local nodes (default: 3)")
+    parser.add_argument("--threads", default="1,4,16", help="comma separated thread counts (default: 1,4,16)")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per measurement (default: 2)")
+    parser.add_argument("--scenarios", help="comma separated scenarios (default: all but refresh)")
+    parser.add_argument("--batch", type=int, default=20, help="keys per multi-key operation (default: 20)")
+    parser.add_argument("--value-size", type=int, default=100, help="value size in bytes (default: 100)")
+    parser.add_argument("--output", help="JSON output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = run(
+        nodes=args.nodes,
+        threads=[int(count) for count in args.threads.split(",")],
+        duration=args.duration,
+        scenarios=args.scenarios.split(",") if args.scenarios else None,
+        batch=args.batch,
+        value_size=args.value_size,
+    )
+    print_table(
+        results["results"],
+        ["scenario", "pooled", "discovery", "threads", "ops_per_sec", "p50_us", "p99_us", "errors"],
+    )
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
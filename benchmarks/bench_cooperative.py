@@ -0,0 +1,153 @@
+"""
+Cooperative mode benchmark
+
+Measures throughput and p50/p99 latency of ``AWSElastiCacheClient`` driven by many greenlets of one hub, with
+blocking sockets (the default client, which stalls the hub on every round trip) and in cooperative mode
+(green sockets, and bounded per-node pools shared by the greenlets). The local nodes run in threads and add
+``--latency`` seconds to every command, like a network round trip.
+
+    python -m benchmarks.bench_cooperative --library gevent --greenlets 10,100,1000 --duration 2
+
+Results are written as JSON (stdout by default), and a summary table goes to stderr.
+"""
+
+import argparse
+import random
+import time
+from functools import partial
+from typing import Any
+
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.cooperative import CooperativeRuntime, get_cooperative_runtime
+
+from .common import metadata, print_table, summarize, write_results
+from .server import LocalCluster
+
+KEYSPACE = 1000
+
+
+def _run(
+    runtime: CooperativeRuntime,
+    client: AWSElastiCacheClient,
+    scenario: str,
+    greenlets: int,
+    duration: float,
+    batch: int,
+) -> dict[str, Any]:
+    """Run ``scenario`` from ``greenlets`` greenlets sharing ``client`` for ``duration`` seconds."""
+    latencies: list[float] = []
+    errors = [0]
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int) -> None:
+        rng = random.Random(index)
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                return
+            try:
+                if scenario == "get":
+                    client.get(f"bench:{rng.randrange(KEYSPACE)}")
+                else:
+                    client.get_many([f"bench:{rng.randrange(KEYSPACE)}" for _ in range(batch)])
+            except Exception:
+                errors[0] += 1
+                # Let the other greenlets run when failing fast, e.g. on pool timeouts.
+                runtime.sleep(0)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    for greenlet in [runtime.spawn(worker, index) for index in range(greenlets)]:
+        runtime.wait(greenlet)
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def run(
+    library: str = "auto",
+    nodes: int = 3,
+    greenlets: list[int] | None = None,
+    duration: float = 2.0,
+    scenarios: list[str] | None = None,
+    latency: float = 0.001,
+    pool_size: int = 32,
+    batch: int = 20,
+) -> dict[str, Any]:
+    runtime = get_cooperative_runtime(library)
+    greenlets = greenlets or [10, 100, 1000]
+    scenarios = scenarios or ["get", "get_many"]
+    unknown = set(scenarios) - {"get", "get_many"}
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    variants: dict[str, dict[str, Any]] = {
+        "blocking": {"use_pooling": True},
+        "cooperative": {"cooperative": {"library": runtime.name, "pool_size": pool_size}},
+    }
+
+    results: list[dict[str, Any]] = []
+    with LocalCluster(nodes) as cluster:
+        make_client = partial(AWSElastiCacheClient, cluster.configuration_endpoint, default_noreply=False)
+        seed = make_client()
+        seed.set_many({f"bench:{i}": b"x" * 100 for i in range(KEYSPACE)})
+        seed.close()
+        for node in cluster.nodes:
+            node.latency = latency
+
+        for scenario in scenarios:
+            for mode, options in variants.items():
+                for count in greenlets:
+                    client = make_client(**options)
+                    try:
+                        summary = _run(runtime, client, scenario, count, duration, batch)
+                    finally:
+                        client.close()
+                    results.append({"scenario": scenario, "mode": mode, "greenlets": count, **summary})
+
+    return {
+        "benchmark": "cooperative",
+        **metadata(
+            library=runtime.name,
+            nodes=nodes,
+            greenlets=greenlets,
+            duration=duration,
+            latency=latency,
+            pool_size=pool_size,
+            batch=batch,
+        ),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--library", default="auto", help="gevent, eventlet or auto (default: auto)")
+    parser.add_argument("--nodes", type=int, default=3, help="number of local nodes (default: 3)")
+    parser.add_argument("--greenlets", default="10,100,1000", help="comma separated greenlet counts")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per measurement (default: 2)")
+    parser.add_argument("--scenarios", help="comma separated scenarios: get, get_many (default: both)")
+    parser.add_argument("--latency", type=float, default=0.001, help="seconds added per command (default: 0.001)")
+    parser.add_argument("--pool-size", type=int, default=32, help="cooperative connections per node (default: 32)")
+    parser.add_argument("--batch", type=int, default=20, help="keys per multi-key operation (default: 20)")
+    parser.add_argument("--output", help="JSON output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = run(
+        library=args.library,
+        nodes=args.nodes,
+        greenlets=[int(count) for count in args.greenlets.split(",")],
+        duration=args.duration,
+        scenarios=args.scenarios.split(",") if args.scenarios else None,
+        latency=args.latency,
+        pool_size=args.pool_size,
+        batch=args.batch,
+    )
+    print_table(
+        results["results"],
+        ["scenario", "mode", "greenlets", "ops_per_sec", "p50_us", "p99_us", "errors"],
+    )
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
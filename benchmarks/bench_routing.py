@@ -0,0 +1,121 @@
+"""
+Key routing micro-benchmark
+
+Measures the client-side cost of routing keys to nodes, in nanoseconds per key, without any round trip:
+
+* ``get``: one key per call, through the full topology refresh bookkeeping (``legacy``), through the fast path
+  taken when no discovery is due (``fast_path``), and with the key to node memo (``memo``, ``route_cache``).
+* ``get_many``: a batch of keys per call, hashed one at a time (``per_key``), in one batched pass
+  (``batched``) and with the memo (``batched_memo``).
+
+    python -m benchmarks.bench_routing --hashers rendezvous,ketama --batch 100 --duration 1
+
+Results are written as JSON (stdout by default), and a summary table goes to stderr.
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from functools import partial
+from itertools import cycle, islice
+from typing import Any
+
+from django_elastipymemcache.client import AWSElastiCacheClient
+
+from .common import metadata, print_table, write_results
+from .server import LocalCluster
+
+KEYSPACE = 10000
+
+
+def _measure(operation: Callable[[Any], Any], items: list[Any], keys_per_call: int, duration: float) -> dict[str, Any]:
+    """Call ``operation`` on ``items`` in turn for ``duration`` seconds, reading the clock every 100 calls."""
+    items_cycle = cycle(items)
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        for item in islice(items_cycle, 100):
+            operation(item)
+        calls += 100
+        elapsed = time.perf_counter() - started
+        if elapsed >= duration:
+            break
+    keys = calls * keys_per_call
+    return {"keys": keys, "keys_per_sec": round(keys / elapsed, 1), "ns_per_key": round(elapsed / keys * 1e9, 1)}
+
+
+def _legacy_route(client: AWSElastiCacheClient, key: str) -> Any:
+    return client._route(client._refresh_topology(), key)
+
+
+def _per_key_route(client: AWSElastiCacheClient, keys: list[str]) -> list[Any]:
+    topology = client._refresh_topology()
+    return [client._route(topology, key) for key in keys]
+
+
+def run(
+    nodes: int = 5,
+    hashers: list[str] | None = None,
+    duration: float = 1.0,
+    batch: int = 100,
+    route_cache: int = KEYSPACE,
+) -> dict[str, Any]:
+    hashers = hashers or ["rendezvous", "ketama"]
+    rng = random.Random(0)
+    keys = [f"bench:{rng.randrange(KEYSPACE)}" for _ in range(batch * 100)]
+    batches = [keys[index : index + batch] for index in range(0, len(keys), batch)]
+
+    results: list[dict[str, Any]] = []
+    with LocalCluster(nodes) as cluster:
+        for hasher in hashers:
+            make_client = partial(
+                AWSElastiCacheClient, cluster.configuration_endpoint, hasher=hasher, discovery_interval=3600
+            )
+            client, memo_client = make_client(), make_client(route_cache=route_cache)
+            try:
+                variants: list[tuple[str, str, Callable[[Any], Any], list[Any], int]] = [
+                    ("get", "legacy", partial(_legacy_route, client), keys, 1),
+                    ("get", "fast_path", client._get_client, keys, 1),
+                    ("get", "memo", memo_client._get_client, keys, 1),
+                    ("get_many", "per_key", partial(_per_key_route, client), batches, batch),
+                    ("get_many", "batched", client._group_keys_by_client, batches, batch),
+                    ("get_many", "batched_memo", memo_client._group_keys_by_client, batches, batch),
+                ]
+                for scenario, mode, operation, items, keys_per_call in variants:
+                    summary = _measure(operation, items, keys_per_call, duration)
+                    results.append({"hasher": hasher, "scenario": scenario, "mode": mode, **summary})
+            finally:
+                client.close()
+                memo_client.close()
+
+    return {
+        "benchmark": "routing",
+        **metadata(nodes=nodes, hashers=hashers, duration=duration, batch=batch, route_cache=route_cache),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=5, help="number of local nodes (default: 5)")
+    parser.add_argument("--hashers", default="rendezvous,ketama", help="comma separated hashers")
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds per measurement (default: 1)")
+    parser.add_argument("--batch", type=int, default=100, help="keys per multi-key operation (default: 100)")
+    parser.add_argument("--route-cache", type=int, default=KEYSPACE, help="entries of the key to node memo")
+    parser.add_argument("--output", help="JSON output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = run(
+        nodes=args.nodes,
+        hashers=args.hashers.split(","),
+        duration=args.duration,
+        batch=args.batch,
+        route_cache=args.route_cache,
+    )
+    print_table(results["results"], ["hasher", "scenario", "mode", "ns_per_key", "keys_per_sec"])
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
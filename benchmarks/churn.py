@@ -0,0 +1,299 @@
+"""
+Topology churn simulator
+
+Runs a cache-aside workload (``get``, then ``set`` on a miss) against a local cluster while nodes are added,
+removed and replaced behind the configuration endpoint, and while a node injects timeouts and connection
+resets. Reports miss rate, error rate, forced discoveries, node state transitions and latency percentiles
+per time bucket, as JSON, to tune ``discovery_interval``, ``retry_attempts`` and dead node handling.
+
+    python -m benchmarks.churn --duration 30 --threads 8 \\
+        --events 0.2:add,0.4:remove,0.5:replace,0.6:faults,0.8:heal \\
+        --option discovery_interval=1 --option retry_attempts=2 --option dead_timeout=5
+
+Events are ``<fraction of the duration>:<action>`` with the actions ``add``, ``remove`` (the oldest node),
+``replace`` (the oldest node, with an empty one), ``faults`` (timeouts and resets on the oldest node) and
+``heal``. ``--option`` values are client options, parsed as JSON when possible.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from typing import Any
+
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.metrics import MetricsHook
+
+from .common import metadata, print_table, summarize, write_results
+from .server import LocalCluster, MemcachedNode
+
+DEFAULT_EVENTS = "0.2:add,0.4:remove,0.5:replace,0.6:faults,0.8:heal"
+
+DEFAULT_OPTIONS: dict[str, Any] = {
+    "discovery_interval": 1.0,
+    "retry_attempts": 2,
+    "retry_timeout": 1.0,
+    "dead_timeout": 5.0,
+    "connect_timeout": 0.25,
+    "timeout": 0.25,
+}
+
+KEYSPACE = 2000
+
+
+class _Recorder(MetricsHook):
+    """Timestamps of the client events that do not surface as exceptions."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.events: list[tuple[float, str]] = []
+
+    def _record(self, event: str) -> None:
+        now = time.perf_counter()
+        with self.lock:
+            self.events.append((now, event))
+
+    def command(self, node: str, name: str, duration: float, success: bool) -> None:
+        if not success:
+            self._record("command_errors")
+
+    def node_state(self, node: str, state: str) -> None:
+        self._record(state)
+
+    def discovery(self, duration: float, success: bool, changed: bool) -> None:
+        self._record("discoveries")
+        if not success:
+            self._record("discovery_failures")
+
+
+def parse_events(spec: str) -> list[tuple[float, str]]:
+    events = []
+    for item in filter(None, spec.split(",")):
+        at, action = item.split(":")
+        if action not in ("add", "remove", "replace", "faults", "heal"):
+            raise ValueError(f"Unknown churn action '{action}'.")
+        events.append((float(at), action))
+    return sorted(events)
+
+
+def parse_option(item: str) -> tuple[str, Any]:
+    name, _, raw = item.partition("=")
+    try:
+        return name, json.loads(raw)
+    except ValueError:
+        return name, raw
+
+
+class _Churn:
+    def __init__(self, cluster: LocalCluster, timeout_rate: float, reset_rate: float) -> None:
+        self.cluster = cluster
+        self.timeout_rate = timeout_rate
+        self.reset_rate = reset_rate
+        self.faulty: MemcachedNode | None = None
+
+    def apply(self, action: str) -> str:
+        nodes = self.cluster.nodes
+        if action == "add":
+            return f"added {self.cluster.add_node().key}"
+        if action == "remove":
+            node = nodes[0]
+            self.cluster.remove_node(node)
+            return f"removed {node.key}"
+        if action == "replace":
+            node = nodes[0]
+            return f"replaced {node.key} with {self.cluster.replace_node(node).key}"
+        if action == "faults":
+            self.faulty = nodes[0]
+            self.faulty.timeout_rate = self.timeout_rate
+            self.faulty.reset_rate = self.reset_rate
+            return f"faults on {self.faulty.key}"
+        assert action == "heal"
+        if self.faulty is not None:
+            self.faulty.timeout_rate = self.faulty.reset_rate = 0.0
+        return "healed"
+
+
+def run(
+    nodes: int = 3,
+    threads: int = 8,
+    duration: float = 30.0,
+    bucket: float = 1.0,
+    events: str = DEFAULT_EVENTS,
+    options: dict[str, Any] | None = None,
+    timeout_rate: float = 0.05,
+    reset_rate: float = 0.05,
+    seed: int = 0,
+) -> dict[str, Any]:
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    plan = parse_events(events)
+    recorder = _Recorder()
+    # (timestamp, latency, outcome) per thread; outcome is "hit", "miss" or "error"
+    samples: list[list[tuple[float, float, str]]] = [[] for _ in range(threads)]
+    applied: list[dict[str, Any]] = []
+
+    with LocalCluster(nodes) as cluster:
+        churn = _Churn(cluster, timeout_rate, reset_rate)
+        value = b"x" * 100
+
+        def make_client() -> AWSElastiCacheClient:
+            return AWSElastiCacheClient(
+                cluster.configuration_endpoint,
+                default_noreply=False,
+                metrics=recorder,
+                **options,
+            )
+
+        warmup = make_client()
+        warmup.set_many({f"churn:{i}": value for i in range(KEYSPACE)})
+        warmup.close()
+
+        shared = make_client() if options.get("use_pooling") else None
+        stop = threading.Event()
+        started = time.perf_counter()
+
+        def worker(index: int) -> None:
+            client = shared or make_client()
+            rng = random.Random(seed + index)
+            records = samples[index]
+            while not stop.is_set():
+                key = f"churn:{rng.randrange(KEYSPACE)}"
+                start = time.perf_counter()
+                try:
+                    outcome = "hit"
+                    if client.get(key) is None:
+                        outcome = "miss"
+                        client.set(key, value)
+                except Exception:
+                    outcome = "error"
+                records.append((start, time.perf_counter() - start, outcome))
+            if shared is None:
+                client.close()
+
+        workers = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(threads)]
+        for thread in workers:
+            thread.start()
+
+        for at, action in plan:
+            delay = started + at * duration - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            description = churn.apply(action)
+            applied.append({"t": round(time.perf_counter() - started, 3), "action": action, "detail": description})
+
+        remaining = started + duration - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        stop.set()
+        for thread in workers:
+            thread.join()
+        if shared is not None:
+            shared.close()
+
+    return {
+        "benchmark": "churn",
+        **metadata(
+            nodes=nodes,
+            threads=threads,
+            duration=duration,
+            bucket=bucket,
+            events=events,
+            options=options,
+            timeout_rate=timeout_rate,
+            reset_rate=reset_rate,
+        ),
+        "events": applied,
+        "buckets": _buckets(started, duration, bucket, samples, recorder.events),
+        "summary": _summary([record for records in samples for record in records], duration, recorder.events),
+    }
+
+
+def _rates(records: list[tuple[float, float, str]]) -> dict[str, Any]:
+    total = len(records)
+    misses = sum(1 for _, _, outcome in records if outcome == "miss")
+    errors = sum(1 for _, _, outcome in records if outcome == "error")
+    return {
+        "misses": misses,
+        "miss_rate": round(misses / total, 4) if total else 0.0,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+    }
+
+
+def _counts(events: list[tuple[float, str]]) -> dict[str, int]:
+    counts = dict.fromkeys(("discoveries", "discovery_failures", "command_errors", "failed", "dead", "revived"), 0)
+    for _, event in events:
+        counts[event] += 1
+    return counts
+
+
+def _summary(
+    records: list[tuple[float, float, str]], elapsed: float, events: list[tuple[float, str]]
+) -> dict[str, Any]:
+    errors = sum(1 for _, _, outcome in records if outcome == "error")
+    return {
+        **summarize([latency for _, latency, _ in records], elapsed, errors),
+        **_rates(records),
+        **_counts(events),
+    }
+
+
+def _buckets(
+    started: float,
+    duration: float,
+    size: float,
+    samples: list[list[tuple[float, float, str]]],
+    events: list[tuple[float, str]],
+) -> list[dict[str, Any]]:
+    count = max(int(duration / size + 0.5), 1)
+    records: list[list[tuple[float, float, str]]] = [[] for _ in range(count)]
+    for thread_records in samples:
+        for record in thread_records:
+            records[min(int((record[0] - started) / size), count - 1)].append(record)
+    bucket_events: list[list[tuple[float, str]]] = [[] for _ in range(count)]
+    for event in events:
+        if event[0] >= started:
+            bucket_events[min(int((event[0] - started) / size), count - 1)].append(event)
+
+    return [
+        {"t": round(index * size, 3), **_summary(bucket_records, size, bucket_events[index])}
+        for index, bucket_records in enumerate(records)
+    ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=3, help="initial number of nodes (default: 3)")
+    parser.add_argument("--threads", type=int, default=8, help="worker threads (default: 8)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds (default: 30)")
+    parser.add_argument("--bucket", type=float, default=1.0, help="seconds per reported bucket (default: 1)")
+    parser.add_argument("--events", default=DEFAULT_EVENTS, help=f"churn plan (default: {DEFAULT_EVENTS})")
+    parser.add_argument("--option", action="append", default=[], help="client option as name=value")
+    parser.add_argument("--timeout-rate", type=float, default=0.05, help="stalled commands during faults")
+    parser.add_argument("--reset-rate", type=float, default=0.05, help="reset connections during faults")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the workload")
+    parser.add_argument("--output", help="JSON output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = run(
+        nodes=args.nodes,
+        threads=args.threads,
+        duration=args.duration,
+        bucket=args.bucket,
+        events=args.events,
+        options=dict(map(parse_option, args.option)),
+        timeout_rate=args.timeout_rate,
+        reset_rate=args.reset_rate,
+        seed=args.seed,
+    )
+    for event in results["events"]:
+        print(f"t={event['t']:.1f}s {event['detail']}", file=sys.stderr)
+    print_table(
+        results["buckets"],
+        ["t", "ops", "miss_rate", "error_rate", "p50_us", "p99_us", "discoveries", "failed", "dead", "revived"],
+    )
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Helpers shared by the benchmark scripts."""
+
+import json
+import math
+import platform
+import sys
+import time
+from collections.abc import Sequence
+from typing import Any
+
+import django
+import pymemcache
+
+import django_elastipymemcache
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values, ``0.0`` when there are none."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict[str, Any]:
+    """Throughput and latency percentiles (microseconds) of a run."""
+    latencies = sorted(latencies)
+    return {
+        "ops": len(latencies),
+        "errors": errors,
+        "ops_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_us": round(percentile(latencies, 0.50) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+        "max_us": round((latencies[-1] if latencies else 0.0) * 1e6, 1),
+    }
+
+
+def metadata(**params: Any) -> dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "django": django.get_version(),
+        "pymemcache": pymemcache.__version__,
+        "django_elastipymemcache": django_elastipymemcache.__version__,
+        "params": params,
+    }
+
+
+def write_results(results: dict[str, Any], output: str | None) -> None:
+    """Write results as JSON to ``output``, or to stdout when it is ``None`` or ``"-"``."""
+    if output is None or output == "-":
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+def print_table(rows: list[dict[str, Any]], columns: Sequence[str]) -> None:
+    """Human readable summary on stderr, keeping stdout for the JSON results."""
+    widths = [max(len(column), *(len(str(row.get(column, ""))) for row in rows)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)), file=sys.stderr)
+    for row in rows:
+        print(
+            "  ".join(str(row.get(column, "")).ljust(width) for column, width in zip(columns, widths)), file=sys.stderr
+        )
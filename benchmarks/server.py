@@ -0,0 +1,410 @@
+"""
+Local memcached stand-in
+
+``MemcachedNode`` speaks enough of the memcached text protocol (get/gets, set/add/replace/cas, delete,
+incr/decr, touch, flush_all, version) and of the meta protocol (mg, ms, md, mn) for the clients of this
+package, and ``LocalCluster`` runs N nodes plus an ElastiCache style configuration endpoint answering
+``config get cluster`` on localhost ports.
+Every connection is served by its own thread, like memcached's worker threads. Nodes can inject latency,
+stalls (client timeouts) and connection resets.
+"""
+
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any
+
+_CONFIG_GET_CLUSTER = b"config get cluster"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_TCPServer"
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.owner.lock:
+            self.server.owner.connections.add(self.connection)
+
+    def finish(self) -> None:
+        with self.server.owner.lock:
+            self.server.owner.connections.discard(self.connection)
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def handle(self) -> None:
+        owner = self.server.owner
+        while True:
+            try:
+                line = self.rfile.readline()
+            except OSError:
+                return
+            if not line:
+                return
+
+            fault = owner.inject_fault()
+            if fault == "reset":
+                # Close with RST instead of FIN, so the client sees ECONNRESET.
+                self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                return
+            if fault == "stall":
+                time.sleep(owner.stall)
+            elif owner.latency:
+                time.sleep(owner.latency)
+
+            if not owner.handle_line(line.rstrip(b"\r\n"), self.rfile, self.wfile):
+                return
+            self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    owner: "MemcachedNode"
+
+
+class MemcachedNode:
+    """In-memory memcached text protocol server on ``host:port`` (``port=0`` picks a free one)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.data: dict[bytes, tuple[int, bytes, float, int]] = {}
+        self.lock = threading.Lock()
+        self.connections: set[socket.socket] = set()
+        #: meta protocol state: invalidated items, and items whose recache win was handed out
+        self.stale: set[bytes] = set()
+        self.win_sent: set[bytes] = set()
+        self.commands = 0
+        self._cas = 0
+
+        #: fault injection, may be changed while serving
+        self.latency = 0.0
+        self.timeout_rate = 0.0
+        self.reset_rate = 0.0
+        self.stall = 1.0
+        self._random = random.Random()
+
+        self._server = _TCPServer((host, port), _Handler)
+        self._server.owner = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    @property
+    def key(self) -> str:
+        return "%s:%d" % self.address
+
+    def start(self) -> "MemcachedNode":
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"memcached[{self.key}]", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        # Established connections are dropped too, like a node going away.
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def inject_fault(self) -> str | None:
+        """``"reset"`` or ``"stall"`` for the next command, according to ``reset_rate`` and ``timeout_rate``."""
+        roll = self._random.random()
+        if roll < self.reset_rate:
+            return "reset"
+        if roll < self.reset_rate + self.timeout_rate:
+            return "stall"
+        return None
+
+    def _get(self, key: bytes, now: float) -> tuple[int, bytes, float, int] | None:
+        item = self.data.get(key)
+        if item is not None and item[2] and item[2] <= now:
+            self._drop(key)
+            return None
+        return item
+
+    def _drop(self, key: bytes) -> None:
+        self.data.pop(key, None)
+        self.stale.discard(key)
+        self.win_sent.discard(key)
+
+    def _store(self, key: bytes, flags: int, value: bytes, expires_at: float) -> int:
+        self._cas += 1
+        self.data[key] = (flags, value, expires_at, self._cas)
+        self.stale.discard(key)
+        self.win_sent.discard(key)
+        return self._cas
+
+    @staticmethod
+    def _expires_at(exptime: int, now: float) -> float:
+        if exptime == 0:
+            return 0.0
+        # Like memcached, values above 30 days are absolute unix times.
+        return float(exptime) if exptime > 30 * 24 * 3600 else now + exptime
+
+    def handle_line(self, line: bytes, rfile: Any, wfile: Any) -> bool:
+        """Handle one command line; returns ``False`` to close the connection."""
+        self.commands += 1
+        if line == _CONFIG_GET_CLUSTER:
+            wfile.write(self.config_get_cluster())
+            return True
+
+        name, *args = line.split()
+        noreply = bool(args) and args[-1] == b"noreply"
+        if noreply:
+            args = args[:-1]
+        now = time.time()
+
+        if name in (b"get", b"gets"):
+            chunks = []
+            with self.lock:
+                for key in args:
+                    item = self._get(key, now)
+                    if item is not None:
+                        flags, value, _, cas = item
+                        cas_token = b" %d" % cas if name == b"gets" else b""
+                        chunks.append(b"VALUE %s %d %d%s\r\n%s\r\n" % (key, flags, len(value), cas_token, value))
+            chunks.append(b"END\r\n")
+            response = b"".join(chunks)
+        elif name in (b"set", b"add", b"replace", b"cas"):
+            key, raw_flags, raw_exptime, size = args[:4]
+            value = rfile.read(int(size) + 2)[:-2]
+            with self.lock:
+                item = self._get(key, now)
+                if name == b"add" and item is not None or name == b"replace" and item is None:
+                    response = b"NOT_STORED\r\n"
+                elif name == b"cas" and item is None:
+                    response = b"NOT_FOUND\r\n"
+                elif name == b"cas" and item is not None and item[3] != int(args[4]):
+                    response = b"EXISTS\r\n"
+                else:
+                    self._store(key, int(raw_flags), value, self._expires_at(int(raw_exptime), now))
+                    response = b"STORED\r\n"
+        elif name == b"delete":
+            with self.lock:
+                found = self._get(args[0], now) is not None
+                self._drop(args[0])
+            response = b"DELETED\r\n" if found else b"NOT_FOUND\r\n"
+        elif name == b"mg":
+            with self.lock:
+                response = self._meta_get(args[0], args[1:], now)
+        elif name == b"ms":
+            value = rfile.read(int(args[1]) + 2)[:-2]
+            with self.lock:
+                response = self._meta_set(args[0], value, args[2:], now)
+        elif name == b"md":
+            with self.lock:
+                response = self._meta_delete(args[0], args[1:], now)
+        elif name == b"mn":
+            response = b"MN\r\n"
+        elif name in (b"incr", b"decr"):
+            key, delta = args
+            with self.lock:
+                item = self._get(key, now)
+                if item is None:
+                    response = b"NOT_FOUND\r\n"
+                else:
+                    flags, value, expires_at, _ = item
+                    number = int(value) + int(delta) if name == b"incr" else max(int(value) - int(delta), 0)
+                    self._cas += 1
+                    self.data[key] = (flags, b"%d" % number, expires_at, self._cas)
+                    response = b"%d\r\n" % number
+        elif name == b"touch":
+            key, raw_exptime = args
+            with self.lock:
+                item = self._get(key, now)
+                if item is not None:
+                    self.data[key] = (item[0], item[1], self._expires_at(int(raw_exptime), now), item[3])
+            response = b"TOUCHED\r\n" if item is not None else b"NOT_FOUND\r\n"
+        elif name == b"flush_all":
+            with self.lock:
+                self.data.clear()
+                self.stale.clear()
+                self.win_sent.clear()
+            response = b"OK\r\n"
+        elif name == b"version":
+            response = b"VERSION 1.6.0\r\n"
+        elif name == b"quit":
+            return False
+        else:
+            response = b"ERROR\r\n"
+
+        if not noreply:
+            wfile.write(response)
+        return True
+
+    def _meta_get(self, key: bytes, tokens: list[bytes], now: float) -> bytes:
+        flags = {token[:1]: token[1:] for token in tokens}
+        item = self._get(key, now)
+        won = False
+        if item is None:
+            if b"N" not in flags:
+                return b"" if b"q" in flags else b"EN\r\n"
+            # Vivify: an empty placeholder, and the win for this caller.
+            self._store(key, 0, b"", self._expires_at(int(flags[b"N"]), now))
+            self.win_sent.add(key)
+            item, won = self.data[key], True
+        else:
+            if b"T" in flags:
+                item = item[:2] + (self._expires_at(int(flags[b"T"]), now),) + item[3:]
+                self.data[key] = item
+            ttl = int(item[2] - now) if item[2] else -1
+            recache = b"R" in flags and ttl != -1 and ttl < int(flags[b"R"])
+            if (key in self.stale or recache) and key not in self.win_sent:
+                self.win_sent.add(key)
+                won = True
+
+        client_flags, value, expires_at, cas = item
+        returned = {
+            b"f": b"%d" % client_flags,
+            b"c": b"%d" % cas,
+            b"t": b"%d" % (int(expires_at - now) if expires_at else -1),
+            b"k": key,
+            b"s": b"%d" % len(value),
+        }
+        ret = [flag + returned[flag] for flag in (token[:1] for token in tokens) if flag in returned]
+        if b"O" in flags:
+            ret.append(b"O" + flags[b"O"])
+        if won:
+            ret.append(b"W")
+        if key in self.stale:
+            ret.append(b"X")
+        if key in self.win_sent and not won:
+            ret.append(b"Z")
+
+        if b"v" in flags:
+            return b" ".join([b"VA %d" % len(value), *ret]) + b"\r\n" + value + b"\r\n"
+        return b" ".join([b"HD", *ret]) + b"\r\n"
+
+    def _meta_set(self, key: bytes, value: bytes, tokens: list[bytes], now: float) -> bytes:
+        flags = {token[:1]: token[1:] for token in tokens}
+        mode = flags.get(b"M", b"S")[:1].upper()
+        item = self._get(key, now)
+        if b"C" in flags and item is None:
+            response = b"NF"
+        elif b"C" in flags and item is not None and item[3] != int(flags[b"C"]):
+            response = b"EX"
+        elif mode == b"E" and item is not None or mode in (b"R", b"A", b"P") and item is None:
+            response = b"NS"
+        else:
+            if item is not None and mode == b"A":
+                value = item[1] + value
+            elif item is not None and mode == b"P":
+                value = value + item[1]
+            client_flags = int(flags.get(b"F", b"0"))
+            self._store(key, client_flags, value, self._expires_at(int(flags.get(b"T", b"0")), now))
+            response = b"HD"
+        if b"q" in flags and response == b"HD":
+            return b""
+        return response + b"\r\n"
+
+    def _meta_delete(self, key: bytes, tokens: list[bytes], now: float) -> bytes:
+        flags = {token[:1]: token[1:] for token in tokens}
+        item = self._get(key, now)
+        if item is None:
+            response = b"NF"
+        elif b"C" in flags and item[3] != int(flags[b"C"]):
+            response = b"EX"
+        elif b"I" in flags:
+            # Invalidate: the item stays, stale, until it is stored again.
+            expires_at = self._expires_at(int(flags[b"T"]), now) if b"T" in flags else item[2]
+            self._cas += 1
+            self.data[key] = (item[0], item[1], expires_at, self._cas)
+            self.stale.add(key)
+            self.win_sent.discard(key)
+            response = b"HD"
+        else:
+            self._drop(key)
+            response = b"HD"
+        if b"q" in flags and response in (b"HD", b"NF"):
+            return b""
+        return response + b"\r\n"
+
+    def config_get_cluster(self) -> bytes:
+        return b"ERROR\r\n"
+
+
+class ConfigurationEndpoint(MemcachedNode):
+    """Answers ``config get cluster`` with the nodes of a ``LocalCluster``."""
+
+    def __init__(self, cluster: "LocalCluster", host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__(host, port)
+        self.cluster = cluster
+
+    def config_get_cluster(self) -> bytes:
+        version, nodes = self.cluster.membership()
+        body = " ".join(f"node{i:04d}.cache.amazonaws.com|{host}|{port}" for i, (host, port) in enumerate(nodes))
+        payload = f"{version}\n{body}\n".encode()
+        return b"CONFIG cluster 0 %d\r\n%s\r\nEND\r\n" % (len(payload), payload)
+
+
+class LocalCluster:
+    """N ``MemcachedNode`` on localhost and their configuration endpoint.
+
+    ``configuration_endpoint`` is usable as the ``LOCATION`` of the cache backend. Changing the membership
+    bumps the cluster config version, like ElastiCache does.
+    """
+
+    node_class = MemcachedNode
+
+    def __init__(self, nodes: int = 3, host: str = "127.0.0.1") -> None:
+        self.host = host
+        self.version = 1
+        self._lock = threading.Lock()
+        self.nodes: list[MemcachedNode] = [self.node_class(host).start() for _ in range(nodes)]
+        self.endpoint = ConfigurationEndpoint(self, host).start()
+
+    @property
+    def configuration_endpoint(self) -> str:
+        host, port = self.endpoint.address
+        return f"[{host}]:{port}"
+
+    def membership(self) -> tuple[int, list[tuple[str, int]]]:
+        with self._lock:
+            return self.version, [node.address for node in self.nodes]
+
+    def add_node(self) -> MemcachedNode:
+        node = self.node_class(self.host).start()
+        with self._lock:
+            self.nodes.append(node)
+            self.version += 1
+        return node
+
+    def remove_node(self, node: MemcachedNode) -> None:
+        with self._lock:
+            self.nodes.remove(node)
+            self.version += 1
+        node.stop()
+
+    def replace_node(self, node: MemcachedNode) -> MemcachedNode:
+        """Swap ``node`` for a fresh, empty one, like an ElastiCache node replacement."""
+        new_node = self.node_class(self.host).start()
+        with self._lock:
+            self.nodes[self.nodes.index(node)] = new_node
+            self.version += 1
+        node.stop()
+        return new_node
+
+    def close(self) -> None:
+        self.endpoint.stop()
+        for node in self.nodes:
+            node.stop()
+
+    def __enter__(self) -> "LocalCluster":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,737 @@
+"""
+asyncio-native counterpart of AWSElastiCacheClient
+
+Shares the configuration endpoint parsing, key routing and dead node handling semantics of
+AWSElastiCacheClient, but talks to the configuration endpoint and the data nodes over asyncio streams.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import asynccontextmanager
+from functools import partial
+from ssl import SSLContext
+from typing import Any, TypeVar
+
+from pymemcache.client.base import STORE_RESULTS_VALUE, VALID_STORE_RESULTS, check_key_helper
+from pymemcache.exceptions import (
+    MemcacheClientError,
+    MemcacheError,
+    MemcacheIllegalInputError,
+    MemcacheServerError,
+    MemcacheUnexpectedCloseError,
+    MemcacheUnknownCommandError,
+    MemcacheUnknownError,
+)
+from pymemcache.serde import LegacyWrappingSerde
+
+from .chunking import FLAG_CHUNKED
+from .client import _AWS_CONFIGURATION_ENDPOINT_PATTERN, _ConfigurationEndpointClient
+from .hashing import get_hasher_class
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+Key = str | bytes
+
+
+def _raise_errors(line: bytes, name: bytes) -> None:
+    if line.startswith(b"ERROR"):
+        raise MemcacheUnknownCommandError(name)
+    elif line.startswith(b"CLIENT_ERROR"):
+        raise MemcacheClientError(line[line.find(b" ") + 1 :])
+    elif line.startswith(b"SERVER_ERROR"):
+        raise MemcacheServerError(line[line.find(b" ") + 1 :])
+
+
+async def _wait_for(awaitable: Awaitable[T], timeout: float | None) -> T:
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError as e:
+        # Keep the blocking client's contract: timeouts are OSErrors and mark the node as failed.
+        raise TimeoutError(f"timed out after {timeout}s") from e
+
+
+class _AsyncConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, data: bytes) -> None:
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def readline(self) -> bytes:
+        try:
+            line = await self.reader.readuntil(b"\r\n")
+        except asyncio.IncompleteReadError as e:
+            raise MemcacheUnexpectedCloseError() from e
+        return line[:-2]
+
+    async def readvalue(self, size: int) -> bytes:
+        try:
+            value = await self.reader.readexactly(size + 2)
+        except asyncio.IncompleteReadError as e:
+            raise MemcacheUnexpectedCloseError() from e
+        return value[:-2]
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def _open_connection(
+    server: tuple[str, int],
+    connect_timeout: float | None,
+    tls_context: SSLContext | None,
+) -> _AsyncConnection:
+    host, port = server
+    reader, writer = await _wait_for(
+        asyncio.open_connection(host, port, ssl=tls_context),
+        connect_timeout,
+    )
+    return _AsyncConnection(reader, writer)
+
+
+class _AsyncConfigurationEndpointClient(_ConfigurationEndpointClient):
+    """ElastiCache's configuration endpoint client over asyncio streams."""
+
+    async def _read_config_get_cluster(self, connection: _AsyncConnection) -> bytes:
+        await connection.send(b"config get cluster\r\n")
+
+        lines: list[bytes] = []
+        while True:
+            line = await connection.readline()
+            _raise_errors(line, b"config get cluster")
+            if line == b"END":
+                return b"\r\n".join(lines)
+            lines.append(line)
+
+    async def async_config_get_cluster(self) -> list[tuple[str, int]]:
+        connection = await _open_connection(
+            self._server,
+            self._default_kwargs.get("connect_timeout"),
+            self._default_kwargs.get("tls_context"),
+        )
+        try:
+            response = await _wait_for(
+                self._read_config_get_cluster(connection),
+                self._default_kwargs.get("timeout"),
+            )
+        except Exception:
+            logger.warning("ElastiCache discovery: config get cluster failed", exc_info=True)
+            raise
+        finally:
+            connection.close()
+
+        return self._parse_config_get_cluster_response(response)
+
+
+class _AsyncNodeClient:
+    """A pool of asyncio stream connections to a single memcached node."""
+
+    def __init__(
+        self,
+        server: tuple[str, int],
+        serde: Any,
+        connect_timeout: float | None = None,
+        timeout: float | None = None,
+        key_prefix: bytes = b"",
+        max_pool_size: int | None = None,
+        default_noreply: bool = True,
+        allow_unicode_keys: bool = False,
+        encoding: str = "ascii",
+        tls_context: SSLContext | None = None,
+    ) -> None:
+        self.server = server
+        self.serde = serde
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.default_noreply = default_noreply
+        self.allow_unicode_keys = allow_unicode_keys
+        self.encoding = encoding
+        self.tls_context = tls_context
+
+        self._idle: list[_AsyncConnection] = []
+        self._slots = asyncio.Semaphore(max_pool_size) if max_pool_size else None
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[_AsyncConnection]:
+        if self._slots is not None:
+            await self._slots.acquire()
+        try:
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                connection = await _open_connection(self.server, self.connect_timeout, self.tls_context)
+
+            try:
+                yield connection
+            except BaseException:
+                # The connection may be in the middle of a response; never hand it out again.
+                connection.close()
+                raise
+            else:
+                self._idle.append(connection)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    async def _execute(self, command: Callable[[_AsyncConnection], Awaitable[T]]) -> T:
+        async with self._connection() as connection:
+            return await _wait_for(command(connection), self.timeout)
+
+    def _check_key(self, key: Key) -> bytes:
+        return bytes(check_key_helper(key, self.allow_unicode_keys, self.key_prefix))
+
+    def _check_integer(self, value: int, name: str) -> bytes:
+        if not isinstance(value, int):
+            raise MemcacheIllegalInputError(f"{name} must be integer, got bad value: {value!r}")
+        return str(value).encode(self.encoding)
+
+    async def _fetch(self, name: bytes, keys: Iterable[Key], expect_cas: bool) -> dict[Any, Any]:
+        remapped_keys = {self._check_key(key): key for key in keys}
+        if not remapped_keys:
+            return {}
+
+        cmd = name + b" " + b" ".join(remapped_keys) + b"\r\n"
+
+        async def command(connection: _AsyncConnection) -> dict[Any, Any]:
+            await connection.send(cmd)
+
+            result: dict[Any, Any] = {}
+            while True:
+                line = await connection.readline()
+                _raise_errors(line, name)
+                if line == b"END":
+                    return result
+                elif not line.startswith(b"VALUE"):
+                    raise MemcacheUnknownError(line[:32])
+
+                _, key, flags, size, *cas = line.split()
+                data = await connection.readvalue(int(size))
+                if int(flags) & FLAG_CHUNKED:
+                    # Chunked values are only reassembled by the blocking client.
+                    continue
+                original_key = remapped_keys[key]
+                value = self.serde.deserialize(original_key, data, int(flags))
+                result[original_key] = (value, cas[0]) if expect_cas else value
+
+        return await self._execute(command)
+
+    async def _store(
+        self,
+        name: bytes,
+        values: dict[Any, Any],
+        expire: int,
+        noreply: bool | None,
+    ) -> dict[Any, bool | None]:
+        if noreply is None:
+            noreply = self.default_noreply
+
+        extra = b" noreply" if noreply else b""
+        expire_bytes = self._check_integer(expire, "expire")
+
+        cmds: list[bytes] = []
+        for key, value in values.items():
+            prefixed_key = self._check_key(key)
+            data, flags = self.serde.serialize(prefixed_key, value)
+            if not isinstance(data, bytes):
+                try:
+                    data = str(data).encode(self.encoding)
+                except UnicodeEncodeError as e:
+                    raise MemcacheIllegalInputError(f"Data values must be binary-safe: {e}") from e
+
+            cmds.append(
+                b"%s %s %d %s %d%s\r\n%s\r\n" % (name, prefixed_key, flags, expire_bytes, len(data), extra, data),
+            )
+
+        async def command(connection: _AsyncConnection) -> dict[Any, bool | None]:
+            await connection.send(b"".join(cmds))
+            if noreply:
+                return dict.fromkeys(values, True)
+
+            results: dict[Any, bool | None] = {}
+            for key in values:
+                line = await connection.readline()
+                _raise_errors(line, name)
+                if line not in VALID_STORE_RESULTS[name]:
+                    raise MemcacheUnknownError(line[:32])
+                results[key] = STORE_RESULTS_VALUE[line]
+            return results
+
+        return await self._execute(command)
+
+    async def _misc(self, cmds: list[bytes], name: bytes, noreply: bool) -> list[bytes]:
+        async def command(connection: _AsyncConnection) -> list[bytes]:
+            await connection.send(b"".join(cmds))
+            if noreply:
+                return []
+
+            results: list[bytes] = []
+            for _ in cmds:
+                line = await connection.readline()
+                _raise_errors(line, name)
+                results.append(line)
+            return results
+
+        return await self._execute(command)
+
+    async def get(self, key: Key, default: Any = None) -> Any:
+        return (await self._fetch(b"get", [key], False)).get(key, default)
+
+    async def get_many(self, keys: Iterable[Key]) -> dict[Any, Any]:
+        return await self._fetch(b"get", keys, False)
+
+    async def gets_many(self, keys: Iterable[Key]) -> dict[Any, Any]:
+        return await self._fetch(b"gets", keys, True)
+
+    async def set(self, key: Key, value: Any, expire: int = 0, noreply: bool | None = None) -> bool:
+        return bool((await self._store(b"set", {key: value}, expire, noreply))[key])
+
+    async def add(self, key: Key, value: Any, expire: int = 0, noreply: bool | None = None) -> bool:
+        return bool((await self._store(b"add", {key: value}, expire, noreply))[key])
+
+    async def set_many(self, values: dict[Any, Any], expire: int = 0, noreply: bool | None = None) -> list[Any]:
+        results = await self._store(b"set", values, expire, noreply)
+        return [key for key, stored in results.items() if not stored]
+
+    async def delete(self, key: Key, noreply: bool | None = None) -> bool:
+        if noreply is None:
+            noreply = self.default_noreply
+        cmd = b"delete " + self._check_key(key) + (b" noreply" if noreply else b"") + b"\r\n"
+        results = await self._misc([cmd], b"delete", noreply)
+        return noreply or results[0] == b"DELETED"
+
+    async def delete_many(self, keys: Iterable[Key], noreply: bool | None = None) -> bool:
+        if noreply is None:
+            noreply = self.default_noreply
+        extra = b" noreply" if noreply else b""
+        cmds = [b"delete " + self._check_key(key) + extra + b"\r\n" for key in keys]
+        if cmds:
+            await self._misc(cmds, b"delete", noreply)
+        return True
+
+    async def _incr_decr(self, name: bytes, key: Key, value: int, noreply: bool) -> int | None:
+        cmd = b"%s %s %s%s\r\n" % (
+            name,
+            self._check_key(key),
+            self._check_integer(value, "value"),
+            b" noreply" if noreply else b"",
+        )
+        results = await self._misc([cmd], name, noreply)
+        if noreply or results[0] == b"NOT_FOUND":
+            return None
+        return int(results[0])
+
+    async def incr(self, key: Key, value: int, noreply: bool = False) -> int | None:
+        return await self._incr_decr(b"incr", key, value, noreply)
+
+    async def decr(self, key: Key, value: int, noreply: bool = False) -> int | None:
+        return await self._incr_decr(b"decr", key, value, noreply)
+
+    async def touch(self, key: Key, expire: int = 0, noreply: bool | None = None) -> bool:
+        if noreply is None:
+            noreply = self.default_noreply
+        cmd = b"touch %s %s%s\r\n" % (
+            self._check_key(key),
+            self._check_integer(expire, "expire"),
+            b" noreply" if noreply else b"",
+        )
+        results = await self._misc([cmd], b"touch", noreply)
+        return noreply or results[0] == b"TOUCHED"
+
+    async def flush_all(self, delay: int = 0, noreply: bool | None = None) -> bool:
+        if noreply is None:
+            noreply = self.default_noreply
+        cmd = b"flush_all %s%s\r\n" % (self._check_integer(delay, "delay"), b" noreply" if noreply else b"")
+        results = await self._misc([cmd], b"flush_all", noreply)
+        return noreply or results[0] == b"OK"
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class AsyncAWSElastiCacheClient:
+    """ElastiCache-aware asyncio client with the routing and discovery semantics of AWSElastiCacheClient.
+
+    Options that only apply to the blocking client (``use_pooling``, ``socket_module``, ``no_delay``,
+    ...) are accepted and ignored, so the same ``OPTIONS`` configure both clients. The backend refuses the
+    ones changing what is stored (``chunking``, ``hot_keys`` and ``handoff``) or in which order
+    (``write_behind``) with ``native_async``.
+    Connections to the data nodes are always pooled; ``max_pool_size`` bounds each node's pool.
+    """
+
+    def __init__(
+        self,
+        configuration_endpoint: str,
+        hasher: str | Callable[[], Any] = "rendezvous",
+        serde: Any = None,
+        serializer: Any = None,
+        deserializer: Any = None,
+        connect_timeout: float | None = None,
+        timeout: float | None = None,
+        key_prefix: bytes | str = b"",
+        max_pool_size: int | None = None,
+        retry_attempts: int = 2,
+        retry_timeout: float = 1,
+        dead_timeout: float = 60,
+        ignore_exc: bool = False,
+        allow_unicode_keys: bool = False,
+        default_noreply: bool = True,
+        encoding: str = "ascii",
+        tls_context: SSLContext | None = None,
+        # Discovery & topology management
+        use_vpc_ip_address: bool = True,
+        discovery_interval: float = 0.0,
+        discovery_retry_delay: float = 0.0,
+        background_discovery: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        if not _AWS_CONFIGURATION_ENDPOINT_PATTERN.fullmatch(configuration_endpoint):
+            raise ValueError(
+                f"Invalid configuration endpoint '{configuration_endpoint}' (expected 'host:port' or '[ip]:port')."
+            )
+
+        self.configuration_endpoint = configuration_endpoint
+        self.retry_attempts = retry_attempts
+        self.retry_timeout = retry_timeout
+        self.dead_timeout = dead_timeout
+        self.ignore_exc = ignore_exc
+        self.allow_unicode_keys = allow_unicode_keys
+        self.key_prefix = key_prefix.encode("ascii") if isinstance(key_prefix, str) else key_prefix
+
+        self.default_kwargs: dict[str, Any] = {
+            "serde": serde or LegacyWrappingSerde(serializer, deserializer),
+            "connect_timeout": connect_timeout,
+            "timeout": timeout,
+            "key_prefix": self.key_prefix,
+            "max_pool_size": max_pool_size,
+            "default_noreply": default_noreply,
+            "allow_unicode_keys": allow_unicode_keys,
+            "encoding": encoding,
+            "tls_context": tls_context,
+        }
+
+        self._configuration_endpoint_client = _AsyncConfigurationEndpointClient(
+            configuration_endpoint,
+            default_kwargs=self.default_kwargs,
+            use_vpc_ip_address=use_vpc_ip_address,
+        )
+
+        self.clients: dict[str, _AsyncNodeClient] = {}
+        self.hasher = get_hasher_class(hasher)()
+        self._failed_clients: dict[str, dict[str, float]] = {}
+        self._dead_clients: dict[str, float] = {}
+        self._last_dead_check_time = time.time()
+
+        self._use_auto_discovery = bool(discovery_interval)
+        self._discovery_interval = (
+            self._use_auto_discovery
+            # Jitter discovery interval
+            and float(discovery_interval) * random.uniform(0.8, 1.2)
+            or float(discovery_interval)
+        )
+        self._discovery_retry_delay = float(discovery_retry_delay)
+        self._last_discovery_time: float = 0.0
+        self._discovery_lock = asyncio.Lock()
+        self._use_background_discovery = bool(background_discovery) and self._use_auto_discovery
+        self._discovery_task: asyncio.Task[None] | None = None
+        self._started = False
+
+        #: cluster config version of the current topology, ``None`` until known
+        self.config_version: int | None = None
+        #: wall clock time of the last topology change
+        self.topology_changed_at: float | None = None
+
+    async def _discover_client_keys(self) -> tuple[int | None, set[str]] | None:
+        for attempt in range(max(self.retry_attempts, 1)):
+            if attempt and self._discovery_retry_delay > 0.0:
+                await asyncio.sleep(self._discovery_retry_delay)
+            try:
+                nodes = await self._configuration_endpoint_client.async_config_get_cluster()
+                return self._configuration_endpoint_client.config_version, {f"{host}:{port}" for host, port in nodes}
+            except MemcacheUnknownCommandError:
+                break
+            except (MemcacheError, OSError):
+                continue
+
+        logger.warning("ElastiCache discovery: cluster discovery failed, keeping current topology.")
+        return None
+
+    async def _refresh_clients(self, force: bool = False) -> None:
+        if not force and (not self._use_auto_discovery or self._use_background_discovery):
+            return
+
+        now = time.monotonic()
+        if not force and (now - self._last_discovery_time) < self._discovery_interval:
+            return
+
+        # Periodic refreshes skip while another task is talking to the configuration endpoint.
+        if not force and self._discovery_lock.locked():
+            return
+
+        async with self._discovery_lock:
+            discovery = await self._discover_client_keys()
+            self._last_discovery_time = now
+            if discovery is not None:
+                await self._update_topology(*discovery)
+
+    async def _update_topology(self, version: int | None, new_keys: set[str]) -> None:
+        if version is not None and version == self.config_version:
+            return
+
+        if new_keys != self.clients.keys():
+            await self._apply_client_keys(new_keys)
+            self.topology_changed_at = time.time()
+        self.config_version = version
+
+    async def _apply_client_keys(self, new_keys: set[str]) -> None:
+        current_keys = set(self.clients.keys())
+
+        old_clients: list[_AsyncNodeClient] = []
+        for client_key in current_keys - new_keys:
+            old_clients.append(self.clients.pop(client_key))
+            self._failed_clients.pop(client_key, None)
+            if self._dead_clients.pop(client_key, None) is None:
+                self.hasher.remove_node(client_key)
+
+        for client_key in new_keys - current_keys:
+            host, port = client_key.rsplit(":", 1)
+            self.clients[client_key] = _AsyncNodeClient((host, int(port)), **self.default_kwargs)
+            self.hasher.add_node(client_key)
+
+        for old_client in old_clients:
+            await old_client.close()
+
+    async def _run_discovery_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._discovery_interval)
+            try:
+                await self._refresh_clients(force=True)
+            except Exception:
+                logger.warning("ElastiCache discovery: background refresh failed", exc_info=True)
+
+    async def _ensure_started(self) -> None:
+        if self._started:
+            return
+
+        # Concurrent first callers wait for the initial discovery instead of routing against an empty ring.
+        async with self._discovery_lock:
+            if self._started:
+                return
+
+            try:
+                discovery = await self._discover_client_keys()
+                self._last_discovery_time = time.monotonic()
+                if discovery is not None:
+                    await self._update_topology(*discovery)
+            except Exception as e:
+                logger.exception(f"Initial discovery failed: {e}")
+            self._started = True
+
+        if self._use_background_discovery:
+            self._discovery_task = asyncio.get_running_loop().create_task(self._run_discovery_loop())
+
+    def _retry_dead(self) -> None:
+        current_time = time.time()
+        if current_time - self._last_dead_check_time <= self.dead_timeout:
+            return
+
+        for client_key, dead_time in list(self._dead_clients.items()):
+            if current_time - dead_time > self.dead_timeout and client_key in self.clients:
+                logger.debug("bringing server back into rotation %s", client_key)
+                del self._dead_clients[client_key]
+                self.hasher.add_node(client_key)
+        self._last_dead_check_time = current_time
+
+    def _mark_dead(self, client_key: str) -> None:
+        logger.debug("marking server as dead: %s", client_key)
+        self._failed_clients.pop(client_key, None)
+        if client_key not in self._dead_clients:
+            self._dead_clients[client_key] = time.time()
+            self.hasher.remove_node(client_key)
+
+    def _mark_failed(self, client_key: str) -> None:
+        failed_metadata = self._failed_clients.get(client_key)
+        if failed_metadata is None:
+            self._failed_clients[client_key] = {"failed_time": time.time(), "attempts": 0}
+            if self.retry_attempts <= 0:
+                self._mark_dead(client_key)
+        else:
+            failed_metadata["attempts"] += 1
+            failed_metadata["failed_time"] = time.time()
+
+    async def _get_client(self, key: Key) -> _AsyncNodeClient | None:
+        await self._ensure_started()
+        check_key_helper(key, self.allow_unicode_keys, self.key_prefix)
+
+        last_exception: Exception | None = None
+        for _ in range(self.retry_attempts + 1):
+            try:
+                await self._refresh_clients()
+                if self._dead_clients:
+                    self._retry_dead()
+
+                client_key = self.hasher.get_node(key)
+                if client_key is None:
+                    if self.ignore_exc:
+                        return None
+                    raise MemcacheError("All servers seem to be down right now")
+                return self.clients[client_key]
+            except (MemcacheError, OSError) as exc:
+                last_exception = exc
+                if self._discovery_retry_delay > 0.0:
+                    await asyncio.sleep(self._discovery_retry_delay)
+                try:
+                    await self._refresh_clients(force=True)
+                except Exception as e:
+                    logger.debug("Discovery refresh failed during retry: %r", e)
+
+        assert last_exception is not None
+        raise last_exception
+
+    async def _safely_run(
+        self,
+        client: _AsyncNodeClient,
+        command: Callable[[], Awaitable[T]],
+        default_val: T,
+    ) -> T:
+        client_key = "%s:%s" % client.server
+        try:
+            failed_metadata = self._failed_clients.get(client_key)
+            if failed_metadata is not None:
+                if failed_metadata["attempts"] < self.retry_attempts:
+                    if time.time() - failed_metadata["failed_time"] > self.retry_timeout:
+                        logger.debug("retrying failed server: %s", client_key)
+                        result = await command()
+                        self._failed_clients.pop(client_key, None)
+                        return result
+                    return default_val
+                else:
+                    self._mark_dead(client_key)
+
+            return await command()
+        except OSError:
+            self._mark_failed(client_key)
+            if not self.ignore_exc:
+                raise
+            return default_val
+        except Exception:
+            if not self.ignore_exc:
+                raise
+            return default_val
+
+    async def _group_keys_by_client(self, keys: Iterable[Key]) -> list[tuple[_AsyncNodeClient, list[Any]]]:
+        batches: dict[tuple[str, int], tuple[_AsyncNodeClient, list[Any]]] = {}
+        for key in keys:
+            client = await self._get_client(key)
+            if client is None:
+                continue
+
+            batch = batches.get(client.server)
+            if batch is None:
+                batch = batches[client.server] = (client, [])
+            batch[1].append(key)
+
+        return list(batches.values())
+
+    async def _run_cmd(self, cmd: str, key: Key, default_val: Any, *args: Any, **kwargs: Any) -> Any:
+        client = await self._get_client(key)
+        if client is None:
+            return default_val
+
+        func = getattr(client, cmd)
+        return await self._safely_run(client, partial(func, key, *args, **kwargs), default_val)
+
+    async def get(self, key: Key, default: Any = None) -> Any:
+        return await self._run_cmd("get", key, default, default)
+
+    async def get_many(self, keys: Iterable[Key], gets: bool = False) -> dict[Any, Any]:
+        batches = await self._group_keys_by_client(keys)
+
+        async def fetch(client: _AsyncNodeClient, batch: list[Any]) -> dict[Any, Any]:
+            get_func = client.gets_many if gets else client.get_many
+            return await self._safely_run(client, partial(get_func, batch), {})
+
+        end: dict[Any, Any] = {}
+        for result in await asyncio.gather(*(fetch(client, batch) for client, batch in batches)):
+            end.update(result)
+        return end
+
+    get_multi = get_many
+
+    async def gets_many(self, keys: Iterable[Key]) -> dict[Any, Any]:
+        return await self.get_many(keys, gets=True)
+
+    async def set(self, key: Key, value: Any, expire: int = 0, noreply: bool | None = None) -> bool:
+        return bool(await self._run_cmd("set", key, False, value, expire, noreply))
+
+    async def add(self, key: Key, value: Any, expire: int = 0, noreply: bool | None = None) -> bool:
+        return bool(await self._run_cmd("add", key, False, value, expire, noreply))
+
+    async def set_many(self, values: dict[Any, Any], expire: int = 0, noreply: bool | None = None) -> list[Any]:
+        batches = await self._group_keys_by_client(values)
+
+        async def store(client: _AsyncNodeClient, batch: list[Any]) -> list[Any]:
+            batch_values = {key: values[key] for key in batch}
+            return await self._safely_run(client, partial(client.set_many, batch_values, expire, noreply), batch)
+
+        routed = {key for _, batch in batches for key in batch}
+        failed = [key for key in values if key not in routed]
+        for result in await asyncio.gather(*(store(client, batch) for client, batch in batches)):
+            failed += result
+        return failed
+
+    set_multi = set_many
+
+    async def delete(self, key: Key, noreply: bool | None = None) -> bool:
+        return bool(await self._run_cmd("delete", key, False, noreply))
+
+    async def delete_many(self, keys: Iterable[Key], noreply: bool | None = None) -> bool:
+        batches = await self._group_keys_by_client(keys)
+        await asyncio.gather(
+            *(self._safely_run(client, partial(client.delete_many, batch, noreply), False) for client, batch in batches)
+        )
+        return True
+
+    delete_multi = delete_many
+
+    async def incr(self, key: Key, value: int, noreply: bool = False) -> int | None:
+        result: int | None = await self._run_cmd("incr", key, False, value, noreply)
+        return result
+
+    async def decr(self, key: Key, value: int, noreply: bool = False) -> int | None:
+        result: int | None = await self._run_cmd("decr", key, False, value, noreply)
+        return result
+
+    async def touch(self, key: Key, expire: int = 0, noreply: bool | None = None) -> bool:
+        return bool(await self._run_cmd("touch", key, False, expire, noreply))
+
+    async def flush_all(self, delay: int = 0, noreply: bool | None = None) -> None:
+        await self._ensure_started()
+        await asyncio.gather(
+            *(
+                self._safely_run(client, partial(client.flush_all, delay, noreply), False)
+                for client in self.clients.values()
+            )
+        )
+
+    async def close(self) -> None:
+        task, self._discovery_task = self._discovery_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        for client in list(self.clients.values()):
+            try:
+                await client.close()
+            except Exception:
+                logger.warning("Exception occurred while closing ElastiCache client", exc_info=True)
@@ -1,14 +1,41 @@
+import asyncio
 import logging
-from typing import Any, Sequence
+import time
+import weakref
+from contextlib import AbstractContextManager
+from functools import partial
+from typing import Any, Sequence, cast
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.cache import InvalidCacheBackendError
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, default_key_func
 from django.core.cache.backends.memcached import PyMemcacheCache
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.functional import cached_property
 
+from .async_client import AsyncAWSElastiCacheClient
+from .batching import BatchLoader, Deferred, batching, get_batch_loader
 from .client import _AWS_CONFIGURATION_ENDPOINT_PATTERN, AWSElastiCacheClient
+from .cooperative import CooperativeOptions, get_cooperative_runtime, get_hub_client
+from .keys import TrustedKeyOptions
+from .namespaces import Namespace, NamespaceOptions, get_generation_cache
+from .near_cache import NearCache, get_near_cache
+from .serde import CompressingSerde, get_compressing_serde
+from .stampede import StampedeOptions, get_stampede_protection
+from .write_behind import WriteBehindQueue, get_write_behind_queue
 
 logger = logging.getLogger(__name__)
 
+_missing = object()
+
+# Versions whose "prefix:version:" is cached in trusted key mode
+_MAX_KEY_PREFIXES = 64
+
+# Options of the blocking client changing what is stored, or in which order, which the asyncio client does not
+# implement
+_BLOCKING_CLIENT_OPTIONS = ("chunking", "hot_keys", "handoff", "write_behind")
+
 
 class ElastiPymemcache(PyMemcacheCache):
     def __init__(
@@ -20,6 +47,64 @@ class ElastiPymemcache(PyMemcacheCache):
         self._class = AWSElastiCacheClient
         self._endpoint = self._validate_endpoint()
 
+        # asyncio streams are bound to the event loop that opened them, so keep one client per loop.
+        self._native_async = bool(self._options.pop("native_async", False))  # type: ignore[attr-defined]
+        if self._native_async:
+            unsupported = [name for name in _BLOCKING_CLIENT_OPTIONS if self._options.get(name)]  # type: ignore[attr-defined]
+            if unsupported:
+                # Async reads and writes would disagree with the blocking ones on the same keys.
+                raise ImproperlyConfigured(f"native_async: not supported with {', '.join(unsupported)}.")
+        self._async_caches: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncAWSElastiCacheClient] = (
+            weakref.WeakKeyDictionary()
+        )
+
+        # The near cache keeps values uncompressed, so it uses the serde before compression is added.
+        serde = self._options["serde"]  # type: ignore[attr-defined]
+
+        near_cache_options = self._options.pop("near_cache", None)  # type: ignore[attr-defined]
+        self.near_cache: NearCache | None = None
+        if near_cache_options:
+            self.near_cache = get_near_cache(self._endpoint, serde, near_cache_options)
+
+        compression_options = self._options.pop("compression", None)  # type: ignore[attr-defined]
+        self.compression: CompressingSerde | None = None
+        if compression_options:
+            self.compression = get_compressing_serde(
+                self._endpoint,
+                serde,
+                {} if compression_options is True else compression_options,
+            )
+            self._options["serde"] = self.compression  # type: ignore[attr-defined]
+
+        stampede_options = self._options.pop("stampede", None)  # type: ignore[attr-defined]
+        self.stampede = StampedeOptions.from_option(stampede_options)
+
+        self._meta_protocol = self._options.get("protocol", "text") == "meta"  # type: ignore[attr-defined]
+        self._cooperative = CooperativeOptions.from_option(self._options.get("cooperative"))  # type: ignore[attr-defined]
+
+        self._trusted_keys = TrustedKeyOptions.from_option(self._options.get("trusted_keys"))  # type: ignore[attr-defined]
+        self._validate_keys = self._trusted_keys is None or bool(
+            settings.DEBUG if self._trusted_keys.validate is None else self._trusted_keys.validate
+        )
+        # "prefix:version:" of the default KEY_FUNCTION, by version
+        self._key_prefixes: dict[Any, str] | None = None
+        if self._trusted_keys is not None and self.key_func is default_key_func:
+            self._key_prefixes = {}
+
+        self.namespaces = NamespaceOptions.from_option(self._options.pop("namespaces", None))  # type: ignore[attr-defined]
+
+        write_behind_options = self._options.pop("write_behind", None)  # type: ignore[attr-defined]
+        self.write_behind: WriteBehindQueue | None = None
+        if write_behind_options:
+            # The workers write with clients of their own, configured like this backend's. They run in OS
+            # threads, so their clients do not use the greenlet primitives of a hub.
+            worker_options = {k: v for k, v in self._options.items() if k != "cooperative"}  # type: ignore[attr-defined]
+            self.write_behind = get_write_behind_queue(
+                self._endpoint,
+                {} if write_behind_options is True else write_behind_options,
+                partial(self._class, configuration_endpoint=self._endpoint, **worker_options),
+            )
+
     def _validate_endpoint(self) -> str:
         if not self._servers or len(self._servers) != 1:  # type: ignore[attr-defined]
             raise InvalidCacheBackendError("ElastiCache requires exactly one Configuration Endpoint (host:port).")
@@ -31,12 +116,481 @@ class ElastiPymemcache(PyMemcacheCache):
 
     @cached_property
     def _cache(self) -> AWSElastiCacheClient:
-        return self._class(
+        factory = partial(
+            self._class,
             configuration_endpoint=self._endpoint,
             **self._options,  # type: ignore[attr-defined]
         )
+        if self._cooperative is None:
+            return factory()
+
+        # Django sees greenlets as threads and creates a backend for each; they share the client of their hub.
+        key = (self._endpoint, *sorted((name, id(value)) for name, value in self._options.items()))  # type: ignore[attr-defined]
+        client: AWSElastiCacheClient = get_hub_client(get_cooperative_runtime(self._cooperative.library), key, factory)
+        return client
+
+    def close(self, **kwargs: Any) -> None:
+        # Django closes the caches after every request: the write-behind queue is only flushed at exit.
+        # In cooperative mode, the connections are shared by the greenlets of the hub and stay open.
+        if self._cooperative is None:
+            super().close(**kwargs)
+
+    def _flush_write_behind(self) -> None:
+        if self.write_behind is not None and self.write_behind.flush_on_close and not self.write_behind.flush():
+            logger.warning("Write-behind: pending writes not flushed within %ss", self.write_behind.flush_timeout)
+
+    def _wait_for_write_behind(self, key: Any, version: int | None) -> None:
+        """Wait for the queued writes of a key's shard before writing it synchronously, so they do not land after."""
+        if self.write_behind is not None:
+            self.write_behind.wait_for(self.make_and_validate_key(key, version=version))
+
+    def _write_behind(self, command: str, key: Any, version: int | None, *args: Any) -> bool:
+        """Queue a write with ``write_behind``; ``False`` when it is to be written synchronously."""
+        if self.write_behind is None:
+            return False
+        return self.write_behind.put((command, self.make_and_validate_key(key, version=version), *args))
+
+    def write_behind_stats(self) -> dict[str, int]:
+        """Depth and counters of the write-behind queue, see the ``write_behind`` option."""
+        return self.write_behind.stats() if self.write_behind is not None else {}
+
+    @property
+    def _async_cache(self) -> AsyncAWSElastiCacheClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_caches.get(loop)
+        if client is None:
+            client = self._async_caches[loop] = AsyncAWSElastiCacheClient(
+                configuration_endpoint=self._endpoint,
+                **self._options,  # type: ignore[attr-defined]
+            )
+        return client
+
+    def make_key(self, key: Any, version: int | None = None) -> str:
+        prefixes = self._key_prefixes
+        if prefixes is None:
+            return super().make_key(key, version)
+
+        if version is None:
+            version = self.version
+        prefix = prefixes.get(version)
+        if prefix is None:
+            if len(prefixes) >= _MAX_KEY_PREFIXES:
+                prefixes.clear()
+            prefix = prefixes[version] = f"{self.key_prefix}:{version}:"
+        return f"{prefix}{key}"
+
+    def make_and_validate_key(self, key: Any, version: int | None = None) -> str:
+        key = self.make_key(key, version=version)
+        if self._validate_keys:
+            self.validate_key(key)
+        return cast(str, key)
+
+    def _make_keys(self, keys: list[Any], version: int | None) -> list[str]:
+        """``make_and_validate_key`` of every key, with one prefix lookup for trusted keys."""
+        if self._key_prefixes is None or self._validate_keys:
+            return [self.make_and_validate_key(key, version=version) for key in keys]
+        prefix = self.make_key("", version)
+        return [f"{prefix}{key}" for key in keys]
+
+    def _near_cache_lookup(self, key_map: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+        assert self.near_cache is not None
+        found = self.near_cache.get_many(k for k, key in key_map.items() if self.near_cache.accepts(key))
+        return found, [k for k in key_map if k not in found]
+
+    def _near_cache_fill(self, key_map: dict[str, Any], fetched: dict[str, Any]) -> None:
+        assert self.near_cache is not None
+        self.near_cache.set_many({k: v for k, v in fetched.items() if self.near_cache.accepts(key_map[k])})
+
+    def _invalidate_local(self, keys: Any, version: int | None) -> None:
+        """Drop the keys written through this cache from the near cache and the batching scope."""
+        loader = self._batch_loader()
+        if self.near_cache is None and loader is None:
+            return
+
+        keys = list(keys)
+        if self.near_cache is not None:
+            self.near_cache.delete_many(
+                self.make_and_validate_key(key, version=version) for key in keys if self.near_cache.accepts(key)
+            )
+        if loader is not None:
+            loader.forget(self.make_and_validate_key(key, version=version) for key in keys)
+
+    def _batch_loader(self) -> BatchLoader | None:
+        return get_batch_loader(self._endpoint, self._options["serde"])  # type: ignore[attr-defined]
+
+    def _fetch_many(self, key_map: dict[str, Any]) -> dict[str, Any]:
+        if self.near_cache is None:
+            return dict(self._cache.get_multi(list(key_map)))
+
+        found, missing = self._near_cache_lookup(key_map)
+        if missing:
+            fetched = self._cache.get_multi(missing)
+            self._near_cache_fill(key_map, fetched)
+            found.update(fetched)
+        return found
+
+    def batch(self) -> AbstractContextManager[None]:
+        """Context manager batching the reads of every cache in its scope, see ``get_deferred()``."""
+        return batching()
+
+    def get_deferred(self, key: Any, default: Any = None, version: int | None = None) -> Deferred:
+        """Queue a read in the current batching scope.
+
+        The value is loaded on ``.value``, with the other queued keys in one multi-get. Outside of a scope, it
+        is read on ``.value``.
+        """
+        loader = self._batch_loader()
+        if loader is None:
+            return Deferred(partial(self.get_many, [key], version=version), key, default)
+
+        key_map = {self.make_and_validate_key(key, version=version): key}
+        loader.defer(key_map)
+        return Deferred(partial(loader.load, key_map, self._fetch_many), next(iter(key_map)), default)
+
+    def get(self, key: Any, default: Any = None, version: int | None = None) -> Any:
+        if (self.near_cache is None or not self.near_cache.accepts(key)) and self._batch_loader() is None:
+            return super().get(key, default, version)
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys: Any, version: int | None = None) -> dict[Any, Any]:
+        loader = self._batch_loader()
+        if self.near_cache is None and loader is None:
+            if self._trusted_keys is None:
+                return super().get_many(keys, version)
+            # Results are mapped back through the key lists, without a key map.
+            keys = list(keys)
+            safe_keys = self._make_keys(keys, version)
+            ret = self._cache.get_multi(safe_keys)
+            return {key: ret[safe_key] for key, safe_key in zip(keys, safe_keys) if safe_key in ret}
+
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = self._fetch_many(key_map) if loader is None else loader.load(key_map, self._fetch_many)
+        return {key_map[k]: v for k, v in found.items()}
+
+    def add(self, key: Any, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> bool:
+        self._wait_for_write_behind(key, version)
+        added = super().add(key, value, timeout, version)
+        self._invalidate_local([key], version)
+        return added
+
+    def set(self, key: Any, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> None:
+        if not self._write_behind("set", key, version, value, self._get_expire(timeout)):
+            super().set(key, value, timeout, version)
+        self._invalidate_local([key], version)
+
+    def touch(self, key: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> bool:
+        # Queued touches report success.
+        return self._write_behind("touch", key, version, self._get_expire(timeout)) or super().touch(
+            key, timeout, version
+        )
+
+    def set_many(self, data: dict[Any, Any], timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> list[Any]:
+        failed_keys = []
+        pending = data
+        if self.write_behind is not None:
+            expire = self._get_expire(timeout)
+            pending = {
+                key: value for key, value in data.items() if not self._write_behind("set", key, version, value, expire)
+            }
+
+        if pending and self._trusted_keys is None:
+            failed_keys = super().set_many(pending, timeout, version)
+        elif pending:
+            safe_keys = self._make_keys(list(pending), version)
+            failed = self._cache.set_multi(dict(zip(safe_keys, pending.values())), self.get_backend_timeout(timeout))
+            if failed:
+                original_keys = dict(zip(safe_keys, pending))
+                failed_keys = [original_keys[k] for k in failed]
+        self._invalidate_local(data, version)
+        return failed_keys
+
+    def delete(self, key: Any, version: int | None = None) -> bool:
+        # Queued deletes report success.
+        deleted = self._write_behind("delete", key, version) or super().delete(key, version)
+        self._invalidate_local([key], version)
+        return deleted
+
+    def delete_many(self, keys: Any, version: int | None = None) -> None:
+        keys = list(keys)
+        pending = keys
+        if self.write_behind is not None:
+            pending = [key for key in keys if not self._write_behind("delete", key, version)]
+
+        if pending and self._trusted_keys is None:
+            super().delete_many(pending, version)
+        elif pending:
+            self._cache.delete_multi(self._make_keys(pending, version))
+        self._invalidate_local(keys, version)
+
+    def incr(self, key: Any, delta: int = 1, version: int | None = None) -> int:
+        self._wait_for_write_behind(key, version)
+        try:
+            return super().incr(key, delta, version)
+        finally:
+            self._invalidate_local([key], version)
+
+    def clear(self) -> None:
+        super().clear()
+        if self.near_cache is not None:
+            self.near_cache.clear()
+        loader = self._batch_loader()
+        if loader is not None:
+            loader.clear()
+
+    def get_or_set(
+        self,
+        key: Any,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+        stampede: Any = None,
+    ) -> Any:
+        options = self.stampede if stampede is None else StampedeOptions.from_option(stampede, self.stampede)
+        if options is None:
+            return super().get_or_set(key, default, timeout, version)
+        return get_stampede_protection(self._endpoint).get_or_set(self, key, default, timeout, version, options)
+
+    def _release_lease(self, key: Any, token: str, version: int | None = None) -> bool:
+        """Delete a stampede lease only while it still holds ``token``, with ``gets`` and ``cas``."""
+        key = self.make_and_validate_key(key, version=version)
+        result = self._cache.gets(key)
+        # With ignore_exc, a failing node returns None rather than (value, cas).
+        if not isinstance(result, tuple):
+            return False
+        value, cas = result
+        if value != token or cas is None:
+            return False
+        # memcached expires an item with a negative expiration right away.
+        return bool(self._cache.cas(key, value, cas, expire=-1, noreply=False))
+
+    async def aget_or_set(
+        self,
+        key: Any,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+        stampede: Any = None,
+    ) -> Any:
+        options = self.stampede if stampede is None else StampedeOptions.from_option(stampede, self.stampede)
+        if options is None:
+            return await super().aget_or_set(key, default, timeout, version)
+        # Like Django's a* fallbacks, run on the sync thread; waiting for a lease must not block the event loop.
+        return await sync_to_async(self.get_or_set)(key, default, timeout, version, stampede)
+
+    def warm_up(self) -> frozenset[str]:
+        """Open and check the connections of this thread's client to every node, see the ``warmup`` option."""
+        return self._cache.warm_up()
+
+    def namespace(self, *names: str) -> Namespace:
+        """The keys of this cache under the namespaces ``names``, see the ``namespaces`` option.
+
+        ``cache.namespace("tenant:42").invalidate()`` makes every key of the namespace unreachable.
+        """
+        return Namespace(
+            self, names, self.namespaces, get_generation_cache(self._endpoint, self.namespaces.generation_ttl)
+        )
+
+    def outlier_state(self) -> dict[str, dict[str, Any]]:
+        """Latency percentiles, state and timeout of every node, see the ``outlier_detection`` option."""
+        return self._cache.outlier_state()
+
+    def handoff_state(self) -> dict[str, Any]:
+        """Transition window of the last topology change and the keys rescued, see the ``handoff`` option."""
+        return self._cache.handoff_state()
+
+    def get_and_touch(
+        self,
+        key: Any,
+        default: Any = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> Any:
+        """Get a value and reset its expiration, in one round trip with the meta protocol."""
+        if not self._meta_protocol:
+            value = self.get(key, _missing, version)
+            if value is _missing:
+                return default
+            self.touch(key, timeout, version)
+            return value
+
+        safe_key = self.make_and_validate_key(key, version=version)
+        return self._cache.meta_get(safe_key, default, touch=self._get_expire(timeout)).value
+
+    def get_or_revalidate(
+        self,
+        key: Any,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+        recache: int | None = None,
+    ) -> Any:
+        """``get_or_set()`` serving stale values while a single caller recomputes them.
+
+        With the meta protocol, the caller that misses, reads an invalidated value or, with ``recache``,
+        reads a value with less than ``recache`` seconds left, wins the right to recompute the value; the
+        others keep getting the stale value, or wait up to the stampede ``lease_wait`` on a miss. Falls back
+        to ``get_or_set()`` with the text protocol.
+        """
+        if not self._meta_protocol:
+            return self.get_or_set(key, default, timeout, version)
+
+        options = self.stampede or StampedeOptions()
+        safe_key = self.make_and_validate_key(key, version=version)
+        deadline = time.monotonic() + options.lease_wait
+        while True:
+            result = self._cache.meta_get(safe_key, _missing, recache=recache, vivify=options.lease_timeout or None)
+            if result.hit and not result.won:
+                return result.value
+            # Missed without a placeholder, won, or still pending on the winner after lease_wait.
+            if not result.pending or time.monotonic() >= deadline:
+                break
+            time.sleep(options.poll_interval)
+
+        value = default() if callable(default) else default
+        self.set(key, value, timeout, version)
+        return value
+
+    def invalidate(self, key: Any, stale_timeout: int = 30, version: int | None = None) -> bool:
+        """Mark a value stale for ``stale_timeout`` seconds instead of deleting it.
+
+        ``get_or_revalidate()`` callers keep getting it while one of them recomputes it. Deletes the value with
+        the text protocol.
+        """
+        if not self._meta_protocol:
+            return self.delete(key, version)
+
+        self._wait_for_write_behind(key, version)
+        invalidated = self._cache.invalidate(self.make_and_validate_key(key, version=version), stale_timeout)
+        self._invalidate_local([key], version)
+        return invalidated
+
+    def _get_expire(self, timeout: Any) -> int:
+        # BaseMemcachedCache.get_backend_timeout() always resolves to an integer for memcached.
+        return cast(int, self.get_backend_timeout(timeout))
+
+    async def aadd(self, key: Any, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> bool:
+        if not self._native_async:
+            return await super().aadd(key, value, timeout, version)
+
+        safe_key = self.make_and_validate_key(key, version=version)
+        added = await self._async_cache.add(safe_key, value, self._get_expire(timeout))
+        self._invalidate_local([key], version)
+        return added
+
+    async def aget(self, key: Any, default: Any = None, version: int | None = None) -> Any:
+        if not self._native_async:
+            return await super().aget(key, default, version)
+        elif self.near_cache is not None and self.near_cache.accepts(key):
+            return (await self.aget_many([key], version=version)).get(key, default)
+
+        key = self.make_and_validate_key(key, version=version)
+        return await self._async_cache.get(key, default)
+
+    async def aset(self, key: Any, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> None:
+        if not self._native_async:
+            return await super().aset(key, value, timeout, version)
+
+        safe_key = self.make_and_validate_key(key, version=version)
+        if not await self._async_cache.set(safe_key, value, self._get_expire(timeout)):
+            # Make sure the key doesn't keep its old value in case of failure to set (memcached's 1MB limit).
+            await self._async_cache.delete(safe_key)
+        self._invalidate_local([key], version)
+
+    async def atouch(self, key: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> bool:
+        if not self._native_async:
+            return await super().atouch(key, timeout, version)
+
+        key = self.make_and_validate_key(key, version=version)
+        return bool(await self._async_cache.touch(key, self._get_expire(timeout)))
+
+    async def adelete(self, key: Any, version: int | None = None) -> bool:
+        if not self._native_async:
+            return await super().adelete(key, version)
+
+        deleted = bool(await self._async_cache.delete(self.make_and_validate_key(key, version=version)))
+        self._invalidate_local([key], version)
+        return deleted
+
+    async def aget_many(self, keys: Any, version: int | None = None) -> dict[Any, Any]:
+        if not self._native_async:
+            return await super().aget_many(keys, version)
+
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if self.near_cache is None:
+            ret = await self._async_cache.get_many(key_map.keys())
+        else:
+            ret, missing = self._near_cache_lookup(key_map)
+            if missing:
+                fetched = await self._async_cache.get_many(missing)
+                self._near_cache_fill(key_map, fetched)
+                ret.update(fetched)
+        return {key_map[k]: v for k, v in ret.items()}
+
+    async def aset_many(
+        self,
+        data: dict[Any, Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> list[Any]:
+        if not self._native_async:
+            return await super().aset_many(data, timeout, version)
+
+        safe_data = {}
+        original_keys = {}
+        for key, value in data.items():
+            safe_key = self.make_and_validate_key(key, version=version)
+            safe_data[safe_key] = value
+            original_keys[safe_key] = key
+        failed_keys = await self._async_cache.set_many(safe_data, self._get_expire(timeout))
+        self._invalidate_local(data, version)
+        return [original_keys[k] for k in failed_keys]
+
+    async def adelete_many(self, keys: Any, version: int | None = None) -> None:
+        if not self._native_async:
+            return await super().adelete_many(keys, version)
+
+        keys = list(keys)
+        await self._async_cache.delete_many([self.make_and_validate_key(key, version=version) for key in keys])
+        self._invalidate_local(keys, version)
+
+    async def aincr(self, key: Any, delta: int = 1, version: int | None = None) -> int:
+        if not self._native_async:
+            return await super().aincr(key, delta, version)
+
+        safe_key = self.make_and_validate_key(key, version=version)
+        # Memcached doesn't support negative delta.
+        if delta < 0:
+            val = await self._async_cache.decr(safe_key, -delta)
+        else:
+            val = await self._async_cache.incr(safe_key, delta)
+        self._invalidate_local([key], version)
+        if val is None:
+            raise ValueError(f"Key '{safe_key}' not found")
+        return val
+
+    async def aclear(self) -> None:
+        if not self._native_async:
+            return await super().aclear()
+
+        await self._async_cache.flush_all()
+        if self.near_cache is not None:
+            self.near_cache.clear()
+        loader = self._batch_loader()
+        if loader is not None:
+            loader.clear()
+
+    async def aclose(self, **kwargs: Any) -> None:
+        client = self._async_caches.pop(asyncio.get_running_loop(), None)
+        if client is None:
+            return
+
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning("Exception occurred while closing ElastiCache client: %s", e)
 
     def _safe_close(self, **kwargs: Any) -> None:
+        self._flush_write_behind()
         client = self.__dict__.pop("_cache", None)
         if not client:
             return
@@ -0,0 +1,125 @@
+"""
+Request-scoped batching of cache reads
+
+Within a ``batching()`` scope, ``ElastiPymemcache`` collects the keys read through ``get_deferred()`` and
+loads them, with the keys of the next ``get()``/``get_many()``, in one multi-get pipelined per node
+(DataLoader style). Every key is fetched at most once per scope: repeated reads are served from the scope,
+each getting its own copy of mutable values, and writes through the cache drop the keys they touch.
+``BatchingMiddleware`` opens a scope per request.
+"""
+
+import copy
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+_missing = object()
+
+# Values shared by the reads of a scope as is
+_IMMUTABLE_TYPES = frozenset((str, bytes, int, float, bool, complex, type(None)))
+
+
+def _copy(value: Any) -> Any:
+    return value if type(value) in _IMMUTABLE_TYPES else copy.deepcopy(value)
+
+
+# (location, serde id) -> loader, for the caches used in the current scope
+_scope: ContextVar[dict[tuple[str, int], "BatchLoader"] | None] = ContextVar("elastipymemcache_batching", default=None)
+
+
+class BatchLoader:
+    """Collects and resolves the reads of one cache location in a scope.
+
+    Keys are given as ``{final memcached key: caller key}`` mappings. ``fetch`` functions take such a
+    mapping and return the values found by final key; they are given by the caller, as the scope may span
+    the cache backends of several threads.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, Any] = {}
+        self._results: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        #: reads asked from the loader, and the multi-gets issued to resolve them
+        self.loads = 0
+        self.batches = 0
+
+    def defer(self, key_map: dict[str, Any]) -> None:
+        """Queue keys for the next batch."""
+        with self._lock:
+            for key, caller_key in key_map.items():
+                if key not in self._results:
+                    self._pending[key] = caller_key
+
+    def load(self, key_map: dict[str, Any], fetch: Callable[[dict[str, Any]], dict[str, Any]]) -> dict[str, Any]:
+        """Values of the keys found in the cache, fetched with the queued keys if not loaded yet."""
+        self.defer(key_map)
+        keys = list(key_map)
+        with self._lock:
+            self.loads += len(keys)
+            if any(key in self._pending for key in keys):
+                self._dispatch(fetch)
+            results = {key: self._results.get(key, _missing) for key in keys}
+        # A caller mutating a value does not change what the next reads get.
+        return {key: _copy(value) for key, value in results.items() if value is not _missing}
+
+    def _dispatch(self, fetch: Callable[[dict[str, Any]], dict[str, Any]]) -> None:
+        pending, self._pending = self._pending, {}
+        self.batches += 1
+        fetched = fetch(pending)
+        for key in pending:
+            self._results[key] = fetched.get(key, _missing)
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """Drop loaded values, after a write."""
+        with self._lock:
+            for key in keys:
+                self._results.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+class Deferred:
+    """A value read in a batching scope, loaded with the other queued keys on access."""
+
+    __slots__ = ("_load", "_key", "_default")
+
+    def __init__(self, load: Callable[[], dict[Any, Any]], key: Any, default: Any) -> None:
+        self._load = load
+        self._key = key
+        self._default = default
+
+    def get(self) -> Any:
+        return self._load().get(self._key, self._default)
+
+    @property
+    def value(self) -> Any:
+        return self.get()
+
+
+def get_batch_loader(location: str, serde: Any) -> BatchLoader | None:
+    """The loader of a location in the current scope, ``None`` outside of a ``batching()`` scope."""
+    loaders = _scope.get()
+    if loaders is None:
+        return None
+    loader = loaders.get((location, id(serde)))
+    if loader is None:
+        loader = loaders.setdefault((location, id(serde)), BatchLoader())
+    return loader
+
+
+@contextmanager
+def batching() -> Iterator[None]:
+    """Scope in which cache reads are batched and deduplicated; nested scopes share the outer one."""
+    if _scope.get() is not None:
+        yield
+        return
+
+    token = _scope.set({})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
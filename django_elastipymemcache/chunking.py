@@ -0,0 +1,114 @@
+"""
+Chunked storage of large values
+
+memcached refuses items above its ``max_item_size`` (1 MB by default on ElastiCache). ``ChunkingSerde`` wraps
+another serde and splits serialized values above ``chunk_size`` into chunks stored under derived keys, and a
+small manifest stored under the key itself; ``AWSElastiCacheClient`` writes the chunks with one multi-set per
+node before the manifest, and reads them back with one multi-get. Chunk keys carry a token unique to each
+write and the manifest a checksum of the whole value, so a manifest whose chunks are missing, evicted or
+overwritten reads as a miss.
+"""
+
+import hashlib
+import os
+import zlib
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+from pymemcache.serde import pickle_serde
+
+FLAG_CHUNKED = 1 << 7
+FLAG_CHUNK = 1 << 8
+
+
+class Serialized(NamedTuple):
+    """A value serialized ahead of the node client, stored as is."""
+
+    data: bytes
+    flags: int
+
+
+class ChunkManifest(NamedTuple):
+    #: serialized size, and flags of the serialized value
+    size: int
+    chunks: int
+    flags: int
+    token: str
+    checksum: int
+
+    def chunk_keys(self, key: Any) -> list[Any]:
+        # Derived from a digest of the key, so that they stay within the key length limit whatever its length.
+        digest = hashlib.sha1(key if isinstance(key, bytes) else key.encode(), usedforsecurity=False).hexdigest()
+        keys = [f"chunk:{digest}:{self.token}:{index}" for index in range(self.chunks)]
+        return [chunk_key.encode() for chunk_key in keys] if isinstance(key, bytes) else keys
+
+    def encode(self) -> bytes:
+        return b"%d %d %d %s %d" % (self.size, self.chunks, self.flags, self.token.encode(), self.checksum)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "ChunkManifest":
+        size, chunks, flags, token, checksum = data.split()
+        return cls(int(size), int(chunks), int(flags), token.decode(), int(checksum))
+
+
+class ChunkingSerde:
+    """Serde of the node clients when chunking is enabled.
+
+    It stores ``Serialized`` values as is, returns manifests as ``ChunkManifest`` and chunks as bytes, and
+    delegates every other value to ``serde``.
+    """
+
+    def __init__(self, serde: Any = pickle_serde, chunk_size: int = 1024 * 1024 - 1024) -> None:
+        if chunk_size <= 0:
+            raise ValueError("chunking: chunk_size must be positive.")
+        self.serde = serde
+        self.chunk_size = int(chunk_size)
+
+    def serialize(self, key: Any, value: Any) -> tuple[bytes, int]:
+        if isinstance(value, Serialized):
+            return value.data, value.flags
+        if isinstance(value, ChunkManifest):
+            # Copied as is, e.g. to the replicas of a hot key
+            return value.encode(), FLAG_CHUNKED
+        data, flags = self.serde.serialize(key, value)
+        return data, flags
+
+    def deserialize(self, key: Any, value: bytes, flags: int) -> Any:
+        if flags & FLAG_CHUNKED:
+            return ChunkManifest.decode(value)
+        if flags & FLAG_CHUNK:
+            return value
+        return self.serde.deserialize(key, value, flags)
+
+    def split(self, key: Any, value: Any) -> tuple[Serialized, dict[Any, Serialized]]:
+        """Serialize a value; above ``chunk_size``, into a manifest and its chunks by key."""
+        data, flags = self.serde.serialize(key, value)
+        if not isinstance(data, bytes):
+            data = str(data).encode()
+        if len(data) <= self.chunk_size:
+            return Serialized(data, flags), {}
+
+        count = -(-len(data) // self.chunk_size)
+        manifest = ChunkManifest(len(data), count, flags, os.urandom(4).hex(), zlib.crc32(data))
+        view = memoryview(data)
+        chunks = {
+            chunk_key: Serialized(bytes(view[index * self.chunk_size : (index + 1) * self.chunk_size]), FLAG_CHUNK)
+            for index, chunk_key in enumerate(manifest.chunk_keys(key))
+        }
+        return Serialized(manifest.encode(), FLAG_CHUNKED), chunks
+
+    def assemble(self, key: Any, manifest: ChunkManifest, chunks: Sequence[bytes | None]) -> Any:
+        """Deserialize the value of a manifest from its chunks; raises ``ValueError`` if they are torn."""
+        buffer = bytearray(manifest.size)
+        view = memoryview(buffer)
+        offset = 0
+        for chunk in chunks:
+            if chunk is None or offset + len(chunk) > manifest.size:
+                raise ValueError(f"Missing or stale chunk for key {key!r}.")
+            view[offset : offset + len(chunk)] = chunk
+            offset += len(chunk)
+        if offset != manifest.size or zlib.crc32(buffer) != manifest.checksum:
+            raise ValueError(f"Checksum mismatch of the chunks of key {key!r}.")
+
+        value = self.serde.deserialize(key, buffer, manifest.flags)
+        return bytes(value) if isinstance(value, bytearray) else value
@@ -9,13 +9,38 @@ import random
 import re
 import threading
 import time
-from typing import Any, Callable, Concatenate, ParamSpec, TypeVar
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from operator import methodcaller
+from types import MappingProxyType
+from typing import Any, Callable, Concatenate, NamedTuple, ParamSpec, TypeVar
 
 from django.utils.encoding import force_str
 from pymemcache import MemcacheUnknownCommandError
 from pymemcache.client import Client, PooledClient, RetryingClient
+from pymemcache.client.base import check_key_helper
 from pymemcache.client.hash import HashClient
-from pymemcache.exceptions import MemcacheError
+from pymemcache.exceptions import MemcacheError, MemcacheIllegalInputError
+from pymemcache.serde import LegacyWrappingSerde
+
+from .chunking import ChunkingSerde, ChunkManifest
+from .cooperative import (
+    CooperativeMeteredObjectPool,
+    CooperativeObjectPool,
+    CooperativeOptions,
+    CooperativeRuntime,
+    get_cooperative_runtime,
+)
+from .handoff import Handoff, HandoffOptions
+from .hashing import get_hasher_class, get_nodes
+from .hotkeys import HotKeyDetector, get_hot_key_detector
+from .keys import trusted_client_class
+from .meta import MetaClient, MetaPooledClient, MetaResult
+from .metrics import MeteredObjectPool, MeteredSocketModule, MetricsHook, get_metrics_hooks
+from .outliers import LatencyOutlierDetector, get_outlier_detector
+from .topology_store import TopologyStore
+from .warmup import WarmupOptions, warm_up_clients
 
 logger = logging.getLogger(__name__)
 
@@ -39,18 +64,25 @@ class _ConfigurationEndpointClient:
         default_kwargs: dict[str, Any] | None = None,
         use_pooling: bool = False,
         use_vpc_ip_address: bool = True,
+        metrics: MetricsHook | None = None,
+        lock_generator: Callable[[], Any] | None = None,
     ) -> None:
         self.configuration_endpoint = configuration_endpoint
         host, port = self.configuration_endpoint.rsplit(":", 1)
-        self._server = (host, int(port))
+        # "[ip]:port" endpoints are connected to without the brackets
+        self._server = (host.strip("[]"), int(port))
 
         self._default_kwargs = default_kwargs or {}
         self._use_pooling = bool(use_pooling)
         self._use_vpc_ip_address = use_vpc_ip_address
+        self._metrics = metrics
 
-        self._lock = threading.Lock()
+        self._lock = (lock_generator or threading.Lock)()
         self._client: PooledClient | None = None
 
+        #: version line of the last parsed ``config get cluster`` response
+        self.config_version: int | None = None
+
     def _new_client(self) -> Client:
         client_class = PooledClient if self._use_pooling else self.client_class
         client = client_class(self._server, **self._default_kwargs)
@@ -123,24 +155,35 @@ class _ConfigurationEndpointClient:
             )
             raise MemcacheError("ElastiCache discovery: no nodes parsed")
 
+        self.config_version = int(version)
         return nodes
 
     def config_get_cluster(self) -> list[tuple[str, int]]:
         client = self._get_client()
+        start = time.perf_counter()
         try:
             response = self._raw_config_get_cluster(client)
         except Exception:
             logger.warning("ElastiCache discovery: config get cluster failed", exc_info=True)
             self._close_client(force=True)
+            if self._metrics is not None:
+                self._metrics.command(
+                    self.configuration_endpoint, "config get cluster", time.perf_counter() - start, False
+                )
             raise
         else:
             self._close_client()
+            if self._metrics is not None:
+                self._metrics.command(
+                    self.configuration_endpoint, "config get cluster", time.perf_counter() - start, True
+                )
 
         return self._parse_config_get_cluster_response(response)
 
 
 P = ParamSpec("P")
 R = TypeVar("R")
+T = TypeVar("T")
 
 
 def _retry_refresh_clients(
@@ -162,7 +205,7 @@ def _retry_refresh_clients(
                 if getattr(self, "_discovery_retry_delay", 0.0) > 0.0:
                     time.sleep(self._discovery_retry_delay)
                 try:
-                    self._refresh_clients(force=True)
+                    self._refresh_clients(force=True, use_snapshot=False)
                 except Exception as e:
                     logger.debug("Discovery refresh failed during retry: %r", e)
 
@@ -172,9 +215,62 @@ def _retry_refresh_clients(
     return wrapped
 
 
+def _set_timeout(client: Client | PooledClient, timeout: float) -> None:
+    """Set the socket timeout of a node client, for its open and future connections."""
+    client.timeout = timeout
+    connections = (
+        [*client.client_pool._free_objs, *client.client_pool._used_objs]
+        if isinstance(client, PooledClient)
+        else [client]
+    )
+    for connection in connections:
+        connection.timeout = timeout
+        sock = connection.sock
+        if sock is not None:
+            try:
+                sock.settimeout(timeout)
+            except OSError:
+                # Closed by its owner in the meantime
+                pass
+
+
+_missing = object()
+
+# Commands after which the replicas of a hot key are rewritten ("set") or deleted.
+_REPLICATED_COMMANDS = frozenset(
+    ("set", "add", "replace", "cas", "append", "prepend", "incr", "decr", "touch", "delete", "invalidate")
+)
+# Commands after which the previous owner's copy of a remapped key is deleted during a handoff window.
+_OVERWRITING_COMMANDS = _REPLICATED_COMMANDS - {"touch"}
+
+
+class _Topology(NamedTuple):
+    """Immutable view of the cluster used to route keys.
+
+    A topology is never mutated once published; changes build a new one and swap it in with a single
+    reference assignment, so readers take ``self._topology`` once per operation without locking.
+    """
+
+    #: every discovered node, including the ones that are currently dead
+    clients: Mapping[str, Client | PooledClient]
+    #: ring over ``nodes``
+    hasher: Any
+    #: nodes that keys are routed to
+    nodes: frozenset[str]
+    #: key -> node memo of this topology, with ``route_cache``
+    routes: dict[Any, str] | None = None
+
+
 class AWSElastiCacheClient(HashClient):  # type: ignore[misc]
     """ElastiCache-aware HashClient with"""
 
+    # Set by HashClient.__init__
+    _failed_clients: dict[Any, dict[str, Any]]
+    _dead_clients: dict[Any, float]
+    _last_dead_check_time: float
+
+    _pooled_client_class: type[PooledClient] = PooledClient
+
     def __init__(
         self,
         configuration_endpoint: str,
@@ -185,6 +281,30 @@ class AWSElastiCacheClient(HashClient):  # type: ignore[misc]
         use_vpc_ip_address: bool = True,
         discovery_interval: float | int = 0.0,
         discovery_retry_delay: float | int = 0.0,
+        background_discovery: bool = False,
+        topology_cache: dict[str, Any] | None = None,
+        # Observability
+        metrics: MetricsHook | Iterable[MetricsHook] | None = None,
+        # Multi-key operations
+        multi_node_workers: int = 0,
+        # Hot keys
+        hot_keys: dict[str, Any] | bool | None = None,
+        # Data node protocol: "text" or "meta"
+        protocol: str = "text",
+        # Connections opened and checked before nodes enter the ring
+        warmup: dict[str, Any] | bool | None = None,
+        # Latency outlier ejection and adaptive timeouts
+        outlier_detection: dict[str, Any] | bool | None = None,
+        # Values above the item size limit stored in chunks
+        chunking: dict[str, Any] | bool | None = None,
+        # gevent/eventlet locks, sockets, greenlets and bounded per-node pools
+        cooperative: dict[str, Any] | str | bool | None = None,
+        # Entries of the key -> node memo, 0 to hash every key
+        route_cache: int = 0,
+        # Keys validated by the caller, only encoded by the clients
+        trusted_keys: dict[str, Any] | bool | None = None,
+        # Misses on keys remapped by a topology change fall back to their previous owner for a while
+        handoff: dict[str, Any] | bool | None = None,
         **kwargs: Any,
     ) -> None:
         if not _AWS_CONFIGURATION_ENDPOINT_PATTERN.fullmatch(configuration_endpoint):
@@ -192,6 +312,32 @@ class AWSElastiCacheClient(HashClient):  # type: ignore[misc]
                 f"Invalid configuration endpoint '{configuration_endpoint}' (expected 'host:port' or '[ip]:port')."
             )
 
+        self._metrics = get_metrics_hooks(metrics)
+        self._route_cache = int(route_cache)
+        self._hasher_class = kwargs["hasher"] = get_hasher_class(kwargs.get("hasher", "rendezvous"))
+        self._topology = _Topology(MappingProxyType({}), self._hasher_class(), frozenset())
+
+        self._cooperative = CooperativeOptions.from_option(cooperative)
+        self._runtime: CooperativeRuntime | None = None
+        if self._cooperative is not None:
+            self._runtime = get_cooperative_runtime(self._cooperative.library)
+            use_pooling = True
+            kwargs.setdefault("socket_module", self._runtime.socket_module)
+            kwargs.setdefault("max_pool_size", self._cooperative.pool_size)
+            kwargs.setdefault("lock_generator", self._runtime.lock)
+        self._lock_generator: Callable[[], Any] = self._runtime.lock if self._runtime else threading.Lock
+        self._topology_lock = self._lock_generator()
+
+        # Slow nodes are ejected from the ring; set before the first topology is built.
+        self._outliers: LatencyOutlierDetector | None = None
+        self._outlier_generation = 0
+        self._outlier_evaluations = 0
+        self._fallback_ring: tuple[_Topology, frozenset[str], Any] | None = None
+        if outlier_detection:
+            self._outliers = get_outlier_detector(
+                configuration_endpoint, {} if outlier_detection is True else outlier_detection
+            )
+
         super().__init__(
             servers=[],  # Discovery after initialization
             use_pooling=use_pooling,
@@ -199,14 +345,38 @@ class AWSElastiCacheClient(HashClient):  # type: ignore[misc]
             **kwargs,
         )
 
+        if protocol == "meta":
+            self.client_class = MetaClient
+            self._pooled_client_class = MetaPooledClient
+        elif protocol != "text":
+            raise ValueError(f"Unknown protocol '{protocol}' (expected 'text' or 'meta').")
+        self.protocol = protocol
+
+        self._trusted_keys = bool(trusted_keys)
+        if self._trusted_keys:
+            self.client_class = trusted_client_class(self.client_class)
+
+        # Node clients store the chunks and manifests serialized by this client, and serialize the other values.
+        self._chunking: ChunkingSerde | None = None
+        if chunking:
+            self._chunking = ChunkingSerde(
+                self.default_kwargs["serde"]
+                or LegacyWrappingSerde(self.default_kwargs["serializer"], self.default_kwargs["deserializer"]),
+                **({} if chunking is True else chunking),
+            )
+            self.default_kwargs.update(serde=self._chunking, serializer=None, deserializer=None)
+
         self.configuration_endpoint: str = configuration_endpoint
         configuration_endpoint_client = _ConfigurationEndpointClient(
             configuration_endpoint,
             default_kwargs=self.default_kwargs,
             use_pooling=use_pooling,
             use_vpc_ip_address=use_vpc_ip_address,
+            metrics=self._metrics,
+            lock_generator=self._lock_generator,
         )
 
+        self._unwrapped_configuration_endpoint_client = configuration_endpoint_client
         self._configuration_endpoint_client = RetryingClient(
             configuration_endpoint_client,
             attempts=retry_attempts,
@@ -223,53 +393,275 @@ class AWSElastiCacheClient(HashClient):  # type: ignore[misc]
         )
         self._discovery_retry_delay = float(discovery_retry_delay)
         self._last_discovery_time: float = 0.0
-        self._topology_lock = threading.Lock()
+        self._discovery_lock = self._lock_generator()
+
+        #: cluster config version of the current topology, ``None`` until known
+        self.config_version: int | None = None
+        #: wall clock time of the last topology change
+        self.topology_changed_at: float | None = None
+
+        # Processes sharing a topology snapshot start from it and take turns querying the endpoint.
+        self._topology_store: TopologyStore | None = None
+        if topology_cache:
+            self._topology_store = TopologyStore(
+                configuration_endpoint,
+                **{"max_age": float(discovery_interval) or 60.0, **topology_cache},
+            )
+
+        # Background discovery keeps the configuration endpoint round trip off the request path.
+        self._use_background_discovery = bool(background_discovery) and self._use_auto_discovery
+        self._inline_discovery = self._use_auto_discovery and not self._use_background_discovery
+        self._discovery_stop_event = threading.Event()
+        self._discovery_thread: threading.Thread | None = None
+        self._discovery_greenlet: Any = None
+
+        # Per-node batches of multi-key operations are issued concurrently when workers are configured.
+        self._multi_node_executor: ThreadPoolExecutor | None = None
+        self._multi_node_greenlets = multi_node_workers > 0 and self._runtime is not None
+        if multi_node_workers > 0 and self._runtime is None:
+            self._multi_node_executor = ThreadPoolExecutor(
+                max_workers=multi_node_workers,
+                thread_name_prefix="elasticache-multi-node",
+            )
+
+        self._warmup = WarmupOptions.from_option(warmup)
+
+        # Reads of hot keys are spread over replica keys owned by other nodes.
+        self._hot_keys: HotKeyDetector | None = None
+        self._replica_keys_memo: dict[Any, tuple[_Topology, tuple[Any, ...]]] = {}
+        if hot_keys:
+            self._hot_keys = get_hot_key_detector(configuration_endpoint, {} if hot_keys is True else hot_keys)
+
+        # Set before the initial discovery, which opens no window as there is no previous ring.
+        self._handoff_options = HandoffOptions.from_option(handoff)
+        self._handoff: Handoff | None = None
+        #: keys served by their previous owner since the client was created, see the ``handoff`` option
+        self.rescued_keys = 0
+
         try:
             self._refresh_clients(force=True)
         except Exception as e:
             logger.exception(f"Initial discovery failed: {e}")
 
-    def _discover_client_keys(self) -> set[str]:
+        if self._use_background_discovery:
+            self._start_discovery_thread()
+
+    def _start_discovery_thread(self) -> None:
+        if self._runtime is not None:
+            self._discovery_greenlet = self._runtime.spawn(self._run_cooperative_discovery_loop)
+            return
+
+        thread = threading.Thread(
+            target=self._run_discovery_loop,
+            name=f"elasticache-discovery[{self.configuration_endpoint}]",
+            daemon=True,
+        )
+        self._discovery_thread = thread
+        thread.start()
+
+    def _run_discovery_loop(self) -> None:
+        while not self._discovery_stop_event.wait(self._discovery_interval):
+            try:
+                self._refresh_clients(force=True)
+            except Exception:
+                logger.warning("ElastiCache discovery: background refresh failed", exc_info=True)
+
+    def _run_cooperative_discovery_loop(self) -> None:
+        assert self._runtime is not None
+        while True:
+            self._runtime.sleep(self._discovery_interval)
+            if self._discovery_stop_event.is_set():
+                return
+            try:
+                self._refresh_clients(force=True)
+            except Exception:
+                logger.warning("ElastiCache discovery: background refresh failed", exc_info=True)
+
+    def _stop_discovery_thread(self) -> None:
+        self._discovery_stop_event.set()
+        # The discovery greenlet ends on its next wake-up.
+        self._discovery_greenlet = None
+
+        thread, self._discovery_thread = self._discovery_thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(self._discovery_interval, 1.0))
+
+    def _query_client_keys(self) -> tuple[int | None, set[str]] | None:
         try:
             node = self._configuration_endpoint_client.config_get_cluster()
-            return set(map(self._make_client_key, node))
-        except MemcacheError:
-            logger.warning("ElastiCache discovery: cluster discovery failed.")
-            return set()
+            return self._unwrapped_configuration_endpoint_client.config_version, set(map(self._make_client_key, node))
+        except (MemcacheError, OSError):
+            logger.warning("ElastiCache discovery: cluster discovery failed, keeping current topology.")
+            return None
+
+    def _discover_client_keys(self, use_snapshot: bool = True) -> tuple[int | None, set[str]] | None:
+        store = self._topology_store
+        if store is None:
+            return self._query_client_keys()
+
+        if use_snapshot:
+            snapshot = store.load_fresh()
+            if snapshot is not None:
+                return snapshot.version, set(snapshot.nodes)
 
-    def _refresh_clients(self, force: bool = False) -> None:
-        if not force and not self._use_auto_discovery:
+            # While another process refreshes, keep routing with its previous snapshot. Without any
+            # snapshot, wait for it rather than query the endpoint as well.
+            stale = store.load()
+            if not store.acquire_refresh(blocking=stale is None):
+                assert stale is not None
+                return stale.version, set(stale.nodes)
+        else:
+            store.acquire_refresh()
+
+        try:
+            if use_snapshot:
+                snapshot = store.load_fresh()
+                if snapshot is not None:
+                    return snapshot.version, set(snapshot.nodes)
+
+            discovery = self._query_client_keys()
+            if discovery is not None:
+                store.save(*discovery)
+            return discovery
+        finally:
+            store.release_refresh()
+
+    def _refresh_clients(self, force: bool = False, use_snapshot: bool = True) -> None:
+        if not force and (not self._use_auto_discovery or self._use_background_discovery):
             return
 
         now = time.monotonic()
         if not force and (now - self._last_discovery_time) < self._discovery_interval:
             return
 
-        old_clients: list[Client | PooledClient] = []
+        # Only one thread talks to the configuration endpoint at a time. Periodic refreshes
+        # skip instead of waiting so that key routing keeps using the current topology.
+        if not self._discovery_lock.acquire(blocking=force):
+            return
 
-        with self._topology_lock:
-            current_keys = set(self.clients.keys())
-            new_keys = self._discover_client_keys()
+        start = time.perf_counter()
+        changed = False
+        try:
+            discovery = self._discover_client_keys(use_snapshot)
+            self._last_discovery_time = now
+            if discovery is not None:
+                changed = self._update_topology(*discovery)
+        finally:
+            self._discovery_lock.release()
 
-            # remove
-            for client_key in current_keys - new_keys:
-                old_client = self.clients.pop(client_key, None)
-                if old_client:
-                    old_clients.append(old_client)
+        if self._metrics is not None:
+            self._metrics.discovery(time.perf_counter() - start, discovery is not None, changed)
 
-                self.hasher.remove_node(client_key)
+    def _update_topology(self, version: int | None, new_keys: set[str]) -> bool:
+        # ElastiCache bumps the config version on every membership change, so polling an unchanged
+        # cluster costs no topology work.
+        if version is not None and version == self.config_version:
+            return False
 
-                host, port = client_key.split(":", 1)
-                server = (host, int(port))
-                self._failed_clients.pop(server, None)
-                self._dead_clients.pop(server, None)
+        changed = new_keys != self.clients.keys()
+        if changed:
+            self._apply_client_keys(new_keys)
+            self.topology_changed_at = time.time()
+        self.config_version = version
+        return changed
 
-            # add
-            for client_key in new_keys - current_keys:
-                host, port = client_key.split(":", 1)
-                super().add_server((host, int(port)))
+    @property
+    def clients(self) -> Mapping[str, Client | PooledClient]:
+        return self._topology.clients
 
-            self._last_discovery_time = now
+    @clients.setter
+    def clients(self, clients: Mapping[str, Client | PooledClient]) -> None:
+        # Assigned by HashClient.__init__
+        self._topology = self._build_topology(clients, clients.keys())
+
+    @property
+    def hasher(self) -> Any:
+        return self._topology.hasher
+
+    @hasher.setter
+    def hasher(self, hasher: Any) -> None:
+        # Assigned by HashClient.__init__
+        self._topology = self._topology._replace(hasher=hasher, routes={} if self._route_cache else None)
+
+    def _build_topology(self, clients: Mapping[str, Client | PooledClient], nodes: Iterable[str]) -> _Topology:
+        nodes = frozenset(nodes)
+        if self._outliers is not None:
+            nodes -= self._outliers.ejected
+        hasher = self._hasher_class()
+        for node in sorted(nodes):
+            hasher.add_node(node)
+        return _Topology(MappingProxyType(dict(clients)), hasher, nodes, {} if self._route_cache else None)
+
+    def _new_client(self, server: tuple[str, int]) -> Client | PooledClient:
+        _class = self._pooled_client_class if self.use_pooling else self.client_class
+        kwargs = self.default_kwargs
+        node = self._make_client_key(server)
+        # TLS wraps the raw socket, so bytes are only metered on plain connections.
+        if self._metrics is not None and not kwargs.get("tls_context"):
+            kwargs = {**kwargs, "socket_module": MeteredSocketModule(kwargs.get("socket_module"), node, self._metrics)}
+
+        client = _class(server, **kwargs)
+        if self.use_pooling:
+            client.client_class = self.client_class
+            pool_kwargs = {
+                "after_remove": methodcaller("close"),
+                "max_size": kwargs.get("max_pool_size"),
+                "idle_timeout": kwargs.get("pool_idle_timeout", 0),
+                "lock_generator": kwargs.get("lock_generator"),
+            }
+            if self._cooperative is not None:
+                assert self._runtime is not None
+                # Greenlets wait for one of the max_pool_size connections rather than fail.
+                pool_kwargs["semaphore"] = self._runtime.semaphore(kwargs.get("max_pool_size") or 2**31)
+                pool_kwargs["wait_timeout"] = self._cooperative.pool_timeout
+                if self._metrics is not None:
+                    client.client_pool = CooperativeMeteredObjectPool(
+                        node, self._metrics, client._create_client, **pool_kwargs
+                    )
+                else:
+                    client.client_pool = CooperativeObjectPool(client._create_client, **pool_kwargs)
+            elif self._metrics is not None:
+                client.client_pool = MeteredObjectPool(node, self._metrics, client._create_client, **pool_kwargs)
+        return client
+
+    def _apply_client_keys(self, new_keys: set[str]) -> None:
+        # New nodes are warmed up before they are routable; the ones failing their check start as dead.
+        added = {}
+        for client_key in new_keys - self._topology.clients.keys():
+            host, port = client_key.rsplit(":", 1)
+            added[client_key] = self._new_client((host, int(port)))
+        unhealthy = warm_up_clients(added, self._warmup, self._runtime) if self._warmup and added else set()
+
+        with self._topology_lock:
+            topology = self._topology
+            old_clients = [client for key, client in topology.clients.items() if key not in new_keys]
+
+            clients = {key: client for key, client in topology.clients.items() if key in new_keys}
+            for client_key, client in added.items():
+                if client_key in clients:
+                    old_clients.append(client)
+                else:
+                    clients[client_key] = client
+
+            # Filtered in place: HashClient records failures in them outside of the lock, fan-out threads included.
+            for failures in (self._failed_clients, self._dead_clients):
+                for server in list(failures):
+                    if self._make_client_key(server) not in new_keys:
+                        failures.pop(server, None)
+            for client_key in unhealthy:
+                self._dead_clients[clients[client_key].server] = time.time()
+            dead_keys = {self._make_client_key(server) for server in list(self._dead_clients)}
+            self._consume_outlier_generation()
+            self._topology = self._build_topology(clients, clients.keys() - dead_keys)
+            if self._handoff_options is not None and topology.nodes and topology.nodes != self._topology.nodes:
+                self._handoff = Handoff(topology.hasher, self._handoff_options)
+
+        if self._outliers is not None:
+            self._outliers.forget(topology.clients.keys() - new_keys)
+
+        if self._metrics is not None:
+            for client_key in unhealthy:
+                self._metrics.node_state(client_key, "dead")
 
         for old_client in old_clients:
             try:
@@ -277,10 +669,694 @@ class AWSElastiCacheClient(HashClient):  # type: ignore[misc]
             except Exception:
                 logger.exception("Failed to close during topology refresh")
 
+    def add_server(self, server: Any, port: int | None = None) -> None:
+        if port is not None:
+            if not isinstance(server, str):
+                raise TypeError("Server must be a string when passing port.")
+            server = (server, port)
+
+        client_key = self._make_client_key(server)
+        client = None
+        unhealthy = False
+        if client_key not in self._topology.clients:
+            client = self._new_client(server)
+            unhealthy = bool(self._warmup and warm_up_clients({client_key: client}, self._warmup, self._runtime))
+
+        with self._topology_lock:
+            topology = self._topology
+            clients = dict(topology.clients)
+            if client_key not in clients:
+                clients[client_key] = client or self._new_client(server)
+            nodes = topology.nodes | {client_key}
+            if unhealthy:
+                # Registered, but only routable once revived after dead_timeout.
+                self._dead_clients[server] = time.time()
+                nodes = topology.nodes
+            self._topology = self._build_topology(clients, nodes)
+
+    def remove_server(self, server: Any, port: int | None = None) -> None:
+        if port is not None:
+            if not isinstance(server, str):
+                raise TypeError("Server must be a string when passing port.")
+            server = (server, port)
+
+        client_key = self._make_client_key(server)
+        with self._topology_lock:
+            self._failed_clients.pop(server, None)
+            self._dead_clients[server] = time.time()
+            topology = self._topology
+            self._topology = self._build_topology(topology.clients, topology.nodes - {client_key})
+
+        if self._metrics is not None:
+            self._metrics.node_state(client_key, "dead")
+
+    def _mark_failed_server(self, server: Any) -> None:
+        if self._metrics is not None and server not in self._failed_clients and server not in self._dead_clients:
+            self._metrics.node_state(self._make_client_key(server), "failed")
+        super()._mark_failed_server(server)
+
+    def _retry_dead(self) -> None:
+        current_time = time.time()
+        if current_time - self._last_dead_check_time <= self.dead_timeout:
+            return
+
+        with self._topology_lock:
+            self._last_dead_check_time = current_time
+            revived = [
+                server
+                for server, dead_time in self._dead_clients.items()
+                if current_time - dead_time > self.dead_timeout
+            ]
+            if not revived:
+                return
+
+            for server in revived:
+                logger.debug("bringing server back into rotation %s", server)
+                del self._dead_clients[server]
+
+            topology = self._topology
+            revived_keys = {self._make_client_key(server) for server in revived} & topology.clients.keys()
+            self._topology = self._build_topology(topology.clients, topology.nodes | revived_keys)
+
+        if self._metrics is not None:
+            for client_key in revived_keys:
+                self._metrics.node_state(client_key, "revived")
+
+    def _consume_outlier_generation(self) -> None:
+        # Only rebuilds starting from every live node take the ejection changes into account; the others
+        # start from the current ring, which still lacks the nodes readmitted since.
+        if self._outliers is not None:
+            self._outlier_generation = self._outliers.generation
+
+    def _apply_outliers(self) -> None:
+        assert self._outliers is not None
+        with self._topology_lock:
+            topology = self._topology
+            dead_keys = {self._make_client_key(server) for server in self._dead_clients}
+            self._consume_outlier_generation()
+            self._topology = self._build_topology(topology.clients, topology.clients.keys() - dead_keys)
+
+    def _apply_timeouts(self) -> None:
+        assert self._outliers is not None
+        self._outlier_evaluations = self._outliers.evaluations
+        clients = self._topology.clients
+        max_timeout = self.default_kwargs.get("timeout")
+        for client_key, timeout in self._outliers.timeouts().items():
+            client = clients.get(client_key)
+            if client is not None:
+                _set_timeout(client, timeout if max_timeout is None else min(timeout, max_timeout))
+
+    def _get_topology(self) -> _Topology:
+        topology = self._topology
+        # Fast path: no discovery due, no dead node to retry and no latency evaluation.
+        if (
+            topology.nodes
+            and not self._dead_clients
+            and self._outliers is None
+            and not (
+                self._inline_discovery and time.monotonic() - self._last_discovery_time >= self._discovery_interval
+            )
+        ):
+            return topology
+        return self._refresh_topology()
+
     @_retry_refresh_clients
-    def _get_client(self, key: str) -> Client | PooledClient:
+    def _refresh_topology(self) -> _Topology:
         self._refresh_clients()
-        return super()._get_client(key)
+        if self._dead_clients:
+            self._retry_dead()
+
+        outliers = self._outliers
+        if outliers is not None:
+            if outliers.due():
+                outliers.evaluate(self._metrics)
+            if outliers.generation != self._outlier_generation:
+                self._apply_outliers()
+            if outliers.adaptive_timeouts and outliers.evaluations != self._outlier_evaluations:
+                self._apply_timeouts()
+
+        topology = self._topology
+        if not topology.nodes and not self.ignore_exc:
+            raise MemcacheError("All servers seem to be down right now")
+        return topology
+
+    def _route(self, topology: _Topology, key: Any) -> Client | PooledClient | None:
+        routes = topology.routes
+        server = routes.get(key) if routes is not None else None
+        if server is None:
+            if not self._trusted_keys:
+                check_key_helper(key, self.allow_unicode_keys, self.key_prefix)
+            server = topology.hasher.get_node(key)
+            if server is None:
+                # Only reachable with ignore_exc; _get_topology raises otherwise.
+                return None
+            if routes is not None:
+                self._remember_route(routes, key, server)
+        outliers = self._outliers
+        if outliers is not None and outliers.probation and not outliers.admit(server, key):
+            server = self._fallback_node(topology, outliers.probation.keys(), key) or server
+        return topology.clients[server]
+
+    def _route_many(self, topology: _Topology, keys: list[Any]) -> list[Client | PooledClient | None]:
+        """``_route`` of every key, validating and hashing the keys missing from the memo in one pass."""
+        routes = topology.routes
+        servers: list[str | None] = [None] * len(keys) if routes is None else list(map(routes.get, keys))
+        missing = [index for index, server in enumerate(servers) if server is None]
+        if missing:
+            missing_keys = [keys[index] for index in missing]
+            if not self._trusted_keys:
+                allow_unicode_keys, key_prefix = self.allow_unicode_keys, self.key_prefix
+                for key in missing_keys:
+                    check_key_helper(key, allow_unicode_keys, key_prefix)
+            for index, key, server in zip(missing, missing_keys, get_nodes(topology.hasher, missing_keys)):
+                servers[index] = server
+                if routes is not None and server is not None:
+                    self._remember_route(routes, key, server)
+
+        clients = topology.clients
+        outliers = self._outliers
+        if outliers is None or not outliers.probation:
+            return [None if server is None else clients[server] for server in servers]
+
+        routed: list[Client | PooledClient | None] = []
+        for key, server in zip(keys, servers):
+            if server is not None and not outliers.admit(server, key):
+                server = self._fallback_node(topology, outliers.probation.keys(), key) or server
+            routed.append(None if server is None else clients[server])
+        return routed
+
+    def _remember_route(self, routes: dict[Any, str], key: Any, server: str) -> None:
+        if len(routes) >= self._route_cache:
+            routes.clear()
+        routes[key] = server
+
+    def _fallback_node(self, topology: _Topology, probation: Iterable[str], key: Any) -> str | None:
+        """Owner of ``key`` in the ring without the nodes on probation."""
+        excluded = frozenset(probation)
+        fallback = self._fallback_ring
+        if fallback is None or fallback[0] is not topology or fallback[1] != excluded:
+            hasher = self._hasher_class()
+            for node in sorted(topology.nodes - excluded):
+                hasher.add_node(node)
+            fallback = self._fallback_ring = (topology, excluded, hasher)
+        owner: str | None = fallback[2].get_node(key)
+        return owner
+
+    def outlier_state(self) -> dict[str, dict[str, Any]]:
+        """Latency percentiles, state and timeout of every node, see the ``outlier_detection`` option."""
+        if self._outliers is None:
+            return {}
+        return self._outliers.state()
+
+    def _current_handoff(self) -> Handoff | None:
+        handoff = self._handoff
+        if handoff is not None and not handoff.active():
+            self._handoff = handoff = None
+        return handoff
+
+    def _previous_owners(self, handoff: Handoff, topology: _Topology, keys: list[Any]) -> dict[str, list[Any]]:
+        """Keys remapped by the last topology change, by their previous owner when it is still in the ring."""
+        batches: dict[str, list[Any]] = {}
+        for key, previous, current in zip(keys, get_nodes(handoff.previous, keys), get_nodes(topology.hasher, keys)):
+            if previous != current and previous in topology.nodes:
+                batches.setdefault(previous, []).append(key)
+        return batches
+
+    def _rescue(self, keys: list[Any], *args: Any, **kwargs: Any) -> dict[Any, Any]:
+        """Values of missed keys held by their previous owner, copied forward to their new owner."""
+        handoff = self._current_handoff()
+        if handoff is None:
+            return {}
+        topology = self._topology
+        batches = self._previous_owners(handoff, topology, keys)
+        if not batches:
+            return {}
+
+        def fetch(client: Client | PooledClient, batch: list[Any]) -> dict[Any, Any]:
+            return dict(self._safely_run_func(client, client.get_many, {}, batch, *args, **kwargs))
+
+        found: dict[Any, Any] = {}
+        for result in self._run_per_node(
+            [partial(fetch, topology.clients[node], batch) for node, batch in batches.items()]
+        ):
+            found.update(result)
+        if not found:
+            return found
+
+        serde = self.default_kwargs["serde"] or LegacyWrappingSerde(
+            self.default_kwargs["serializer"], self.default_kwargs["deserializer"]
+        )
+        copied_bytes = 0
+        for key, value in found.items():
+            data = serde.serialize(key, value)[0]
+            copied_bytes += len(data if isinstance(data, bytes) else str(data).encode())
+            # "add" does not overwrite a value written to the new owner since the miss; bypasses _run_cmd.
+            super()._run_cmd("add", key, False, value, handoff.options.copy_expire, noreply=True)
+        handoff.record(len(found), copied_bytes)
+        self.rescued_keys += len(found)
+        return found
+
+    def _forget_previous(self, keys: Iterable[Any]) -> None:
+        """Delete the previous owner's copy of written keys, so that a later miss does not serve it."""
+        handoff = self._current_handoff()
+        if handoff is None:
+            return
+        topology = self._topology
+        for node, batch in self._previous_owners(handoff, topology, list(keys)).items():
+            client = topology.clients[node]
+            self._safely_run_func(client, client.delete_many, False, batch, noreply=True)
+
+    def handoff_state(self) -> dict[str, Any]:
+        """Transition window of the last topology change and the keys rescued, see the ``handoff`` option."""
+        handoff = self._current_handoff()
+        if handoff is None:
+            state = {"active": False, "remaining": 0.0, "rescued": 0, "copied_bytes": 0}
+        else:
+            state = handoff.state()
+        return {**state, "rescued_total": self.rescued_keys}
+
+    def _get_client(self, key: str) -> Client | PooledClient | None:
+        return self._route(self._get_topology(), key)
+
+    def _replica_keys(self, topology: _Topology, key: Any) -> tuple[Any, ...]:
+        """Replica keys of a hot key, each owned by another node than the key and the other replicas."""
+        memo = self._replica_keys_memo.get(key)
+        if memo is not None and memo[0] is topology:
+            return memo[1]
+
+        assert self._hot_keys is not None
+        used = {topology.hasher.get_node(key)}
+        replicas: list[Any] = []
+        for index in range(self._hot_keys.replicas * 8):
+            if len(replicas) == self._hot_keys.replicas or len(used) >= len(topology.nodes):
+                break
+            replica = f"{key}:hot{index}" if isinstance(key, str) else b"%s:hot%d" % (key, index)
+            try:
+                check_key_helper(replica, self.allow_unicode_keys, self.key_prefix)
+            except MemcacheIllegalInputError:
+                break
+            node = topology.hasher.get_node(replica)
+            if node not in used:
+                used.add(node)
+                replicas.append(replica)
+
+        if len(self._replica_keys_memo) >= self._hot_keys.capacity * 4:
+            self._replica_keys_memo.clear()
+        self._replica_keys_memo[key] = (topology, tuple(replicas))
+        return tuple(replicas)
+
+    def _pick_read_key(self, topology: _Topology, key: Any) -> Any:
+        replicas = self._replica_keys(topology, key)
+        index = random.randrange(len(replicas) + 1)
+        return replicas[index] if index < len(replicas) else key
+
+    def _write_replicas(
+        self,
+        values: dict[Any, Any],
+        expire: int = 0,
+        noreply: bool | None = None,
+        flags: int | None = None,
+    ) -> None:
+        assert self._hot_keys is not None
+        topology = self._get_topology()
+        replica_values = {
+            replica: value for key, value in values.items() for replica in self._replica_keys(topology, key)
+        }
+        if replica_values:
+            self._set_many_on_nodes(replica_values, self._hot_keys.replica_expire(expire), True, flags)
+
+    def _delete_replicas(self, keys: Iterable[Any]) -> None:
+        topology = self._get_topology()
+        replicas = [replica for key in keys for replica in self._replica_keys(topology, key)]
+        if replicas:
+            self._delete_many_on_nodes(replicas, True)
+
+    def _run_cmd(self, cmd: str, key: Any, default_val: Any, *args: Any, **kwargs: Any) -> Any:
+        result = super()._run_cmd(cmd, key, default_val, *args, **kwargs)
+        hot_keys = self._hot_keys
+        if hot_keys is not None and cmd in _REPLICATED_COMMANDS and hot_keys.is_hot(key):
+            # Replicas follow the writes of this process; writes from elsewhere are bounded by replica_ttl.
+            if cmd == "set":
+                # Not a value the primary refused
+                if result:
+                    self._write_replicas({key: args[0]}, *args[1:], **kwargs)
+            else:
+                self._delete_replicas([key])
+        if self._handoff is not None and cmd in _OVERWRITING_COMMANDS:
+            self._forget_previous([key])
+        return result
+
+    def get(self, key: Any, default: Any = None, **kwargs: Any) -> Any:
+        if self._handoff is not None and self._current_handoff() is not None:
+            # The multi-key path falls back to the previous owner on a miss.
+            return self.get_many([key], **kwargs).get(key, default)
+        value = self._get_value(key, default, **kwargs)
+        if self._chunking is not None and isinstance(value, ChunkManifest):
+            return self._assemble_chunks({key: value}).get(key, default)
+        return value
+
+    def gets(self, key: Any, *args: Any, **kwargs: Any) -> Any:
+        result = super().gets(key, *args, **kwargs)
+        if self._chunking is not None and isinstance(result, tuple) and isinstance(result[0], ChunkManifest):
+            # The cas token is the manifest's; torn chunks read as a miss.
+            value = self._assemble_chunks({key: result[0]}).get(key, _missing)
+            return (None, None) if value is _missing else (value, result[1])
+        return result
+
+    def _get_value(self, key: Any, default: Any = None, **kwargs: Any) -> Any:
+        hot_keys = self._hot_keys
+        if hot_keys is None:
+            return super().get(key, default, **kwargs)
+
+        hot_keys.record(key)
+        if not hot_keys.is_hot(key):
+            return super().get(key, default, **kwargs)
+
+        read_key = self._pick_read_key(self._get_topology(), key)
+        if read_key is key:
+            return super().get(key, default, **kwargs)
+
+        value = super().get(read_key, _missing, **kwargs)
+        if value is _missing:
+            value = super().get(key, _missing, **kwargs)
+            if value is _missing:
+                return default
+            # Bypasses _run_cmd: a replica is not replicated itself.
+            super()._run_cmd("set", read_key, False, value, hot_keys.replica_ttl, noreply=True)
+        return value
+
+    def warm_up(self) -> frozenset[str]:
+        """Open and check connections to every node of the ring, e.g. after forking a worker.
+
+        Returns the nodes that failed their check; they stay in the ring for the dead node handling.
+        """
+        topology = self._get_topology()
+        clients = {client_key: topology.clients[client_key] for client_key in topology.nodes}
+        return frozenset(warm_up_clients(clients, self._warmup or WarmupOptions(), self._runtime))
+
+    def _check_meta_protocol(self, command: str) -> None:
+        if self.protocol != "meta":
+            raise MemcacheError(f"{command} requires the meta protocol (protocol='meta').")
+
+    def meta_get(self, key: Any, default: Any = None, **kwargs: Any) -> MetaResult:
+        """``MetaClient.meta_get`` on the node owning ``key``."""
+        self._check_meta_protocol("meta_get")
+        result: MetaResult = self._run_cmd("meta_get", key, MetaResult(default, False), default, **kwargs)
+        return result
+
+    def invalidate(self, key: Any, stale_ttl: int = 30, noreply: bool | None = None) -> bool:
+        """``MetaClient.invalidate`` on the node owning ``key``."""
+        self._check_meta_protocol("invalidate")
+        return bool(self._run_cmd("invalidate", key, False, stale_ttl, noreply=noreply))
+
+    def _record_latency(self, node: str, name: str, duration: float, success: bool) -> None:
+        if self._outliers is not None:
+            self._outliers.record(node, duration)
+        if self._metrics is not None:
+            self._metrics.command(node, name, duration, success)
+
+    def _metered_call(self, node: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        name = func.__name__
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            self._record_latency(node, name, time.perf_counter() - start, False)
+            raise
+        self._record_latency(node, name, time.perf_counter() - start, True)
+        if self._metrics is None:
+            return result
+
+        if name in ("get_many", "gets_many"):
+            self._metrics.cache_lookup(node, len(result), len(args[0]) - len(result))
+        elif name == "get":
+            default = args[1] if len(args) > 1 else kwargs.get("default")
+            hit = result is not default
+            self._metrics.cache_lookup(node, int(hit), int(not hit))
+        elif name == "gets":
+            hit = result is not None and result[0] is not None
+            self._metrics.cache_lookup(node, int(hit), int(not hit))
+        elif name == "meta_get":
+            self._metrics.cache_lookup(node, int(result.hit), int(not result.hit))
+        return result
+
+    def _safely_run_func(
+        self,
+        client: Client | PooledClient,
+        func: Callable[..., Any],
+        default_val: Any,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        # HashClient.close() also runs through here; closing connections is not a cache operation.
+        if (self._metrics is not None or self._outliers is not None) and func.__name__ != "close":
+            func = partial(self._metered_call, self._make_client_key(client.server), func)
+        return super()._safely_run_func(client, func, default_val, *args, **kwargs)
+
+    def _safely_run_set_many(
+        self,
+        client: Client | PooledClient,
+        values: dict[Any, Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> list[Any]:
+        if self._metrics is None and self._outliers is None:
+            return list(super()._safely_run_set_many(client, values, *args, **kwargs))
+
+        node = self._make_client_key(client.server)
+        start = time.perf_counter()
+        try:
+            failed = list(super()._safely_run_set_many(client, values, *args, **kwargs))
+        except BaseException:
+            self._record_latency(node, "set_many", time.perf_counter() - start, False)
+            raise
+        self._record_latency(node, "set_many", time.perf_counter() - start, not failed)
+        return failed
+
+    def _run_per_node(self, calls: list[Callable[[], T]]) -> list[T]:
+        if self._multi_node_greenlets and len(calls) > 1:
+            assert self._runtime is not None
+            greenlets = [self._runtime.spawn(call) for call in calls[1:]]
+            first = calls[0]()
+            return [first, *map(self._runtime.wait, greenlets)]
+
+        executor = self._multi_node_executor
+        if executor is None or len(calls) < 2:
+            return [call() for call in calls]
+
+        # The caller thread handles the first batch itself; the remaining batches run on the pool.
+        futures = [executor.submit(call) for call in calls[1:]]
+        try:
+            first = calls[0]()
+        finally:
+            wait(futures)
+        return [first, *(future.result() for future in futures)]
+
+    def _group_keys_by_client(self, keys: Iterable[Any]) -> list[tuple[Client | PooledClient, list[Any]]]:
+        # Every key of a batch is routed against the same topology.
+        keys = list(keys)
+        batches: dict[Any, tuple[Client | PooledClient, list[Any]]] = {}
+        for key, client in zip(keys, self._route_many(self._get_topology(), keys)):
+            if client is None:
+                continue
+
+            batch = batches.get(client.server)
+            if batch is None:
+                batch = batches[client.server] = (client, [])
+            batch[1].append(key)
+
+        return list(batches.values())
+
+    def get_many(self, keys: Iterable[Any], gets: bool = False, *args: Any, **kwargs: Any) -> dict[Any, Any]:
+        result = self._get_many_values(keys, gets, *args, **kwargs)
+        if self._chunking is None:
+            return result
+
+        manifests = {
+            key: value[0] if gets else value
+            for key, value in result.items()
+            if isinstance(value[0] if gets else value, ChunkManifest)
+        }
+        if manifests:
+            values = self._assemble_chunks(manifests)
+            for key in manifests:
+                if key not in values:
+                    del result[key]
+                else:
+                    result[key] = (values[key], result[key][1]) if gets else values[key]
+        return result
+
+    get_multi = get_many
+
+    def _get_many_values(
+        self,
+        keys: Iterable[Any],
+        gets: bool = False,
+        *args: Any,
+        **kwargs: Any,
+    ) -> dict[Any, Any]:
+        hot_keys = self._hot_keys
+        if hot_keys is None or gets:
+            return self._get_many_from_nodes(keys, gets, *args, **kwargs)
+
+        topology = None
+        # read key -> key, a replica for some of the hot keys
+        reads: dict[Any, Any] = {}
+        for key in keys:
+            hot_keys.record(key)
+            if hot_keys.is_hot(key):
+                topology = topology or self._get_topology()
+                reads[self._pick_read_key(topology, key)] = key
+            else:
+                reads[key] = key
+
+        found = self._get_many_from_nodes(reads, False, *args, **kwargs)
+        result = {reads[read_key]: value for read_key, value in found.items()}
+        missed = {read_key: key for read_key, key in reads.items() if read_key != key and read_key not in found}
+        if missed:
+            primaries = self._get_many_from_nodes(missed.values(), False, *args, **kwargs)
+            result.update(primaries)
+            refill = {read_key: primaries[key] for read_key, key in missed.items() if key in primaries}
+            if refill:
+                self._set_many_on_nodes(refill, hot_keys.replica_ttl, True)
+        return result
+
+    def _assemble_chunks(self, manifests: dict[Any, ChunkManifest]) -> dict[Any, Any]:
+        """Values of chunked keys, fetched with one multi-get; keys with torn chunks are left out."""
+        assert self._chunking is not None
+        chunk_keys = {key: manifest.chunk_keys(key) for key, manifest in manifests.items()}
+        chunks = self._get_many_from_nodes([chunk_key for keys in chunk_keys.values() for chunk_key in keys])
+
+        values = {}
+        for key, manifest in manifests.items():
+            try:
+                values[key] = self._chunking.assemble(key, manifest, [chunks.get(k) for k in chunk_keys[key]])
+            except ValueError:
+                logger.debug("Chunked value of %r is torn, read as a miss", key, exc_info=True)
+        return values
+
+    def set(self, key: Any, value: Any, expire: int = 0, noreply: bool | None = None, flags: int | None = None) -> bool:
+        if self._chunking is None:
+            return bool(super().set(key, value, expire, noreply, flags))
+        return not self.set_many({key: value}, expire, noreply, flags)
+
+    def _get_many_from_nodes(
+        self,
+        keys: Iterable[Any],
+        gets: bool = False,
+        *args: Any,
+        **kwargs: Any,
+    ) -> dict[Any, Any]:
+        def fetch(client: Client | PooledClient, batch: list[Any]) -> dict[Any, Any]:
+            get_func = client.gets_many if gets else client.get_many
+            return dict(self._safely_run_func(client, get_func, {}, batch, *args, **kwargs))
+
+        keys = list(keys)
+        end: dict[Any, Any] = {}
+        for result in self._run_per_node(
+            [partial(fetch, client, batch) for client, batch in self._group_keys_by_client(keys)]
+        ):
+            end.update(result)
+
+        if self._handoff is not None and not gets:
+            missed = [key for key in keys if key not in end]
+            if missed:
+                end.update(self._rescue(missed, *args, **kwargs))
+        return end
+
+    def set_many(self, values: dict[Any, Any], *args: Any, **kwargs: Any) -> list[Any]:
+        torn: list[Any] = []
+        if self._chunking is not None:
+            values, torn = self._store_chunks(values, *args, **kwargs)
+
+        failed = torn + self._set_many_on_nodes(values, *args, **kwargs)
+        if self._hot_keys is not None:
+            failed_keys = set(failed)
+            hot_values = {
+                key: value for key, value in values.items() if key not in failed_keys and self._hot_keys.is_hot(key)
+            }
+            if hot_values:
+                self._write_replicas(hot_values, *args, **kwargs)
+        if self._handoff is not None:
+            self._forget_previous(values)
+        return failed
+
+    set_multi = set_many
+
+    def _store_chunks(self, values: dict[Any, Any], *args: Any, **kwargs: Any) -> tuple[dict[Any, Any], list[Any]]:
+        """Serialize values and store the chunks of the large ones.
+
+        Returns the serialized values and manifests to store, and the keys whose chunks failed; these are
+        deleted so that their previous value is not served anymore.
+        """
+        assert self._chunking is not None
+        serialized = {}
+        chunks: dict[Any, Any] = {}
+        owners = {}
+        for key, value in values.items():
+            serialized[key], key_chunks = self._chunking.split(key, value)
+            chunks.update(key_chunks)
+            owners.update(dict.fromkeys(key_chunks, key))
+        if not chunks:
+            return serialized, []
+
+        failed = list(
+            dict.fromkeys(owners[chunk_key] for chunk_key in self._set_many_on_nodes(chunks, *args, **kwargs))
+        )
+        if failed:
+            for key in failed:
+                del serialized[key]
+            self.delete_many(failed, noreply=True)
+        return serialized, failed
+
+    def _set_many_on_nodes(self, values: dict[Any, Any], *args: Any, **kwargs: Any) -> list[Any]:
+        failed: list[Any] = []
+        batches: dict[Any, tuple[Client | PooledClient, dict[Any, Any]]] = {}
+        routed = self._route_many(self._get_topology(), list(values))
+        for (key, value), client in zip(values.items(), routed):
+            if client is None:
+                failed.append(key)
+                continue
+
+            batch = batches.get(client.server)
+            if batch is None:
+                batch = batches[client.server] = (client, {})
+            batch[1][key] = value
+
+        def store(client: Client | PooledClient, batch: dict[Any, Any]) -> list[Any]:
+            return list(self._safely_run_set_many(client, batch, *args, **kwargs))
+
+        for result in self._run_per_node([partial(store, client, batch) for client, batch in batches.values()]):
+            failed += result
+        return failed
+
+    def delete_many(self, keys: Iterable[Any], *args: Any, **kwargs: Any) -> bool:
+        if self._hot_keys is None and self._handoff is None:
+            return self._delete_many_on_nodes(keys, *args, **kwargs)
+
+        keys = list(keys)
+        self._delete_many_on_nodes(keys, *args, **kwargs)
+        if self._hot_keys is not None:
+            hot = [key for key in keys if self._hot_keys.is_hot(key)]
+            if hot:
+                self._delete_replicas(hot)
+        if self._handoff is not None:
+            self._forget_previous(keys)
+        return True
+
+    delete_multi = delete_many
+
+    def _delete_many_on_nodes(self, keys: Iterable[Any], *args: Any, **kwargs: Any) -> bool:
+        def delete(client: Client | PooledClient, batch: list[Any]) -> bool:
+            return bool(self._safely_run_func(client, client.delete_many, False, batch, *args, **kwargs))
+
+        self._run_per_node([partial(delete, client, batch) for client, batch in self._group_keys_by_client(keys)])
+        return True
+
+    def _close_multi_node_executor(self) -> None:
+        executor, self._multi_node_executor = self._multi_node_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
 
     def _close_clients(self) -> None:
         if self.use_pooling:
@@ -304,5 +1380,7 @@ class AWSElastiCacheClient(HashClient):  # type: ignore[misc]
             )
 
     def close(self) -> None:
+        self._stop_discovery_thread()
+        self._close_multi_node_executor()
         self._close_clients()
         self._close_configuration_endpoint_client()
@@ -0,0 +1,163 @@
+"""
+Cooperative (gevent/eventlet) mode
+
+Under gevent or eventlet, a thread lock held across a socket round trip, or a blocking socket, stalls every
+greenlet of the hub. In cooperative mode, ``AWSElastiCacheClient`` uses the library's locks and sockets, runs
+background discovery and multi-node fan-out in greenlets, and pools connections per node with a bounded pool
+where greenlets wait for a free connection instead of opening one each. ``ElastiPymemcache`` shares one client
+per hub, so the greenlets of a hub (which Django sees as threads) share its discovery and its pools.
+"""
+
+import sys
+import weakref
+from collections.abc import Callable
+from operator import methodcaller
+from typing import Any, NamedTuple
+
+from pymemcache.pool import ObjectPool
+
+from .metrics import MeteredObjectPool
+
+LIBRARIES = ("gevent", "eventlet")
+
+# hub -> {registry key: client}
+_clients: "weakref.WeakKeyDictionary[Any, dict[Any, Any]]" = weakref.WeakKeyDictionary()
+
+
+class CooperativeOptions(NamedTuple):
+    #: ``"gevent"``, ``"eventlet"`` or ``"auto"``: the library already imported, gevent first
+    library: str = "auto"
+    #: connections per node, shared by the greenlets of a hub
+    pool_size: int = 32
+    #: seconds a greenlet waits for a free connection; ``None`` waits forever
+    pool_timeout: float | None = 1.0
+
+    @classmethod
+    def from_option(cls, option: Any) -> "CooperativeOptions | None":
+        """Resolve a ``cooperative`` option: ``False``/``None`` disables, ``True`` uses the defaults and a
+        string selects the library."""
+        if not option:
+            return None
+        if option is True:
+            return cls()
+        if isinstance(option, str):
+            return cls(library=option)
+        return cls(**option)
+
+
+class CooperativeRuntime(NamedTuple):
+    """The primitives of a green thread library."""
+
+    name: str
+    #: lock factory, with the ``threading.Lock`` interface
+    lock: Callable[[], Any]
+    #: ``semaphore(value)``, with ``acquire(blocking, timeout)`` and ``release()``
+    semaphore: Callable[[int], Any]
+    socket_module: Any
+    spawn: Callable[..., Any]
+    #: waits for a spawned greenlet and returns its result
+    wait: Callable[[Any], Any]
+    sleep: Callable[[float], None]
+    get_hub: Callable[[], Any]
+
+
+def _gevent_runtime() -> CooperativeRuntime:
+    import gevent
+    import gevent.lock
+    import gevent.socket
+
+    return CooperativeRuntime(
+        "gevent",
+        gevent.lock.Semaphore,
+        gevent.lock.Semaphore,
+        gevent.socket,
+        gevent.spawn,
+        methodcaller("get"),
+        gevent.sleep,
+        gevent.get_hub,
+    )
+
+
+def _eventlet_runtime() -> CooperativeRuntime:
+    import eventlet
+    import eventlet.green.socket
+    import eventlet.hubs
+    import eventlet.semaphore
+
+    return CooperativeRuntime(
+        "eventlet",
+        eventlet.semaphore.Semaphore,
+        eventlet.semaphore.Semaphore,
+        eventlet.green.socket,
+        eventlet.spawn,
+        methodcaller("wait"),
+        eventlet.sleep,
+        eventlet.hubs.get_hub,
+    )
+
+
+_RUNTIMES = {"gevent": _gevent_runtime, "eventlet": _eventlet_runtime}
+
+
+def get_cooperative_runtime(library: str = "auto") -> CooperativeRuntime:
+    """Primitives of ``library``; ``"auto"`` picks the library already imported, else the first installed."""
+    if library == "auto":
+        candidates = [name for name in LIBRARIES if name in sys.modules] or list(LIBRARIES)
+    elif library in _RUNTIMES:
+        candidates = [library]
+    else:
+        raise ValueError(f"Unknown cooperative library '{library}' (expected one of {', '.join(LIBRARIES)}).")
+
+    for name in candidates:
+        try:
+            return _RUNTIMES[name]()
+        except ImportError:
+            continue
+    raise ImportError(f"The cooperative mode requires {' or '.join(candidates)}.")
+
+
+class CooperativeObjectPool(ObjectPool):  # type: ignore[misc]
+    """ObjectPool where callers wait for a free object once ``max_size`` objects are in use.
+
+    ``ObjectPool`` raises as soon as it is exhausted, which thousands of greenlets sharing a pool do all the
+    time; here they queue on a green semaphore for up to ``wait_timeout`` seconds.
+    """
+
+    def __init__(self, *args: Any, semaphore: Any, wait_timeout: float | None = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._slots = semaphore
+        self._wait_timeout = wait_timeout
+
+    def get(self) -> Any:
+        if not self._slots.acquire(blocking=True, timeout=self._wait_timeout):
+            raise RuntimeError(f"No free object within {self._wait_timeout}s, {self.max_size} in use")
+        try:
+            return super().get()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def destroy(self, obj: Any, silent: bool = True) -> None:
+        super().destroy(obj, silent)
+        self._slots.release()
+
+    def release(self, obj: Any, silent: bool = True) -> None:
+        super().release(obj, silent)
+        self._slots.release()
+
+
+class CooperativeMeteredObjectPool(CooperativeObjectPool, MeteredObjectPool):
+    """``CooperativeObjectPool`` reporting to a metrics hook like ``MeteredObjectPool``."""
+
+
+def get_hub_client(runtime: CooperativeRuntime, key: Any, factory: Callable[[], Any]) -> Any:
+    """Return the client of the current hub for ``key``, created with ``factory`` on first use."""
+    clients = _clients.setdefault(runtime.get_hub(), {})
+    client = clients.get(key)
+    if client is None:
+        # Creating a client discovers the cluster, so another greenlet may have created one meanwhile.
+        created = factory()
+        client = clients.setdefault(key, created)
+        if client is not created:
+            created.close()
+    return client
@@ -0,0 +1,61 @@
+"""
+Warm handoff of remapped keys
+
+When discovery adds a node, the keys the ring now maps to it (about 1/N of them) all miss at once, although
+their previous owners still hold them. With the ``handoff`` option, each topology change opens a transition
+window: a miss on the new owner of a remapped key falls back to its owner in the previous ring, and hits are
+copied forward to the new owner with ``add``, so they do not overwrite a newer value. Writes and deletes of
+remapped keys also delete the previous owner's copy, so that it is not served again.
+
+The window ends after ``window`` seconds, or once ``max_bytes`` of values were copied forward.
+"""
+
+import time
+from typing import Any, NamedTuple
+
+
+class HandoffOptions(NamedTuple):
+    #: seconds after a topology change during which misses fall back to the previous owners
+    window: float = 60.0
+    #: bytes copied forward after which the window ends early, 0 for no limit
+    max_bytes: int = 64 * 1024 * 1024
+    #: expiration of the copies, whose original expiration is unknown; 0 for none
+    copy_expire: int = 300
+
+    @classmethod
+    def from_option(cls, option: Any) -> "HandoffOptions | None":
+        """Resolve a ``handoff`` option: ``False``/``None`` disables, ``True`` uses the defaults."""
+        if not option:
+            return None
+        if option is True:
+            return cls()
+        return cls(**option)
+
+
+class Handoff:
+    """Transition window after a topology change, with the ring routing keys before it."""
+
+    def __init__(self, previous: Any, options: HandoffOptions) -> None:
+        #: ring of the previous topology
+        self.previous = previous
+        self.options = options
+        self.ends_at = time.monotonic() + options.window
+        self.rescued = 0
+        self.copied_bytes = 0
+
+    def active(self) -> bool:
+        if self.options.max_bytes and self.copied_bytes >= self.options.max_bytes:
+            return False
+        return time.monotonic() < self.ends_at
+
+    def record(self, rescued: int, copied_bytes: int) -> None:
+        self.rescued += rescued
+        self.copied_bytes += copied_bytes
+
+    def state(self) -> dict[str, Any]:
+        return {
+            "active": self.active(),
+            "remaining": max(0.0, self.ends_at - time.monotonic()),
+            "rescued": self.rescued,
+            "copied_bytes": self.copied_bytes,
+        }
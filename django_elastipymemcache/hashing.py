@@ -0,0 +1,129 @@
+"""
+Key distribution
+
+``KetamaHash`` implements the libmemcached ketama continuum so that Python services place keys on the same
+nodes as other ketama clients (PHP memcached, libmemcached, twemproxy, ...) sharing the cluster.
+It is a drop-in replacement for pymemcache's ``RendezvousHash``.
+"""
+
+import hashlib
+import threading
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from typing import Any, Callable
+
+from pymemcache.client.rendezvous import RendezvousHash
+
+DEFAULT_PORT = 11211
+
+#: libmemcached MEMCACHED_POINTS_PER_SERVER_KETAMA, four points per md5 digest
+POINTS_PER_SERVER = 160
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.md5(value.encode(), usedforsecurity=False).digest()
+
+
+def ketama_key_hash(key: str | bytes) -> int:
+    """Position of a key on the continuum: the first four md5 bytes, little-endian."""
+    if isinstance(key, str):
+        key = key.encode()
+    return int.from_bytes(hashlib.md5(key, usedforsecurity=False).digest()[:4], "little")
+
+
+class KetamaHash:
+    """libmemcached-compatible ketama consistent hashing.
+
+    Every node owns 160 points on a 32-bit continuum and a key belongs to the first point at or after its
+    own hash. Adding or removing one of N nodes only remaps the keys owned by that node, about 1/N of them.
+
+    Nodes are ``"host:port"`` strings. Points are derived from ``"host:port-<i>"``, or ``"host-<i>"`` for the
+    default port, like libmemcached does.
+    """
+
+    def __init__(self, nodes: Iterable[str] | None = None) -> None:
+        self.nodes: list[str] = []
+        self._points: dict[str, list[int]] = {}
+        # (sorted point values, owner of each point); rebuilt lazily and replaced as one reference
+        self._continuum: tuple[list[int], list[str]] | None = None
+        self._lock = threading.Lock()
+        for node in nodes or ():
+            self.add_node(node)
+
+    @staticmethod
+    def _node_points(node: str) -> list[int]:
+        host, _, port = node.rpartition(":")
+        prefix = host.strip("[]") if port == str(DEFAULT_PORT) else node
+        points: list[int] = []
+        for index in range(POINTS_PER_SERVER // 4):
+            digest = _digest(f"{prefix}-{index}")
+            points.extend(int.from_bytes(digest[offset : offset + 4], "little") for offset in range(0, 16, 4))
+        return points
+
+    def add_node(self, node: str) -> None:
+        with self._lock:
+            if node in self._points:
+                return
+            self.nodes.append(node)
+            self._points[node] = self._node_points(node)
+            self._continuum = None
+
+    def remove_node(self, node: str) -> None:
+        with self._lock:
+            if node not in self._points:
+                raise ValueError("No such node %s to remove" % (node))
+            self.nodes.remove(node)
+            del self._points[node]
+            self._continuum = None
+
+    def _build_continuum(self) -> tuple[list[int], list[str]]:
+        with self._lock:
+            if self._continuum is None:
+                ring = sorted((point, node) for node, points in self._points.items() for point in points)
+                self._continuum = ([point for point, _ in ring], [node for _, node in ring])
+            return self._continuum
+
+    def get_node(self, key: str | bytes) -> str | None:
+        continuum = self._continuum or self._build_continuum()
+        points, owners = continuum
+        if not points:
+            return None
+        index = bisect_left(points, ketama_key_hash(key))
+        return owners[index if index < len(points) else 0]
+
+    def get_nodes(self, keys: Sequence[str | bytes]) -> list[str | None]:
+        """``get_node`` of every key, against one continuum."""
+        points, owners = self._continuum or self._build_continuum()
+        if not points:
+            return [None] * len(keys)
+        md5, size = hashlib.md5, len(points)
+        nodes: list[str | None] = []
+        for key in keys:
+            digest = md5(key.encode() if isinstance(key, str) else key, usedforsecurity=False).digest()
+            index = bisect_left(points, int.from_bytes(digest[:4], "little"))
+            nodes.append(owners[index if index < size else 0])
+        return nodes
+
+
+def get_nodes(hasher: Any, keys: Sequence[Any]) -> list[Any]:
+    """Owners of ``keys`` in one pass, with the hasher's ``get_nodes`` when it has one."""
+    get_many = getattr(hasher, "get_nodes", None)
+    if get_many is not None:
+        return list(get_many(keys))
+    return list(map(hasher.get_node, keys))
+
+
+HASHERS: dict[str, Callable[[], Any]] = {
+    "rendezvous": RendezvousHash,
+    "ketama": KetamaHash,
+}
+
+
+def get_hasher_class(hasher: str | Callable[[], Any]) -> Callable[[], Any]:
+    """Resolve the ``hasher`` option, either a hasher class or one of the names in ``HASHERS``."""
+    if not isinstance(hasher, str):
+        return hasher
+    try:
+        return HASHERS[hasher]
+    except KeyError:
+        raise ValueError(f"Unknown hasher '{hasher}' (expected one of {', '.join(sorted(HASHERS))}).") from None
@@ -0,0 +1,122 @@
+"""
+Hot key detection and read replication
+
+A viral key sends all of its traffic to the one node that owns it. ``HotKeyDetector`` samples the keys read
+by the clients and finds the heavy hitters with the space-saving algorithm; detected keys, and the keys
+matching configured patterns, are copied by ``AWSElastiCacheClient`` to replica keys owned by other nodes,
+and their reads are spread over the primary key and its replicas.
+"""
+
+import math
+import random
+import re
+import threading
+import time
+from collections.abc import Iterable
+from fnmatch import translate
+from typing import Any
+
+_registry: dict[tuple[Any, ...], "HotKeyDetector"] = {}
+_registry_lock = threading.Lock()
+
+
+class HotKeyDetector:
+    """Sampled space-saving heavy hitter detector, shared by the clients of a process.
+
+    Every ``window`` seconds, the sampled keys seen at about ``min_rate`` reads per second or more become the
+    hot keys of the next window; a key crossing the rate in the current window becomes hot right away.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str] = (),
+        replicas: int = 2,
+        sample_rate: float = 0.01,
+        min_rate: float = 1000.0,
+        window: float = 10.0,
+        capacity: int = 128,
+        replica_ttl: int = 10,
+    ) -> None:
+        if replicas <= 0 or capacity <= 0 or window <= 0 or replica_ttl <= 0 or not 0 <= sample_rate <= 1:
+            raise ValueError(
+                "hot_keys: replicas, capacity, window and replica_ttl must be positive and sample_rate in [0, 1]."
+            )
+
+        self.patterns = tuple(keys)
+        self._pattern = re.compile("|".join(map(translate, self.patterns))) if self.patterns else None
+        self.replicas = int(replicas)
+        self.sample_rate = float(sample_rate)
+        self.window = float(window)
+        self.capacity = int(capacity)
+        self.replica_ttl = int(replica_ttl)
+        #: sampled reads within a window for a key to be hot
+        self.threshold = max(1, math.ceil(min_rate * sample_rate * window))
+
+        # key -> [count, overestimation]
+        self._counters: dict[Any, list[int]] = {}
+        self._hot: frozenset[Any] = frozenset()
+        self._window_ends_at = time.monotonic() + self.window
+        self._lock = threading.Lock()
+
+    def record(self, key: Any) -> None:
+        """Account for a read of ``key``."""
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._window_ends_at:
+                self._rotate(now)
+
+            counter = self._counters.get(key)
+            if counter is None:
+                if len(self._counters) < self.capacity:
+                    counter = self._counters[key] = [0, 0]
+                else:
+                    # Space-saving: the new key takes over the smallest counter and inherits its count as error.
+                    evicted = min(self._counters, key=lambda k: self._counters[k][0])
+                    count = self._counters.pop(evicted)[0]
+                    counter = self._counters[key] = [count, count]
+            counter[0] += 1
+
+            if counter[0] - counter[1] >= self.threshold and key not in self._hot:
+                self._hot = self._hot | {key}
+
+    def _rotate(self, now: float) -> None:
+        self._hot = frozenset(key for key, (count, error) in self._counters.items() if count - error >= self.threshold)
+        self._counters.clear()
+        self._window_ends_at = now + self.window
+
+    def is_hot(self, key: Any) -> bool:
+        """Whether ``key`` is replicated: detected as hot, or matching a configured pattern."""
+        if key in self._hot:
+            return True
+        if self._pattern is None:
+            return False
+        return self._pattern.match(key if isinstance(key, str) else key.decode(errors="replace")) is not None
+
+    def hot_keys(self) -> frozenset[Any]:
+        """The detected hot keys (not the configured patterns)."""
+        return self._hot
+
+    def replica_expire(self, expire: int) -> int:
+        """Expiration of replicas: at most ``replica_ttl`` seconds, which bounds how long they can be stale."""
+        if expire and expire < self.replica_ttl:
+            return expire
+        return self.replica_ttl
+
+
+def get_hot_key_detector(location: str, options: dict[str, Any]) -> HotKeyDetector:
+    """Return the process-wide detector for a location and configuration.
+
+    Django creates one client per thread, so the detector is shared to see the reads of every thread.
+    """
+    registry_key = (
+        location,
+        *sorted((name, tuple(value) if isinstance(value, (list, tuple)) else value) for name, value in options.items()),
+    )
+    with _registry_lock:
+        detector = _registry.get(registry_key)
+        if detector is None:
+            detector = _registry[registry_key] = HotKeyDetector(**options)
+        return detector
@@ -0,0 +1,41 @@
+"""
+Trusted keys
+
+Every key goes through Django's ``make_key`` and ``validate_key`` (a length check and a scan for characters
+memcached refuses), then through pymemcache's own checks twice: in ``AWSElastiCacheClient`` routing it and in
+the node client sending it. With the ``trusted_keys`` option, keys are validated at most once, by Django and
+only in ``DEBUG`` by default; the clients only encode them, and the backend builds keys with the default
+``KEY_FUNCTION`` from a cached ``prefix:version:`` string.
+"""
+
+from functools import cache
+from typing import Any, NamedTuple, TypeVar, cast
+
+T = TypeVar("T")
+
+
+class TrustedKeyOptions(NamedTuple):
+    #: run Django's key validation; ``None`` follows ``settings.DEBUG``
+    validate: bool | None = None
+
+    @classmethod
+    def from_option(cls, option: Any) -> "TrustedKeyOptions | None":
+        """Resolve a ``trusted_keys`` option: ``False``/``None`` disables, ``True`` uses the defaults."""
+        if not option:
+            return None
+        if option is True:
+            return cls()
+        return cls(**option)
+
+
+class TrustedKeyClientMixin:
+    """Node client mixin encoding keys without checking them."""
+
+    def check_key(self, key: str | bytes, key_prefix: bytes) -> bytes:
+        return key_prefix + (key.encode() if isinstance(key, str) else key)
+
+
+@cache
+def trusted_client_class(client_class: type[T]) -> type[T]:
+    """``client_class`` with ``TrustedKeyClientMixin``."""
+    return cast(type[T], type(f"Trusted{client_class.__name__}", (TrustedKeyClientMixin, client_class), {}))
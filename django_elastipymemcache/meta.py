@@ -0,0 +1,265 @@
+"""
+Meta protocol data node client
+
+ElastiCache for Memcached 1.6 speaks memcached's meta protocol (``mg``, ``ms``, ``md``, ``mn``).
+``MetaClient`` is a pymemcache ``Client`` serving the get, store, delete and touch commands with it, so it
+plugs into ``AWSElastiCacheClient`` discovery and hashing as its ``client_class``. Multi-key commands are
+pipelined in quiet mode, and ``meta_get``/``invalidate`` return TTL and CAS with the value, touch on read and
+serve stale items while a single caller wins the right to recompute them (stale-while-revalidate).
+"""
+
+from typing import Any, NamedTuple
+
+from pymemcache.client.base import Client, PooledClient, _readline, _readvalue
+from pymemcache.exceptions import MemcacheUnexpectedCloseError, MemcacheUnknownError
+
+_STORE_MODES = {
+    b"set": b"S",
+    b"add": b"E",
+    b"replace": b"R",
+    b"append": b"A",
+    b"prepend": b"P",
+    b"cas": b"S",
+}
+
+# ms and md return codes, as the results of pymemcache's store and delete commands
+_RESULTS = {b"HD": True, b"NS": False, b"EX": False, b"NF": None}
+
+
+class MetaResult(NamedTuple):
+    """Item returned by ``MetaClient.meta_get``."""
+
+    value: Any
+    hit: bool
+    cas: int | None = None
+    #: remaining seconds, ``-1`` for items without expiration
+    ttl: int | None = None
+    #: the caller won the right to recompute and store the value (``W``)
+    won: bool = False
+    #: the item was invalidated and the value is stale (``X``)
+    stale: bool = False
+    #: another caller already won the right to recompute the value (``Z``)
+    pending: bool = False
+
+
+def _parse_flags(tokens: list[bytes]) -> dict[bytes, bytes]:
+    return {token[:1]: token[1:] for token in tokens}
+
+
+class MetaClient(Client):  # type: ignore[misc]
+    """pymemcache ``Client`` using the meta protocol for gets, stores, deletes and touches."""
+
+    def _meta_request(self, cmds: list[bytes], name: bytes, noreply: bool) -> list[bytes]:
+        """Send pipelined meta commands and return their response lines, or none in quiet mode."""
+        if noreply:
+            cmds = [*cmds, b"mn\r\n"]
+
+        if self.sock is None:
+            self._connect()
+        try:
+            self.sock.sendall(b"".join(cmds))
+
+            buf = b""
+            lines = []
+            while True:
+                buf, line = _readline(self.sock, buf)
+                self._raise_errors(line, name)
+                if noreply:
+                    # Quiet commands only answer failures, and mn marks the end of the pipeline.
+                    if line == b"MN":
+                        return []
+                    continue
+                lines.append(line)
+                if len(lines) == len(cmds):
+                    return lines
+        except Exception:
+            self.close()
+            raise
+
+    def _fetch_cmd(
+        self,
+        name: bytes,
+        keys: Any,
+        expect_cas: bool,
+        key_prefix: bytes = b"",
+    ) -> dict[Any, Any]:
+        if name not in (b"get", b"gets"):
+            return dict(super()._fetch_cmd(name, keys, expect_cas, key_prefix))
+
+        prefixed_keys = [self.check_key(key, key_prefix=key_prefix) for key in keys]
+        remapped_keys = dict(zip(prefixed_keys, keys))
+        flags = b" v f k c q\r\n" if expect_cas else b" v f k q\r\n"
+        cmd = b"".join(b"mg " + key + flags for key in prefixed_keys) + b"mn\r\n"
+
+        try:
+            if self.sock is None:
+                self._connect()
+            self.sock.sendall(cmd)
+
+            buf = b""
+            result: dict[Any, Any] = {}
+            while True:
+                try:
+                    buf, line = _readline(self.sock, buf)
+                except MemcacheUnexpectedCloseError:
+                    self.close()
+                    raise
+                self._raise_errors(line, name)
+                if line == b"MN":
+                    return result
+                if not line.startswith(b"VA "):
+                    raise MemcacheUnknownError(line[:32])
+
+                _, size, *tokens = line.split()
+                ret = _parse_flags(tokens)
+                buf, data = _readvalue(self.sock, buf, int(size))
+                key = remapped_keys[ret[b"k"]]
+                value = self.serde.deserialize(key, data, int(ret.get(b"f", 0)))
+                result[key] = (value, ret[b"c"]) if expect_cas else value
+        except Exception:
+            self.close()
+            if self.ignore_exc:
+                return {}
+            raise
+
+    def _store_cmd(
+        self,
+        name: bytes,
+        values: dict[Any, Any],
+        expire: int,
+        noreply: bool,
+        flags: int | None = None,
+        cas: bytes | None = None,
+    ) -> dict[Any, bool | None]:
+        mode = _STORE_MODES.get(name)
+        if mode is None:
+            return dict(super()._store_cmd(name, values, expire, noreply, flags, cas))
+
+        extra = b" T" + self._check_integer(expire, "expire") + b" M" + mode
+        if cas is not None:
+            extra += b" C" + cas
+        if noreply:
+            extra += b" q"
+
+        cmds = []
+        keys = []
+        for key, data in values.items():
+            keys.append(key)
+            prefixed_key = self.check_key(key, self.key_prefix)
+            data, data_flags = self.serde.serialize(key, data)
+            if flags is not None:
+                data_flags = flags
+            if not isinstance(data, bytes):
+                data = str(data).encode(self.encoding)
+            cmds.append(b"ms %s %d F%d%s\r\n%s\r\n" % (prefixed_key, len(data), data_flags, extra, data))
+
+        lines = self._meta_request(cmds, name, noreply)
+        if noreply:
+            return {key: True for key in keys}
+        return {key: _RESULTS.get(line[:2]) for key, line in zip(keys, lines)}
+
+    def delete(self, key: Any, noreply: bool | None = None) -> bool:
+        if noreply is None:
+            noreply = self.default_noreply
+        cmd = b"md " + self.check_key(key, self.key_prefix) + (b" q\r\n" if noreply else b"\r\n")
+        lines = self._meta_request([cmd], b"delete", noreply)
+        return noreply or lines[0] == b"HD"
+
+    def delete_many(self, keys: Any, noreply: bool | None = None) -> bool:
+        keys = list(keys)
+        if not keys:
+            return True
+        if noreply is None:
+            noreply = self.default_noreply
+        flags = b" q\r\n" if noreply else b"\r\n"
+        self._meta_request([b"md " + self.check_key(key, self.key_prefix) + flags for key in keys], b"delete", noreply)
+        return True
+
+    delete_multi = delete_many
+
+    def touch(self, key: Any, expire: int = 0, noreply: bool | None = None) -> bool:
+        if noreply is None:
+            noreply = self.default_noreply
+        cmd = b"mg " + self.check_key(key, self.key_prefix) + b" T" + self._check_integer(expire, "expire")
+        lines = self._meta_request([cmd + (b" q\r\n" if noreply else b"\r\n")], b"touch", noreply)
+        return noreply or lines[0] == b"HD"
+
+    def meta_get(
+        self,
+        key: Any,
+        default: Any = None,
+        touch: int | None = None,
+        recache: int | None = None,
+        vivify: int | None = None,
+    ) -> MetaResult:
+        """Get a value with its CAS and remaining TTL in one round trip.
+
+        ``touch`` sets a new TTL on a hit. ``recache`` makes the first caller seeing less than ``recache``
+        seconds left win the right to recompute the value, and ``vivify`` creates a placeholder for
+        ``vivify`` seconds on a miss so that only the first caller wins; the others see the stale value, or
+        a pending placeholder.
+        """
+        prefixed_key = self.check_key(key, self.key_prefix)
+        cmd = b"mg " + prefixed_key + b" v f c t"
+        for flag, token in ((b"T", touch), (b"R", recache), (b"N", vivify)):
+            if token is not None:
+                cmd += b" " + flag + self._check_integer(token, flag.decode())
+        cmd += b"\r\n"
+
+        if self.sock is None:
+            self._connect()
+        try:
+            self.sock.sendall(cmd)
+            buf, line = _readline(self.sock, b"")
+            self._raise_errors(line, b"mg")
+            if line == b"EN":
+                return MetaResult(default, False)
+            if not line.startswith(b"VA "):
+                raise MemcacheUnknownError(line[:32])
+
+            _, size, *tokens = line.split()
+            ret = _parse_flags(tokens)
+            buf, data = _readvalue(self.sock, buf, int(size))
+        except Exception:
+            self.close()
+            raise
+
+        won, stale, pending = b"W" in ret, b"X" in ret, b"Z" in ret
+        client_flags = int(ret.get(b"f", 0))
+        # A vivified placeholder is empty, without client flags, until the winner stores the value.
+        placeholder = (won or pending) and not stale and not data and not client_flags
+        value = default if placeholder else self.serde.deserialize(key, data, client_flags)
+        return MetaResult(
+            value,
+            not placeholder,
+            int(ret[b"c"]) if b"c" in ret else None,
+            int(ret[b"t"]) if b"t" in ret else None,
+            won,
+            stale,
+            pending,
+        )
+
+    def invalidate(self, key: Any, stale_ttl: int = 30, noreply: bool | None = None) -> bool:
+        """Mark an item stale for ``stale_ttl`` seconds instead of deleting it.
+
+        Readers keep getting the stale value, flagged as such, while the first of them wins the right to
+        recompute it.
+        """
+        if noreply is None:
+            noreply = self.default_noreply
+        cmd = b"md " + self.check_key(key, self.key_prefix) + b" I T" + self._check_integer(stale_ttl, "stale_ttl")
+        lines = self._meta_request([cmd + (b" q\r\n" if noreply else b"\r\n")], b"invalidate", noreply)
+        return noreply or lines[0] == b"HD"
+
+
+class MetaPooledClient(PooledClient):  # type: ignore[misc]
+    """``PooledClient`` of ``MetaClient`` connections."""
+
+    def meta_get(self, key: Any, *args: Any, **kwargs: Any) -> MetaResult:
+        with self.client_pool.get_and_release(destroy_on_fail=True) as client:
+            result: MetaResult = client.meta_get(key, *args, **kwargs)
+            return result
+
+    def invalidate(self, key: Any, *args: Any, **kwargs: Any) -> bool:
+        with self.client_pool.get_and_release(destroy_on_fail=True) as client:
+            return bool(client.invalidate(key, *args, **kwargs))
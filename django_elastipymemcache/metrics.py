@@ -0,0 +1,286 @@
+"""
+Metrics hooks
+
+Clients report what they do to ``MetricsHook`` objects passed as the ``metrics`` option. Every method of the
+base class is a no-op, so a hook only implements the events it cares about. Two hooks are included:
+``InMemoryMetrics`` aggregates counters and latency histograms per node, and ``CallbackMetrics`` (or
+``SignalMetrics`` for a Django signal) forwards each event to be exported to StatsD, Prometheus, ...
+
+Node names are the ``"host:port"`` keys of ``AWSElastiCacheClient.clients``; the configuration endpoint is
+reported under its own address.
+"""
+
+import logging
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any, Callable
+
+from django.dispatch import Signal
+from pymemcache.pool import ObjectPool
+
+logger = logging.getLogger(__name__)
+
+#: Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+#: Sent for every event by ``SignalMetrics`` with ``event`` and the event's fields as keyword arguments.
+metrics_event = Signal()
+
+
+class MetricsHook:
+    """Base class of metrics hooks. Hooks are shared by threads and must be thread-safe."""
+
+    def command(self, node: str, name: str, duration: float, success: bool) -> None:
+        """A command (or a batch of keys) sent to a node."""
+
+    def cache_lookup(self, node: str, hits: int, misses: int) -> None:
+        """Result of a get style command."""
+
+    def bytes_transferred(self, node: str, sent: int, received: int) -> None:
+        """Bytes written to and read from a node's socket."""
+
+    def pool_checkout(self, node: str, wait: float, created: bool) -> None:
+        """A connection taken from a node's pool; ``created`` when the pool opened a new one."""
+
+    def pool_exhausted(self, node: str) -> None:
+        """A node's pool had no free connection and was at ``max_pool_size``."""
+
+    def node_state(self, node: str, state: str) -> None:
+        """A node became ``"failed"``, ``"dead"`` (removed from the ring) or ``"revived"``.
+
+        With outlier detection, a node is also ``"ejected"`` from the ring for its latency, back on
+        ``"probation"`` and ``"healthy"`` again.
+        """
+
+    def discovery(self, duration: float, success: bool, changed: bool) -> None:
+        """A topology refresh, and whether it changed the topology."""
+
+
+class _MetricsHooks(MetricsHook):
+    """Fans events out to several hooks; a failing hook never fails a cache operation."""
+
+    def __init__(self, hooks: Iterable[MetricsHook]) -> None:
+        self.hooks = tuple(hooks)
+
+    def _emit(self, event: str, *args: Any) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, event)(*args)
+            except Exception:
+                logger.warning("Metrics hook %r failed on %s", hook, event, exc_info=True)
+
+    def command(self, node: str, name: str, duration: float, success: bool) -> None:
+        self._emit("command", node, name, duration, success)
+
+    def cache_lookup(self, node: str, hits: int, misses: int) -> None:
+        self._emit("cache_lookup", node, hits, misses)
+
+    def bytes_transferred(self, node: str, sent: int, received: int) -> None:
+        self._emit("bytes_transferred", node, sent, received)
+
+    def pool_checkout(self, node: str, wait: float, created: bool) -> None:
+        self._emit("pool_checkout", node, wait, created)
+
+    def pool_exhausted(self, node: str) -> None:
+        self._emit("pool_exhausted", node)
+
+    def node_state(self, node: str, state: str) -> None:
+        self._emit("node_state", node, state)
+
+    def discovery(self, duration: float, success: bool, changed: bool) -> None:
+        self._emit("discovery", duration, success, changed)
+
+
+def get_metrics_hooks(metrics: MetricsHook | Iterable[MetricsHook] | None) -> MetricsHook | None:
+    """Resolve the ``metrics`` option, a hook or an iterable of hooks."""
+    if metrics is None:
+        return None
+    hooks = [metrics] if isinstance(metrics, MetricsHook) else list(metrics)
+    return _MetricsHooks(hooks) if hooks else None
+
+
+class InMemoryMetrics(MetricsHook):
+    """Aggregates events in memory; ``snapshot()`` returns the totals since creation or ``reset()``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._nodes: dict[str, dict[str, Any]] = {}
+            self._discovery: dict[str, Any] = {"success": 0, "failure": 0, "changed": 0, "duration": 0.0}
+
+    def _node(self, node: str) -> dict[str, Any]:
+        stats = self._nodes.get(node)
+        if stats is None:
+            stats = self._nodes[node] = {
+                "ops": Counter(),
+                "errors": Counter(),
+                "latency": [0] * (len(LATENCY_BUCKETS) + 1),
+                "latency_sum": 0.0,
+                "hits": 0,
+                "misses": 0,
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "pool_checkouts": 0,
+                "pool_connections_created": 0,
+                "pool_wait": 0.0,
+                "pool_exhausted": 0,
+                "states": Counter(),
+            }
+        return stats
+
+    def command(self, node: str, name: str, duration: float, success: bool) -> None:
+        with self._lock:
+            stats = self._node(node)
+            stats["ops"][name] += 1
+            if not success:
+                stats["errors"][name] += 1
+            stats["latency"][bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats["latency_sum"] += duration
+
+    def cache_lookup(self, node: str, hits: int, misses: int) -> None:
+        with self._lock:
+            stats = self._node(node)
+            stats["hits"] += hits
+            stats["misses"] += misses
+
+    def bytes_transferred(self, node: str, sent: int, received: int) -> None:
+        with self._lock:
+            stats = self._node(node)
+            stats["bytes_sent"] += sent
+            stats["bytes_received"] += received
+
+    def pool_checkout(self, node: str, wait: float, created: bool) -> None:
+        with self._lock:
+            stats = self._node(node)
+            stats["pool_checkouts"] += 1
+            stats["pool_connections_created"] += created
+            stats["pool_wait"] += wait
+
+    def pool_exhausted(self, node: str) -> None:
+        with self._lock:
+            self._node(node)["pool_exhausted"] += 1
+
+    def node_state(self, node: str, state: str) -> None:
+        with self._lock:
+            self._node(node)["states"][state] += 1
+
+    def discovery(self, duration: float, success: bool, changed: bool) -> None:
+        with self._lock:
+            self._discovery["success" if success else "failure"] += 1
+            self._discovery["changed"] += changed
+            self._discovery["duration"] += duration
+
+    def snapshot(self) -> dict[str, Any]:
+        """Plain ``dict``/``list`` copy of the aggregated metrics, safe to serialize."""
+        with self._lock:
+            nodes = {}
+            for node, stats in self._nodes.items():
+                node_stats = dict(stats)
+                node_stats["ops"] = dict(stats["ops"])
+                node_stats["errors"] = dict(stats["errors"])
+                node_stats["states"] = dict(stats["states"])
+                node_stats["latency"] = list(zip((*LATENCY_BUCKETS, float("inf")), stats["latency"]))
+                nodes[node] = node_stats
+            return {"nodes": nodes, "discovery": dict(self._discovery)}
+
+
+class CallbackMetrics(MetricsHook):
+    """Calls ``callback(event, fields)`` for every event, e.g. to feed a StatsD or Prometheus client."""
+
+    def __init__(self, callback: Callable[[str, dict[str, Any]], None]) -> None:
+        self.callback = callback
+
+    def command(self, node: str, name: str, duration: float, success: bool) -> None:
+        self.callback("command", {"node": node, "name": name, "duration": duration, "success": success})
+
+    def cache_lookup(self, node: str, hits: int, misses: int) -> None:
+        self.callback("cache_lookup", {"node": node, "hits": hits, "misses": misses})
+
+    def bytes_transferred(self, node: str, sent: int, received: int) -> None:
+        self.callback("bytes_transferred", {"node": node, "sent": sent, "received": received})
+
+    def pool_checkout(self, node: str, wait: float, created: bool) -> None:
+        self.callback("pool_checkout", {"node": node, "wait": wait, "created": created})
+
+    def pool_exhausted(self, node: str) -> None:
+        self.callback("pool_exhausted", {"node": node})
+
+    def node_state(self, node: str, state: str) -> None:
+        self.callback("node_state", {"node": node, "state": state})
+
+    def discovery(self, duration: float, success: bool, changed: bool) -> None:
+        self.callback("discovery", {"duration": duration, "success": success, "changed": changed})
+
+
+class SignalMetrics(CallbackMetrics):
+    """Sends ``metrics_event`` with ``event`` and the event's fields as keyword arguments."""
+
+    def __init__(self) -> None:
+        super().__init__(self._send)
+
+    def _send(self, event: str, fields: dict[str, Any]) -> None:
+        metrics_event.send(sender=SignalMetrics, event=event, **fields)
+
+
+class _MeteredSocket:
+    """Socket proxy reporting the bytes sent and received for one node."""
+
+    def __init__(self, sock: Any, node: str, metrics: MetricsHook) -> None:
+        self._sock = sock
+        self._node = node
+        self._metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._sock, name)
+
+    def sendall(self, data: bytes, *args: Any) -> None:
+        self._sock.sendall(data, *args)
+        self._metrics.bytes_transferred(self._node, len(data), 0)
+
+    def recv(self, size: int, *args: Any) -> bytes:
+        data: bytes = self._sock.recv(size, *args)
+        self._metrics.bytes_transferred(self._node, 0, len(data))
+        return data
+
+
+class MeteredSocketModule:
+    """Stands in for the ``socket_module`` of a node's client and meters its sockets."""
+
+    def __init__(self, socket_module: Any, node: str, metrics: MetricsHook) -> None:
+        self._socket_module = socket_module or socket
+        self._node = node
+        self._metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._socket_module, name)
+
+    def socket(self, *args: Any, **kwargs: Any) -> _MeteredSocket:
+        return _MeteredSocket(self._socket_module.socket(*args, **kwargs), self._node, self._metrics)
+
+
+class MeteredObjectPool(ObjectPool):  # type: ignore[misc]
+    """ObjectPool reporting checkouts, the time spent getting a connection and exhaustion."""
+
+    def __init__(self, node: str, metrics: MetricsHook, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._node = node
+        self._metrics = metrics
+
+    def get(self) -> Any:
+        # Read without the pool lock, so ``created`` is best effort under contention.
+        created = len(self._free_objs) == 0
+        start = time.perf_counter()
+        try:
+            obj = super().get()
+        except RuntimeError:
+            self._metrics.pool_exhausted(self._node)
+            raise
+        self._metrics.pool_checkout(self._node, time.perf_counter() - start, created)
+        return obj
@@ -0,0 +1,201 @@
+"""
+Cache-generation namespaces
+
+Invalidating a group of keys (a tenant, a model, a template set) otherwise means deleting every key, or
+``clear()`` flushing every node. A namespace has a generation counter stored in memcached under its own key, and
+the generation is part of the keys of the namespace: incrementing the counter makes all of them unreachable at
+once, and memcached evicts them in time.
+
+Generations are cached in-process for ``generation_ttl`` seconds. After that, reads check them with the
+generation keys fetched in the same multi-get as the data keys, so that they only pay a second round trip when
+a generation did change.
+"""
+
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+if TYPE_CHECKING:
+    from .backend import ElastiPymemcache
+
+_registry: dict[tuple[Any, ...], "GenerationCache"] = {}
+_registry_lock = threading.Lock()
+
+_missing = object()
+
+
+class NamespaceOptions(NamedTuple):
+    #: seconds a generation is used before being checked again
+    generation_ttl: float = 1.0
+    #: prefix of the generation keys
+    key_prefix: str = "namespace"
+
+    @classmethod
+    def from_option(cls, option: Any) -> "NamespaceOptions":
+        """Resolve a ``namespaces`` option; namespaces are always available, with the defaults if it is unset."""
+        if not option or option is True:
+            return cls()
+        return cls(**option)
+
+
+class GenerationCache:
+    """Generations of the namespaces, by generation key, and until when they are used without being checked."""
+
+    def __init__(self, ttl: float, max_entries: int = 10000) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[int, float]] = {}
+
+    def lookup(self, keys: Sequence[str]) -> tuple[list[int] | None, bool]:
+        """Last known generations of ``keys``, ``None`` if one is unknown, and whether they are all fresh."""
+        now = time.monotonic()
+        generations = []
+        fresh = True
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            generations.append(entry[0])
+            fresh = fresh and now < entry[1]
+        return generations, fresh
+
+    def update(self, generations: Iterable[tuple[str, int]]) -> None:
+        expires_at = time.monotonic() + self.ttl
+        for key, generation in generations:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (generation, expires_at)
+
+
+class Namespace:
+    """The keys of a cache under one or more namespaces, invalidated with ``invalidate()``.
+
+    A key under several namespaces, e.g. a tenant and a model, is invalidated with any of them.
+    """
+
+    def __init__(
+        self,
+        cache: "ElastiPymemcache",
+        names: Sequence[str],
+        options: NamespaceOptions,
+        generations: GenerationCache,
+    ) -> None:
+        if not names:
+            raise ValueError("namespace: at least one name is required.")
+        self.cache = cache
+        self.names = tuple(names)
+        self._generations = generations
+        self._generation_keys = [cache.make_and_validate_key(f"{options.key_prefix}:{name}") for name in self.names]
+
+    def _prefix(self, generations: Sequence[int]) -> str:
+        return "".join(f"{name}:{generation}:" for name, generation in zip(self.names, generations))
+
+    def _load_generations(self, found: dict[str, Any] | None = None) -> list[int]:
+        if found is None:
+            found = self.cache._cache.get_multi(self._generation_keys)
+        generations = []
+        for key in self._generation_keys:
+            generation = found.get(key)
+            generations.append(self._create_generation(key) if generation is None else int(generation))
+        self._generations.update(zip(self._generation_keys, generations))
+        return generations
+
+    def _create_generation(self, key: str) -> int:
+        # Starting from the clock, keys written before the generation key was evicted are not reachable again.
+        generation = time.time_ns() // 1000
+        if self.cache._cache.add(key, generation, 0, noreply=False):
+            return generation
+        return int(self.cache._cache.get(key, generation))
+
+    def generations(self) -> list[int]:
+        """Current generations of the namespaces, fetched when they are not fresh."""
+        generations, fresh = self._generations.lookup(self._generation_keys)
+        if generations is None or not fresh:
+            return self._load_generations()
+        return generations
+
+    def invalidate(self) -> None:
+        """Invalidate every key of the namespaces, with one increment per namespace."""
+        generations = []
+        for key in self._generation_keys:
+            generation = self.cache._cache.incr(key, 1, noreply=False)
+            generations.append(self._create_generation(key) if generation is None else int(generation))
+        self._generations.update(zip(self._generation_keys, generations))
+
+    def get_many(self, keys: Iterable[Any], version: int | None = None) -> dict[Any, Any]:
+        keys = list(keys)
+        generations, fresh = self._generations.lookup(self._generation_keys)
+        if generations is None:
+            generations = self._load_generations()
+        elif not fresh:
+            # The generation keys are checked in the same round trip as the data keys.
+            prefix = self._prefix(generations)
+            safe_keys = self.cache._make_keys([f"{prefix}{key}" for key in keys], version)
+            found = self.cache._cache.get_multi(self._generation_keys + safe_keys)
+            current = self._load_generations(found)
+            if current == generations:
+                return {key: found[safe_key] for key, safe_key in zip(keys, safe_keys) if safe_key in found}
+            generations = current
+
+        prefix = self._prefix(generations)
+        key_map = {f"{prefix}{key}": key for key in keys}
+        return {key_map[k]: v for k, v in self.cache.get_many(key_map, version).items()}
+
+    def get(self, key: Any, default: Any = None, version: int | None = None) -> Any:
+        return self.get_many([key], version).get(key, default)
+
+    def has_key(self, key: Any, version: int | None = None) -> bool:
+        return self.get(key, _missing, version) is not _missing
+
+    def set(self, key: Any, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> None:
+        self.cache.set(f"{self._prefix(self.generations())}{key}", value, timeout, version)
+
+    def set_many(self, data: dict[Any, Any], timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> list[Any]:
+        prefix = self._prefix(self.generations())
+        key_map = {f"{prefix}{key}": key for key in data}
+        failed_keys = self.cache.set_many({f"{prefix}{key}": value for key, value in data.items()}, timeout, version)
+        return [key_map[k] for k in failed_keys]
+
+    def add(self, key: Any, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> bool:
+        return self.cache.add(f"{self._prefix(self.generations())}{key}", value, timeout, version)
+
+    def get_or_set(
+        self,
+        key: Any,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> Any:
+        return self.cache.get_or_set(f"{self._prefix(self.generations())}{key}", default, timeout, version)
+
+    def touch(self, key: Any, timeout: Any = DEFAULT_TIMEOUT, version: int | None = None) -> bool:
+        return self.cache.touch(f"{self._prefix(self.generations())}{key}", timeout, version)
+
+    def incr(self, key: Any, delta: int = 1, version: int | None = None) -> int:
+        return self.cache.incr(f"{self._prefix(self.generations())}{key}", delta, version)
+
+    def decr(self, key: Any, delta: int = 1, version: int | None = None) -> int:
+        return self.incr(key, -delta, version)
+
+    def delete(self, key: Any, version: int | None = None) -> bool:
+        return self.cache.delete(f"{self._prefix(self.generations())}{key}", version)
+
+    def delete_many(self, keys: Iterable[Any], version: int | None = None) -> None:
+        prefix = self._prefix(self.generations())
+        self.cache.delete_many([f"{prefix}{key}" for key in keys], version)
+
+
+def get_generation_cache(location: str, ttl: float) -> GenerationCache:
+    """Return the process-wide generation cache for a location.
+
+    Django creates one backend per thread, so the generations are shared by every thread.
+    """
+    registry_key = (location, ttl)
+    with _registry_lock:
+        generations = _registry.get(registry_key)
+        if generations is None:
+            generations = _registry[registry_key] = GenerationCache(ttl)
+        return generations
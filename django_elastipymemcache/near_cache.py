@@ -0,0 +1,133 @@
+"""
+In-process L1 near cache
+
+Keeps a small, bounded LRU of serialized values in front of ElastiCache so that the hottest keys are
+served without a network round trip. Values are stored serialized, which bounds memory by bytes and
+hands every caller its own copy of the value.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+_registry: dict[tuple[Any, ...], "NearCache"] = {}
+_registry_lock = threading.Lock()
+
+
+class NearCache:
+    """Bounded, thread-safe LRU of serialized values with a short maximum TTL."""
+
+    def __init__(
+        self,
+        serde: Any,
+        max_entries: int = 1024,
+        max_bytes: int = 1024 * 1024,
+        ttl: float = 1.0,
+        key_prefixes: Iterable[str] = (),
+    ) -> None:
+        if max_entries <= 0 or max_bytes <= 0 or ttl <= 0:
+            raise ValueError("near_cache: max_entries, max_bytes and ttl must be positive.")
+
+        self.serde = serde
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl)
+        self.key_prefixes = tuple(key_prefixes)
+
+        # key -> (expires_at, data, flags)
+        self._entries: OrderedDict[str, tuple[float, bytes, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def accepts(self, key: Any) -> bool:
+        """Whether a caller key (before key construction) is eligible for the near cache."""
+        return not self.key_prefixes or str(key).startswith(self.key_prefixes)
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        now = time.monotonic()
+        found: dict[str, tuple[bytes, int]] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                elif entry[0] <= now:
+                    self._pop(key)
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1:]
+                    self.hits += 1
+
+        # Deserialize outside the lock.
+        return {key: self.serde.deserialize(key, data, flags) for key, (data, flags) in found.items()}
+
+    def set_many(self, values: dict[str, Any]) -> None:
+        serialized: list[tuple[str, bytes, int]] = []
+        for key, value in values.items():
+            data, flags = self.serde.serialize(key, value)
+            if not isinstance(data, bytes):
+                data = str(data).encode()
+            if len(data) <= self.max_bytes:
+                serialized.append((key, data, flags))
+
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, data, flags in serialized:
+                self._pop(key)
+                self._entries[key] = (expires_at, data, flags)
+                self._bytes += len(data)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, data, _) = self._entries.popitem(last=False)
+                self._bytes -= len(data)
+                self.evictions += 1
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+def get_near_cache(location: str, serde: Any, options: dict[str, Any]) -> NearCache:
+    """Return the process-wide near cache for a location and configuration.
+
+    Django creates one cache backend per thread, so the near cache is shared through this registry to
+    make local writes in one thread invalidate the entries read by the others.
+    """
+    registry_key = (
+        location,
+        id(serde),
+        *sorted((name, tuple(value) if isinstance(value, (list, tuple)) else value) for name, value in options.items()),
+    )
+    with _registry_lock:
+        near_cache = _registry.get(registry_key)
+        if near_cache is None:
+            near_cache = _registry[registry_key] = NearCache(serde, **options)
+        return near_cache
@@ -0,0 +1,242 @@
+"""
+Latency outlier ejection and adaptive timeouts
+
+Dead node handling only reacts to errors: a node answering in 300ms instead of 1ms keeps its share of the
+traffic. ``LatencyOutlierDetector`` keeps the recent command latencies of every node; a node whose median
+latency is far above the median of the other nodes is ejected from the hash ring for a while, then
+re-admitted gradually, its share of its own keys growing from nothing to all of them. The observed
+percentiles also give each node a socket timeout adapted to its latency.
+"""
+
+import statistics
+import threading
+import time
+import zlib
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+from .metrics import MetricsHook
+
+_registry: dict[tuple[Any, ...], "LatencyOutlierDetector"] = {}
+_registry_lock = threading.Lock()
+
+HEALTHY = "healthy"
+EJECTED = "ejected"
+PROBATION = "probation"
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class _NodeLatency:
+    __slots__ = ("samples", "state", "ejections", "ejected_until", "probation_since", "timeout")
+
+    def __init__(self, window: int) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+        self.state = HEALTHY
+        #: consecutive ejections, scaling the ejection time
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.probation_since = 0.0
+        self.timeout: float | None = None
+
+
+class LatencyOutlierDetector:
+    """Rolling per-node latencies and outlier ejection, shared by the clients of a process.
+
+    Every ``interval`` seconds, a node with ``min_samples`` samples or more whose median latency is above
+    ``min_latency`` and ``ratio`` times the median of the other nodes is ejected for ``ejection_time`` seconds,
+    multiplied by its consecutive ejections up to ``max_ejection_time``; at most ``max_ejected_fraction`` of
+    the nodes are ejected at once. It is then on probation for ``readmit_time`` seconds, during which the
+    share of its keys routed to it grows linearly, and ejected again if still an outlier. With
+    ``adaptive_timeouts``, each node gets ``timeout_multiplier`` times its p99 as socket timeout, within
+    ``min_timeout`` and ``max_timeout``.
+    """
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 50,
+        interval: float = 1.0,
+        ratio: float = 5.0,
+        min_latency: float = 0.005,
+        ejection_time: float = 30.0,
+        max_ejection_time: float = 300.0,
+        readmit_time: float = 30.0,
+        max_ejected_fraction: float = 0.34,
+        adaptive_timeouts: bool = False,
+        timeout_multiplier: float = 4.0,
+        min_timeout: float = 0.05,
+        max_timeout: float = 1.0,
+    ) -> None:
+        if window <= 0 or not 0 < min_samples <= window or interval <= 0 or ratio <= 1:
+            raise ValueError(
+                "outlier_detection: window and interval must be positive, min_samples within window and ratio above 1."
+            )
+        if not 0 < min_timeout <= max_timeout or not 0 <= max_ejected_fraction < 1:
+            raise ValueError(
+                "outlier_detection: min_timeout must be positive and below max_timeout, max_ejected_fraction in [0, 1)."
+            )
+
+        self.window = int(window)
+        self.min_samples = int(min_samples)
+        self.interval = float(interval)
+        self.ratio = float(ratio)
+        self.min_latency = float(min_latency)
+        self.ejection_time = float(ejection_time)
+        self.max_ejection_time = float(max_ejection_time)
+        self.readmit_time = float(readmit_time)
+        self.max_ejected_fraction = float(max_ejected_fraction)
+        self.adaptive_timeouts = bool(adaptive_timeouts)
+        self.timeout_multiplier = float(timeout_multiplier)
+        self.min_timeout = float(min_timeout)
+        self.max_timeout = float(max_timeout)
+
+        self._nodes: dict[str, _NodeLatency] = {}
+        #: nodes out of the ring, and nodes on probation with the time they were re-admitted
+        self.ejected: frozenset[str] = frozenset()
+        self.probation: dict[str, float] = {}
+        #: bumped when ``ejected`` changes, and counting the evaluations
+        self.generation = 0
+        self.evaluations = 0
+        self._next_evaluation = time.monotonic() + self.interval
+        self._lock = threading.Lock()
+        self._evaluate_lock = threading.Lock()
+
+    def record(self, node: str, duration: float) -> None:
+        stats = self._nodes.get(node)
+        if stats is None:
+            with self._lock:
+                stats = self._nodes.setdefault(node, _NodeLatency(self.window))
+        stats.samples.append(duration)
+
+    def due(self) -> bool:
+        return time.monotonic() >= self._next_evaluation
+
+    def admit(self, node: str, key: Any) -> bool:
+        """Whether a key owned by ``node`` is routed to it, given its re-admission progress.
+
+        Keys are admitted in a fixed order, so that each one moves back to the node once.
+        """
+        since = self.probation.get(node)
+        if since is None:
+            return True
+        position = zlib.crc32(key.encode() if isinstance(key, str) else key) / 0x100000000
+        return position * self.readmit_time < time.monotonic() - since
+
+    def evaluate(self, metrics: MetricsHook | None = None) -> bool:
+        """Update the node states and timeouts, unless another thread is at it; returns whether it ran."""
+        if not self._evaluate_lock.acquire(blocking=False):
+            return False
+        try:
+            now = time.monotonic()
+            self._next_evaluation = now + self.interval
+            transitions = self._evaluate(now)
+        finally:
+            self._evaluate_lock.release()
+
+        if metrics is not None:
+            for node, state in transitions:
+                metrics.node_state(node, state)
+        return True
+
+    def _evaluate(self, now: float) -> list[tuple[str, str]]:
+        transitions = []
+        with self._lock:
+            nodes = dict(self._nodes)
+
+        for node, stats in nodes.items():
+            if stats.state == EJECTED and stats.ejected_until <= now:
+                stats.state, stats.probation_since = PROBATION, now
+                stats.samples.clear()
+                transitions.append((node, PROBATION))
+
+        ordered = {
+            node: sorted(stats.samples)
+            for node, stats in nodes.items()
+            if stats.state != EJECTED and len(stats.samples) >= self.min_samples
+        }
+        medians = {node: _percentile(samples, 0.5) for node, samples in ordered.items()}
+        ejectable = int(len(nodes) * self.max_ejected_fraction) - sum(
+            stats.state == EJECTED for stats in nodes.values()
+        )
+        # Worst nodes first, so that the cap keeps the healthiest ones.
+        for node in sorted(medians, key=medians.__getitem__, reverse=True):
+            stats = nodes[node]
+            others = [median for other, median in medians.items() if other != node]
+            outlier = (
+                bool(others)
+                and medians[node] >= self.min_latency
+                and medians[node] > self.ratio * statistics.median(others)
+            )
+            if outlier and ejectable > 0:
+                ejectable -= 1
+                stats.ejections += 1
+                stats.state = EJECTED
+                stats.ejected_until = now + min(self.ejection_time * stats.ejections, self.max_ejection_time)
+                stats.samples.clear()
+                transitions.append((node, EJECTED))
+            elif stats.state == PROBATION and now - stats.probation_since >= self.readmit_time and not outlier:
+                stats.state, stats.ejections = HEALTHY, 0
+                transitions.append((node, HEALTHY))
+
+        if self.adaptive_timeouts:
+            for node, samples in ordered.items():
+                if nodes[node].state != EJECTED:
+                    timeout = _percentile(samples, 0.99) * self.timeout_multiplier
+                    nodes[node].timeout = min(max(timeout, self.min_timeout), self.max_timeout)
+
+        ejected = frozenset(node for node, stats in nodes.items() if stats.state == EJECTED)
+        self.probation = {node: stats.probation_since for node, stats in nodes.items() if stats.state == PROBATION}
+        if ejected != self.ejected:
+            self.ejected = ejected
+            self.generation += 1
+        self.evaluations += 1
+        return transitions
+
+    def timeouts(self) -> dict[str, float]:
+        """Adaptive socket timeout of the nodes with enough samples."""
+        return {node: stats.timeout for node, stats in list(self._nodes.items()) if stats.timeout is not None}
+
+    def forget(self, nodes: Iterable[str]) -> None:
+        """Drop the state of nodes removed from the cluster."""
+        with self._lock:
+            for node in nodes:
+                self._nodes.pop(node, None)
+
+    def state(self) -> dict[str, dict[str, Any]]:
+        """Per-node latency percentiles (in seconds), state and timeout, for inspection."""
+        now = time.monotonic()
+        result = {}
+        for node, stats in list(self._nodes.items()):
+            samples = sorted(stats.samples)
+            result[node] = {
+                "state": stats.state,
+                "samples": len(samples),
+                "p50": _percentile(samples, 0.5) if samples else None,
+                "p99": _percentile(samples, 0.99) if samples else None,
+                "timeout": stats.timeout,
+                "ejections": stats.ejections,
+                "ejected_for": max(stats.ejected_until - now, 0.0) if stats.state == EJECTED else None,
+                "admitted": (
+                    min((now - stats.probation_since) / self.readmit_time, 1.0)
+                    if stats.state == PROBATION and self.readmit_time > 0
+                    else float(stats.state != EJECTED)
+                ),
+            }
+        return result
+
+
+def get_outlier_detector(location: str, options: dict[str, Any]) -> LatencyOutlierDetector:
+    """Return the process-wide detector for a location and configuration.
+
+    Django creates one client per thread, so the detector is shared to see the latencies of every thread.
+    """
+    registry_key = (location, *sorted(options.items()))
+    with _registry_lock:
+        detector = _registry.get(registry_key)
+        if detector is None:
+            detector = _registry[registry_key] = LatencyOutlierDetector(**options)
+        return detector
@@ -0,0 +1,139 @@
+"""
+Transparent compression
+
+``CompressingSerde`` wraps another serde and compresses serialized values above a byte threshold. A codec flag
+bit in the memcached item flags marks compressed values, so compressed and uncompressed values (and values
+written with different codecs) coexist and stay readable whatever the current configuration is.
+zlib values use pymemcache's ``FLAG_COMPRESSED`` and are compatible with ``pymemcache.serde.CompressedSerde``.
+"""
+
+import threading
+import zlib
+from typing import Any, Callable, NamedTuple
+
+from pymemcache.serde import FLAG_COMPRESSED, pickle_serde
+
+try:
+    import bz2
+except ImportError:  # pragma: no cover - Python built without bz2
+    bz2 = None  # type: ignore[assignment]
+
+try:
+    import lzma
+except ImportError:  # pragma: no cover - Python built without lzma
+    lzma = None  # type: ignore[assignment]
+
+FLAG_LZMA = 1 << 5
+FLAG_BZ2 = 1 << 6
+
+
+class Codec(NamedTuple):
+    flag: int
+    compress: Callable[[bytes, int | None], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _zlib_compress(data: bytes, level: int | None) -> bytes:
+    return zlib.compress(data, -1 if level is None else level)
+
+
+def _lzma_compress(data: bytes, level: int | None) -> bytes:
+    return lzma.compress(data, preset=level)
+
+
+def _bz2_compress(data: bytes, level: int | None) -> bytes:
+    return bz2.compress(data, 9 if level is None else level)
+
+
+CODECS: dict[str, Codec] = {"zlib": Codec(FLAG_COMPRESSED, _zlib_compress, zlib.decompress)}
+if lzma is not None:
+    CODECS["lzma"] = Codec(FLAG_LZMA, _lzma_compress, lzma.decompress)
+if bz2 is not None:
+    CODECS["bz2"] = Codec(FLAG_BZ2, _bz2_compress, bz2.decompress)
+
+_CODECS_BY_FLAG = {codec.flag: codec for codec in CODECS.values()}
+_CODEC_FLAGS = FLAG_COMPRESSED | FLAG_LZMA | FLAG_BZ2
+
+_registry: dict[tuple[Any, ...], "CompressingSerde"] = {}
+_registry_lock = threading.Lock()
+
+
+class CompressingSerde:
+    """Serde compressing values of at least ``threshold`` serialized bytes with ``codec``.
+
+    A value is stored compressed only when that makes it smaller.
+    """
+
+    def __init__(
+        self,
+        serde: Any = pickle_serde,
+        threshold: int = 10 * 1024,
+        codec: str = "zlib",
+        level: int | None = None,
+    ) -> None:
+        if codec not in CODECS:
+            raise ValueError(f"Unknown compression codec '{codec}' (expected one of {', '.join(sorted(CODECS))}).")
+        if threshold < 0:
+            raise ValueError("compression: threshold must not be negative.")
+
+        self.serde = serde
+        self.threshold = int(threshold)
+        self.codec = codec
+        self.level = level
+        self._codec = CODECS[codec]
+
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def serialize(self, key: Any, value: Any) -> tuple[bytes, int]:
+        data, flags = self.serde.serialize(key, value)
+        if not isinstance(data, bytes):
+            data = str(data).encode()
+        if len(data) < self.threshold:
+            return data, flags
+
+        compressed = self._codec.compress(data, self.level)
+        if len(compressed) >= len(data):
+            with self._lock:
+                self.skipped += 1
+            return data, flags
+
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+        return compressed, flags | self._codec.flag
+
+    def deserialize(self, key: Any, value: bytes, flags: int) -> Any:
+        codec_flag = flags & _CODEC_FLAGS
+        if codec_flag:
+            codec = _CODECS_BY_FLAG.get(codec_flag)
+            if codec is None:
+                raise ValueError(f"Unsupported compression flags {flags:#x} for key {key!r}.")
+            value = codec.decompress(value)
+            flags &= ~_CODEC_FLAGS
+        return self.serde.deserialize(key, value, flags)
+
+    def stats(self) -> dict[str, float]:
+        """Counters of the values compressed by this process, with ``ratio`` = stored / original bytes."""
+        with self._lock:
+            return {
+                "compressed": self.compressed,
+                "skipped": self.skipped,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 1.0,
+            }
+
+
+def get_compressing_serde(location: str, serde: Any, options: dict[str, Any]) -> CompressingSerde:
+    """Return the process-wide compressing serde for a location and configuration, so stats cover all threads."""
+    registry_key = (location, id(serde), *sorted(options.items()))
+    with _registry_lock:
+        compressing_serde = _registry.get(registry_key)
+        if compressing_serde is None:
+            compressing_serde = _registry[registry_key] = CompressingSerde(serde, **options)
+        return compressing_serde
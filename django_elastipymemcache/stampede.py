@@ -0,0 +1,213 @@
+"""
+Cache stampede protection for ``get_or_set``
+
+Three complementary mechanisms, each optional:
+
+* single flight: concurrent misses on one key in a process wait for a single computation;
+* lease: across processes, only the caller that wins a short memcached ``add`` on ``<key>:lease`` computes,
+  the others poll for its value for up to ``lease_wait`` seconds. The lease holds a token, and is released
+  with a compare-and-delete so that a computation outlasting ``lease_timeout`` does not release the lease
+  another process took since;
+* probabilistic early expiration (XFetch): a caller may recompute the value shortly before it expires, with a
+  probability that grows as the expiry approaches and with the time the computation took. Its metadata is kept
+  under ``<key>:xfetch``.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Any, NamedTuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+_missing = object()
+
+_registry: dict[str, "StampedeProtection"] = {}
+_registry_lock = threading.Lock()
+
+
+class StampedeOptions(NamedTuple):
+    single_flight: bool = True
+    #: seconds a lease is held at most; ``0`` disables leases
+    lease_timeout: int = 10
+    #: seconds a caller that lost the lease waits for the value before computing it itself
+    lease_wait: float = 5.0
+    poll_interval: float = 0.05
+    #: XFetch beta, ``> 1`` refreshes earlier; ``0`` disables early expiration
+    xfetch_beta: float = 0.0
+
+    @classmethod
+    def from_option(cls, option: Any, base: "StampedeOptions | None" = None) -> "StampedeOptions | None":
+        """Resolve a ``stampede`` option: ``False``/``None`` disables, ``True`` uses ``base``, a dict overrides it."""
+        if not option:
+            return None
+        base = base or cls()
+        if option is True:
+            return base
+        return base._replace(**option)
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = _missing
+
+
+def _should_refresh_early(meta: Any, beta: float) -> bool:
+    try:
+        delta, expires_at = meta
+    except (TypeError, ValueError):
+        return False
+    # XFetch: now - delta * beta * log(rand()) >= expiry
+    return bool(time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at)
+
+
+class StampedeProtection:
+    """Process-wide ``get_or_set`` coordination for one cache location."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+
+    def get_or_set(
+        self,
+        cache: BaseCache,
+        key: Any,
+        default: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+        options: StampedeOptions | None = None,
+    ) -> Any:
+        options = options or StampedeOptions()
+        seconds = cache.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        xfetch = options.xfetch_beta > 0 and seconds is not None and seconds > 0
+
+        value, early = self._lookup(cache, key, version, options, xfetch)
+        if value is not _missing and not early:
+            return value
+
+        if not options.single_flight:
+            return self._compute(cache, key, default, timeout, version, options, seconds, xfetch, value)
+
+        flight_key = cache.make_and_validate_key(key, version=version)
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[flight_key] = _Flight()
+
+        if not leader:
+            # Someone in this process is already refreshing: keep serving the current value.
+            if value is not _missing:
+                return value
+            flight.done.wait(options.lease_wait)
+            if flight.value is not _missing:
+                return flight.value
+            return self._compute(cache, key, default, timeout, version, options, seconds, xfetch, value)
+
+        try:
+            flight.value = self._compute(cache, key, default, timeout, version, options, seconds, xfetch, value)
+            return flight.value
+        finally:
+            with self._lock:
+                self._flights.pop(flight_key, None)
+            flight.done.set()
+
+    def _lookup(
+        self,
+        cache: BaseCache,
+        key: Any,
+        version: int | None,
+        options: StampedeOptions,
+        xfetch: bool,
+    ) -> tuple[Any, bool]:
+        if not xfetch:
+            return cache.get(key, _missing, version=version), False
+
+        values = cache.get_many([key, f"{key}:xfetch"], version=version)
+        if key not in values:
+            return _missing, False
+        return values[key], _should_refresh_early(values.get(f"{key}:xfetch"), options.xfetch_beta)
+
+    def _compute(
+        self,
+        cache: BaseCache,
+        key: Any,
+        default: Any,
+        timeout: Any,
+        version: int | None,
+        options: StampedeOptions,
+        seconds: float | None,
+        xfetch: bool,
+        current: Any,
+    ) -> Any:
+        lease_key = f"{key}:lease"
+        lease = None
+        if options.lease_timeout > 0:
+            token = uuid.uuid4().hex
+            if cache.add(lease_key, token, timeout=options.lease_timeout, version=version):
+                lease = token
+            elif current is not _missing:
+                # Another process is refreshing early; the current value is still valid.
+                return current
+            else:
+                value = self._wait_for_value(cache, key, version, options)
+                if value is not _missing:
+                    return value
+                logger.debug("Stampede lease on %r not released in time, computing the value", key)
+
+        try:
+            start = time.monotonic()
+            value = default() if callable(default) else default
+            delta = time.monotonic() - start
+
+            if xfetch:
+                assert seconds is not None
+                cache.set_many(
+                    {key: value, f"{key}:xfetch": (delta, time.time() + seconds)},
+                    timeout=timeout,
+                    version=version,
+                )
+            else:
+                cache.set(key, value, timeout=timeout, version=version)
+            return value
+        finally:
+            if lease is not None:
+                # Best effort: the lease expires anyway, and a failed release must not lose the value.
+                try:
+                    self._release_lease(cache, lease_key, lease, version)
+                except Exception:
+                    logger.exception("Failed to release the stampede lease on %r", key)
+
+    @staticmethod
+    def _release_lease(cache: BaseCache, lease_key: str, token: str, version: int | None) -> None:
+        # The lease may have expired while computing and been taken by another process, which keeps it.
+        release = getattr(cache, "_release_lease", None)
+        if release is not None:
+            release(lease_key, token, version=version)
+        elif cache.get(lease_key, version=version) == token:
+            # Without compare-and-delete, another process may still take the lease in between.
+            cache.delete(lease_key, version=version)
+
+    def _wait_for_value(self, cache: BaseCache, key: Any, version: int | None, options: StampedeOptions) -> Any:
+        deadline = time.monotonic() + options.lease_wait
+        while time.monotonic() < deadline:
+            time.sleep(options.poll_interval)
+            value = cache.get(key, _missing, version=version)
+            if value is not _missing:
+                return value
+        return _missing
+
+
+def get_stampede_protection(location: str) -> StampedeProtection:
+    """Return the process-wide stampede protection of a location, shared by the per-thread backends."""
+    with _registry_lock:
+        protection = _registry.get(location)
+        if protection is None:
+            protection = _registry[location] = StampedeProtection()
+        return protection
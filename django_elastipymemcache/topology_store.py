@@ -0,0 +1,191 @@
+"""
+Cross-process topology snapshot
+
+Every worker of a pre-forking server (gunicorn, uWSGI, ...) builds its own client. Without coordination each of
+them asks the configuration endpoint for the cluster on startup and on every discovery interval. A
+``TopologyStore`` persists the last discovered cluster in a small JSON file, keyed by configuration endpoint, so
+that workers start routing from it immediately and a single process at a time talks to the endpoint.
+Pointing the directory at a tmpfs such as ``/dev/shm`` keeps it in shared memory.
+
+The snapshot decides where cache traffic goes, so only files owned by the current user and not writable by
+others are read. By default they live in a per-user directory of the temporary directory, only accessible by
+its owner.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_O_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+
+def _owned(st: os.stat_result, private_mask: int) -> bool:
+    """Whether a file is owned by the current user and has none of the ``private_mask`` permission bits."""
+    getuid = getattr(os, "getuid", None)
+    if getuid is None:  # pragma: no cover - Windows
+        return True
+    return st.st_uid == getuid() and not st.st_mode & private_mask
+
+
+def _default_directory() -> str:
+    getuid = getattr(os, "getuid", None)
+    suffix = "" if getuid is None else f"-{getuid()}"
+    return os.path.join(tempfile.gettempdir(), f"elasticache-topology{suffix}")
+
+
+class TopologySnapshot(NamedTuple):
+    #: ElastiCache cluster config version, ``None`` when unknown
+    version: int | None
+    #: "host:port" node keys
+    nodes: frozenset[str]
+    #: wall clock time of the discovery
+    updated_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+
+class TopologyStore:
+    """JSON snapshot of one cluster's topology, shared by the processes of a host."""
+
+    def __init__(self, configuration_endpoint: str, path: str | None = None, max_age: float = 60.0) -> None:
+        if max_age <= 0:
+            raise ValueError("topology_cache: max_age must be positive.")
+
+        self.configuration_endpoint = configuration_endpoint
+        self.max_age = float(max_age)
+
+        # The default directory is checked to be private; an explicit one is trusted like the settings.
+        self._private_directory = path is None
+        self._directory_checked = False
+        directory = path or _default_directory()
+        name = hashlib.sha1(configuration_endpoint.encode(), usedforsecurity=False).hexdigest()[:16]
+        self.path = os.path.join(directory, f"elasticache-topology-{name}.json")
+        self._lock_path = f"{self.path}.lock"
+        self._lock_fd: int | None = None
+
+        self._cached: TopologySnapshot | None = None
+        self._cached_mtime: int | None = None
+
+    def _check_directory(self) -> bool:
+        """Create the default directory, accessible by its owner only, and check that nobody else owns it."""
+        if self._directory_checked:
+            return True
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            if self._private_directory and not _owned(os.lstat(directory), 0o077):
+                logger.warning("ElastiCache discovery: ignoring %s, not private to the current user", directory)
+                return False
+        except OSError:
+            logger.warning("ElastiCache discovery: unusable topology snapshot directory %s", directory, exc_info=True)
+            return False
+        self._directory_checked = True
+        return True
+
+    def load(self) -> TopologySnapshot | None:
+        """Read the snapshot, or ``None`` when it is missing, unreadable, not ours or for another endpoint."""
+        if self._private_directory and not self._check_directory():
+            return None
+        try:
+            fd = os.open(self.path, os.O_RDONLY | _O_NOFOLLOW)
+        except OSError:
+            return None
+
+        with os.fdopen(fd, "rb") as f:
+            st = os.fstat(fd)
+            # Unchanged since the last read: skip parsing.
+            if st.st_mtime_ns == self._cached_mtime:
+                return self._cached
+            if not _owned(st, 0o022):
+                logger.warning("ElastiCache discovery: ignoring topology snapshot %s not owned by this user", self.path)
+                return None
+            snapshot = self._parse(f)
+        if snapshot is not None:
+            self._cached, self._cached_mtime = snapshot, st.st_mtime_ns
+        return snapshot
+
+    def _parse(self, f: Any) -> TopologySnapshot | None:
+        try:
+            data: dict[str, Any] = json.load(f)
+            if data["endpoint"] != self.configuration_endpoint:
+                return None
+            version = data["version"]
+            snapshot = TopologySnapshot(
+                None if version is None else int(version),
+                frozenset(map(str, data["nodes"])),
+                float(data["updated_at"]),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("ElastiCache discovery: ignoring unreadable topology snapshot %s", self.path, exc_info=True)
+            return None
+        return snapshot
+
+    def load_fresh(self) -> TopologySnapshot | None:
+        snapshot = self.load()
+        if snapshot is None or snapshot.age >= self.max_age:
+            return None
+        return snapshot
+
+    def save(self, version: int | None, nodes: Iterable[str]) -> None:
+        data = {
+            "endpoint": self.configuration_endpoint,
+            "version": version,
+            "nodes": sorted(nodes),
+            "updated_at": time.time(),
+        }
+        if not self._check_directory():
+            return
+        directory = os.path.dirname(self.path)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".elasticache-topology-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f)
+                # Readers see either the previous or the new snapshot, never a partial one.
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            logger.warning("ElastiCache discovery: failed to write topology snapshot %s", self.path, exc_info=True)
+
+    def acquire_refresh(self, blocking: bool = True) -> bool:
+        """Claim the right to query the configuration endpoint.
+
+        Returns ``False`` when ``blocking`` is false and another process holds it. Without ``fcntl`` every
+        process may refresh.
+        """
+        if fcntl is None:
+            return True
+        try:
+            # Never through a symlink planted in a shared directory
+            lock_fd = os.open(self._lock_path, os.O_CREAT | os.O_WRONLY | _O_NOFOLLOW, 0o600)
+        except OSError:
+            return True
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(lock_fd)
+            return False
+        self._lock_fd = lock_fd
+        return True
+
+    def release_refresh(self) -> None:
+        lock_fd, self._lock_fd = self._lock_fd, None
+        if lock_fd is not None:
+            # Closing the file releases the lock.
+            os.close(lock_fd)
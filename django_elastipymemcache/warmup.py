@@ -0,0 +1,94 @@
+"""
+Connection pre-warming
+
+Opens connections to the nodes and checks them with ``version`` before they enter the hash ring, so the
+first requests routed to a new node, or to any node of a freshly started process, do not pay the TCP connect
+(and TLS handshake) latency.
+"""
+
+import logging
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from pymemcache.client import Client, PooledClient
+
+if TYPE_CHECKING:
+    from .cooperative import CooperativeRuntime
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupOptions(NamedTuple):
+    #: connections opened per node, up to ``max_pool_size``; plain clients hold a single connection
+    connections: int = 1
+    #: nodes warmed up concurrently
+    workers: int = 4
+
+    @classmethod
+    def from_option(cls, option: Any) -> "WarmupOptions | None":
+        """Resolve a ``warmup`` option: ``False``/``None`` disables, ``True`` uses the defaults."""
+        if not option:
+            return None
+        if option is True:
+            return cls()
+        return cls(**option)
+
+
+def warm_up_client(client: Client | PooledClient, connections: int = 1) -> None:
+    """Open up to ``connections`` connections of a node client and check each; raises on failure."""
+    if not isinstance(client, PooledClient):
+        client.version()
+        return
+
+    pool = client.client_pool
+    # Hold the connections while checking them, so that the pool opens new ones.
+    held = []
+    try:
+        for _ in range(max(connections, 1)):
+            try:
+                connection = pool.get()
+            except RuntimeError:
+                # max_pool_size reached
+                break
+            try:
+                connection.version()
+            except Exception:
+                pool.destroy(connection)
+                raise
+            held.append(connection)
+    finally:
+        for connection in held:
+            pool.release(connection)
+
+
+def warm_up_clients(
+    clients: Mapping[str, Client | PooledClient],
+    options: WarmupOptions,
+    runtime: "CooperativeRuntime | None" = None,
+) -> set[str]:
+    """Warm up node clients, several at a time; returns the keys of the nodes that failed their check.
+
+    In cooperative mode, the connections belong to the hub of the caller, so they are opened in its greenlets.
+    """
+
+    def warm_up(client_key: str) -> str | None:
+        try:
+            warm_up_client(clients[client_key], options.connections)
+        except Exception:
+            logger.warning("Warm-up of node %s failed", client_key, exc_info=True)
+            return client_key
+        return None
+
+    if runtime is not None:
+        greenlets = [runtime.spawn(warm_up, client_key) for client_key in clients]
+        results = list(map(runtime.wait, greenlets))
+    elif options.workers > 1 and len(clients) > 1:
+        with ThreadPoolExecutor(
+            max_workers=min(options.workers, len(clients)),
+            thread_name_prefix="elasticache-warmup",
+        ) as executor:
+            results = list(executor.map(warm_up, clients))
+    else:
+        results = [warm_up(client_key) for client_key in clients]
+    return {client_key for client_key in results if client_key is not None}
@@ -0,0 +1,278 @@
+"""
+Write-behind queue
+
+Opportunistic writes (filling the cache after a database read, bumping an expiration) do not need their result,
+yet each one waits for a memcached round trip. With the ``write_behind`` option, ``ElastiPymemcache`` puts
+``set``, ``touch`` and ``delete`` commands on a bounded in-process queue instead; background workers drain it
+in batches, each with its own ``AWSElastiCacheClient``, sending consecutive commands of a kind with one
+``noreply`` multi-key command per node.
+
+Commands are sharded to the workers by key, so the commands of a key are written in the order they were
+queued. Writes made synchronously (on ``"sync"`` overflow, and ``add``/``incr`` in the backend) first wait
+for the queued commands of their shard.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_registry: dict[tuple[Any, ...], "WriteBehindQueue"] = {}
+_registry_lock = threading.Lock()
+
+OVERFLOW_POLICIES = ("drop", "block", "sync")
+
+_STOP = object()
+
+
+def _run_key(command: tuple[Any, ...]) -> tuple[str, Any]:
+    """Kind and expiration of a command; deletes have no expiration."""
+    name = command[0]
+    return (name, None) if name == "delete" else (name, command[-1])
+
+
+class WriteBehindQueue:
+    """Bounded queues of write commands, one per worker, shared by the clients of a process.
+
+    Commands are ``("set", key, value, expire)``, ``("touch", key, expire)`` and ``("delete", key)`` tuples
+    of node keys. When ``max_size`` commands are pending, ``overflow`` decides: ``"drop"`` the command,
+    ``"block"`` up to ``block_timeout`` seconds for room then drop it, or write it synchronously (``"sync"``,
+    ``put()`` then returns ``False`` once the commands queued before on the key's shard are written).
+    ``flush()`` waits up to ``flush_timeout`` seconds for the commands queued before it to be written.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        max_size: int = 10000,
+        workers: int = 1,
+        batch_size: int = 100,
+        overflow: str = "drop",
+        block_timeout: float = 0.1,
+        flush_timeout: float = 5.0,
+        flush_on_close: bool = True,
+    ) -> None:
+        if max_size <= 0 or workers <= 0 or batch_size <= 0 or block_timeout < 0 or flush_timeout < 0:
+            raise ValueError(
+                "write_behind: max_size, workers and batch_size must be positive, the timeouts not negative."
+            )
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"write_behind: unknown overflow '{overflow}' (expected one of drop, block, sync).")
+
+        self.client_factory = client_factory
+        self.max_size = int(max_size)
+        self.workers = int(workers)
+        self.batch_size = int(batch_size)
+        self.overflow = overflow
+        self.block_timeout = float(block_timeout)
+        self.flush_timeout = float(flush_timeout)
+        self.flush_on_close = bool(flush_on_close)
+
+        # max_size is split between the shards
+        self._queues: list[queue.Queue[Any]] = [
+            queue.Queue(-(-self.max_size // self.workers)) for _ in range(self.workers)
+        ]
+        # Worker of each shard, None once it exited; a shard never has two, to keep its order
+        self._threads: list[threading.Thread | None] = [None] * self.workers
+        self._lock = threading.Lock()
+        # Commands accepted and commands done (written, failed or dropped by close()) by shard, to flush
+        self._accepted = [0] * self.workers
+        self._done = [0] * self.workers
+        self._done_condition = threading.Condition()
+        self._counters = {"written": 0, "dropped": 0, "synchronous": 0, "errors": 0}
+
+    def _shard(self, key: Any) -> int:
+        return hash(key) % self.workers
+
+    def put(self, command: tuple[Any, ...]) -> bool:
+        """Queue a command; ``False`` when the caller is to write it synchronously."""
+        shard = self._shard(command[1])
+        if self._threads[shard] is None:
+            self._start()
+        try:
+            if self.overflow == "block":
+                self._queues[shard].put(command, timeout=self.block_timeout)
+            else:
+                self._queues[shard].put_nowait(command)
+        except queue.Full:
+            if self.overflow == "sync":
+                self._count("synchronous")
+                # Written after the commands of the key already queued
+                self.wait_for(command[1])
+                return False
+            self._count("dropped")
+            return True
+
+        with self._lock:
+            self._accepted[shard] += 1
+            # The worker may have stopped after the check above, without seeing the command.
+            stopped = self._threads[shard] is None
+        if stopped:
+            self._start()
+        return True
+
+    def wait_for(self, key: Any, timeout: float | None = None) -> bool:
+        """Wait for the commands queued so far on the shard of ``key``, before writing it synchronously."""
+        shard = self._shard(key)
+        with self._lock:
+            target = self._accepted[shard]
+        return self._wait({shard: target}, self.flush_timeout if timeout is None else timeout)
+
+    def _wait(self, targets: dict[int, int], timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._done_condition:
+            while any(self._done[shard] < target for shard, target in targets.items()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._done_condition.wait(remaining)
+        return True
+
+    def _start(self) -> None:
+        with self._lock:
+            for index, running in enumerate(self._threads):
+                if running is None:
+                    thread = threading.Thread(
+                        target=self._run, args=(index,), name=f"elasticache-write-behind-{index}", daemon=True
+                    )
+                    thread.start()
+                    self._threads[index] = thread
+
+    def _count(self, counter: str, count: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += count
+
+    def _run(self, shard: int) -> None:
+        commands = self._queues[shard]
+        client = None
+        while True:
+            batch = [commands.get()]
+            while batch[-1] is not _STOP and len(batch) < self.batch_size:
+                try:
+                    batch.append(commands.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+
+            if batch:
+                try:
+                    if client is None:
+                        client = self.client_factory()
+                    self._write(client, batch)
+                    self._count("written", len(batch))
+                except Exception:
+                    self._count("errors", len(batch))
+                    logger.warning("Write-behind: failed to write %d commands", len(batch), exc_info=True)
+                with self._done_condition:
+                    self._done[shard] += len(batch)
+                    self._done_condition.notify_all()
+
+            if stop:
+                with self._lock:
+                    # Commands queued after the stop keep the worker running; otherwise put() starts a new one.
+                    stop = commands.empty()
+                    if stop:
+                        self._threads[shard] = None
+                if stop:
+                    if client is not None:
+                        client.close()
+                    return
+
+    @staticmethod
+    def _write(client: Any, batch: list[tuple[Any, ...]]) -> None:
+        """Send a batch in order, each run of commands of a kind (and expiration) as one multi-key command."""
+        run: list[tuple[Any, ...]] = []
+        for command in batch:
+            if run and _run_key(command) != _run_key(run[0]):
+                WriteBehindQueue._write_run(client, run)
+                run = []
+            run.append(command)
+        if run:
+            WriteBehindQueue._write_run(client, run)
+
+    @staticmethod
+    def _write_run(client: Any, run: list[tuple[Any, ...]]) -> None:
+        name = run[0][0]
+        if name == "set":
+            client.set_many({key: value for _, key, value, _ in run}, run[0][-1], noreply=True)
+        elif name == "delete":
+            client.delete_many([key for _, key in run], noreply=True)
+        else:
+            for _, key, expire in run:
+                client.touch(key, expire, noreply=True)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait for the commands queued so far to be written; returns whether they were within the timeout."""
+        with self._lock:
+            targets = dict(enumerate(self._accepted))
+        return self._wait(targets, self.flush_timeout if timeout is None else timeout)
+
+    def close(self, timeout: float | None = None) -> bool:
+        """Flush unless ``flush_on_close`` is false, then stop the workers, e.g. at exit.
+
+        Never blocks on a full queue: the commands a stuck worker left there are dropped to make room for its
+        stop. The workers are started again by the next ``put()``.
+        """
+        timeout = self.flush_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        flushed = self.flush(timeout) if self.flush_on_close else True
+        with self._lock:
+            threads = [(shard, thread) for shard, thread in enumerate(self._threads) if thread is not None]
+        for shard, _ in threads:
+            self._stop(shard)
+        if self.flush_on_close:
+            for _, thread in threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+        return flushed
+
+    def _stop(self, shard: int) -> None:
+        commands = self._queues[shard]
+        dropped = 0
+        while True:
+            try:
+                commands.put_nowait(_STOP)
+                break
+            except queue.Full:
+                try:
+                    if commands.get_nowait() is not _STOP:
+                        dropped += 1
+                except queue.Empty:
+                    pass
+        if dropped:
+            self._count("dropped", dropped)
+            logger.warning("Write-behind: dropped %d pending commands on close", dropped)
+            with self._done_condition:
+                self._done[shard] += dropped
+                self._done_condition.notify_all()
+
+    def stats(self) -> dict[str, int]:
+        """Queue depth and counters of written, dropped, synchronously written and failed commands."""
+        with self._lock:
+            return {"depth": sum(commands.qsize() for commands in self._queues), **self._counters}
+
+
+def get_write_behind_queue(
+    location: str,
+    options: dict[str, Any],
+    client_factory: Callable[[], Any],
+) -> WriteBehindQueue:
+    """Return the process-wide queue for a location and configuration.
+
+    Django creates one client per thread, so the queue and its workers are shared by every thread; the first
+    caller's ``client_factory`` creates the clients of the workers.
+    """
+    registry_key = (location, *sorted(options.items()))
+    with _registry_lock:
+        write_behind = _registry.get(registry_key)
+        if write_behind is None:
+            write_behind = _registry[registry_key] = WriteBehindQueue(client_factory, **options)
+            # The workers are daemon threads, so the pending commands are written before the process exits.
+            atexit.register(write_behind.close)
+        return write_behind
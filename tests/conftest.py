@@ -1,3 +1,4 @@
+import asyncio
 import collections
 import socket
 
@@ -84,3 +85,92 @@ class FakeSocketModule:
         proto = proto or socket.IPPROTO_TCP
         sockaddr = ("127.0.0.1", port)
         return [(family, type, proto, "", sockaddr)]
+
+
+class FakeMemcachedServer:
+    """In-memory memcached text protocol server on localhost for asyncio tests."""
+
+    def __init__(
+        self,
+        cluster: list[tuple[str, int]] | None = None,
+    ) -> None:
+        self.data: dict[bytes, tuple[int, bytes]] = {}
+        self.cluster = cluster or []
+        self.commands: list[bytes] = []
+        self.server: tuple[str, int] = ("127.0.0.1", 0)
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> tuple[str, int]:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.server = (host, port)
+        return self.server
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _config_get_cluster(self) -> bytes:
+        body = " ".join(f"node{i}.cache.amazonaws.com|{host}|{port}" for i, (host, port) in enumerate(self.cluster))
+        payload = f"1\n{body}\n".encode()
+        return b"CONFIG cluster 0 %d\r\n%s\r\nEND\r\n" % (len(payload), payload)
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            while True:
+                line = (await reader.readuntil(b"\r\n"))[:-2]
+                self.commands.append(line)
+                name, *args = line.split()
+                noreply = bool(args) and args[-1] == b"noreply"
+                if noreply:
+                    args = args[:-1]
+
+                if line == b"config get cluster":
+                    response = self._config_get_cluster()
+                elif name in (b"get", b"gets"):
+                    response = b""
+                    for key in args:
+                        if key in self.data:
+                            flags, value = self.data[key]
+                            cas = b" 1" if name == b"gets" else b""
+                            response += b"VALUE %s %d %d%s\r\n%s\r\n" % (key, flags, len(value), cas, value)
+                    response += b"END\r\n"
+                elif name in (b"set", b"add"):
+                    key, raw_flags, _, size = args
+                    value = (await reader.readexactly(int(size) + 2))[:-2]
+                    if name == b"add" and key in self.data:
+                        response = b"NOT_STORED\r\n"
+                    else:
+                        self.data[key] = (int(raw_flags), value)
+                        response = b"STORED\r\n"
+                elif name == b"delete":
+                    response = b"DELETED\r\n" if self.data.pop(args[0], None) else b"NOT_FOUND\r\n"
+                elif name in (b"incr", b"decr"):
+                    key, delta = args
+                    if key not in self.data:
+                        response = b"NOT_FOUND\r\n"
+                    else:
+                        flags, value = self.data[key]
+                        number = int(value) + int(delta) if name == b"incr" else max(int(value) - int(delta), 0)
+                        self.data[key] = (flags, b"%d" % number)
+                        response = b"%d\r\n" % number
+                elif name == b"touch":
+                    response = b"TOUCHED\r\n" if args[0] in self.data else b"NOT_FOUND\r\n"
+                elif name == b"flush_all":
+                    self.data.clear()
+                    response = b"OK\r\n"
+                else:
+                    response = b"ERROR\r\n"
+
+                if not noreply:
+                    writer.write(response)
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,151 @@
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+from pymemcache.serde import pickle_serde
+from pytest import MonkeyPatch
+
+from django_elastipymemcache.async_client import AsyncAWSElastiCacheClient
+
+from .conftest import FakeMemcachedServer
+
+
+def make_client(**options: Any) -> AsyncAWSElastiCacheClient:
+    return AsyncAWSElastiCacheClient(
+        "test.0000.use1.cache.amazonaws.com:11211",
+        serde=pickle_serde,
+        default_noreply=False,
+        **options,
+    )
+
+
+def mock_discovery(monkeypatch: MonkeyPatch, nodes: list[tuple[str, int]]) -> AsyncMock:
+    mock_config_get = AsyncMock(return_value=list(nodes))
+    monkeypatch.setattr(
+        "django_elastipymemcache.async_client._AsyncConfigurationEndpointClient.async_config_get_cluster",
+        mock_config_get,
+    )
+    return mock_config_get
+
+
+def test_discovery_over_configuration_endpoint() -> None:
+    async def run() -> None:
+        node = FakeMemcachedServer()
+        await node.start()
+        endpoint = FakeMemcachedServer(cluster=[node.server])
+        host, port = await endpoint.start()
+
+        client = AsyncAWSElastiCacheClient(f"[{host}]:{port}")
+        try:
+            assert await client.set("key", b"value") is True
+            assert await client.get("key") == b"value"
+            assert set(client.clients) == {"%s:%s" % node.server}
+            assert endpoint.commands == [b"config get cluster"]
+        finally:
+            await client.close()
+            await endpoint.stop()
+            await node.stop()
+
+    asyncio.run(run())
+
+
+def test_basic_operations_route_like_sync_client(monkeypatch: MonkeyPatch) -> None:
+    async def run() -> None:
+        nodes = [FakeMemcachedServer(), FakeMemcachedServer()]
+        servers = [await node.start() for node in nodes]
+        mock_discovery(monkeypatch, servers)
+
+        client = make_client()
+        try:
+            values = {f"key{i}": {"value": i} for i in range(20)}
+            assert await client.set_many(values, expire=60) == []
+            assert await client.get_many(list(values) + ["missing"]) == values
+            assert await client.get("missing", "default") == "default"
+
+            for node, (host, port) in zip(nodes, servers):
+                routed = {key for key in values if client.hasher.get_node(key) == f"{host}:{port}"}
+                assert {key.decode() for key in node.data} == routed
+
+            assert await client.add("key0", "other") is False
+            assert await client.add("counter", 1) is True
+            assert await client.incr("counter", 5) == 6
+            assert await client.decr("counter", 2) == 4
+            assert await client.incr("missing", 1) is None
+            assert await client.touch("key1", 10) is True
+            assert await client.delete("key1") is True
+            assert await client.delete("key1") is False
+
+            await client.delete_many(list(values))
+            assert await client.get_many(list(values)) == {}
+
+            await client.flush_all()
+            assert all(not node.data for node in nodes)
+        finally:
+            await client.close()
+            for node in nodes:
+                await node.stop()
+
+    asyncio.run(run())
+
+
+def test_initial_discovery_runs_once_for_concurrent_callers(monkeypatch: MonkeyPatch) -> None:
+    async def run() -> None:
+        node = FakeMemcachedServer()
+        mock_config_get = mock_discovery(monkeypatch, [await node.start()])
+
+        client = make_client()
+        try:
+            await asyncio.gather(*(client.get(f"key{i}") for i in range(10)))
+            assert mock_config_get.await_count == 1
+        finally:
+            await client.close()
+            await node.stop()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("ignore_exc", [True, False])
+def test_get_many_partial_failure_respects_ignore_exc(monkeypatch: MonkeyPatch, ignore_exc: bool) -> None:
+    async def run() -> None:
+        node = FakeMemcachedServer()
+        live = await node.start()
+        down = FakeMemcachedServer()
+        dead = await down.start()
+        await down.stop()
+        mock_discovery(monkeypatch, [live, dead])
+
+        client = make_client(ignore_exc=ignore_exc)
+        try:
+            keys = [f"key{i}" for i in range(20)]
+            if ignore_exc:
+                await client.set_many(dict.fromkeys(keys, "value"))
+                live_keys = [key for key in keys if client.hasher.get_node(key) == "%s:%s" % live]
+                assert await client.get_many(keys) == dict.fromkeys(live_keys, "value")
+                assert "%s:%s" % dead in client._failed_clients
+            else:
+                with pytest.raises(OSError):
+                    await client.get_many(keys)
+        finally:
+            await client.close()
+            await node.stop()
+
+    asyncio.run(run())
+
+
+def test_failed_discovery_keeps_current_topology(monkeypatch: MonkeyPatch) -> None:
+    async def run() -> None:
+        mock_discovery(monkeypatch, [("10.0.0.1", 11211)])
+        client = make_client()
+        await client._ensure_started()
+
+        monkeypatch.setattr(
+            "django_elastipymemcache.async_client._AsyncConfigurationEndpointClient.async_config_get_cluster",
+            AsyncMock(side_effect=OSError("boom")),
+        )
+        await client._refresh_clients(force=True)
+
+        assert set(client.clients) == {"10.0.0.1:11211"}
+        await client.close()
+
+    asyncio.run(run())
@@ -1,9 +1,11 @@
+import threading
 import time
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 from unittest.mock import Mock
 
 import pytest
 from pymemcache.client import Client, PooledClient
+from pymemcache.exceptions import MemcacheError
 from pytest import MonkeyPatch
 
 from django_elastipymemcache.client import AWSElastiCacheClient
@@ -106,3 +108,325 @@ def test_get_client_triggers_retry_refresh_when_ring_empty(
     data_node = client._get_client("test")
 
     assert isinstance(data_node, (Client, PooledClient))
+
+
+def test_failed_discovery_keeps_current_topology(
+    monkeypatch: MonkeyPatch,
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    client = make_client(discovery_interval=0.0)
+
+    monkeypatch.setattr(
+        "django_elastipymemcache.client._ConfigurationEndpointClient.config_get_cluster",
+        Mock(side_effect=MemcacheError("boom")),
+    )
+    client._refresh_clients(force=True)
+
+    assert set(client.clients.keys()) == {"10.0.0.1:11211", "10.0.0.2:11211"}
+
+
+def test_background_discovery_refreshes_out_of_band(
+    monkeypatch: MonkeyPatch,
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211)])
+    client = make_client(discovery_interval=0.05, background_discovery=True)
+    try:
+        assert client._discovery_thread is not None
+        assert client._discovery_thread.is_alive()
+
+        mock_refresh = Mock(wraps=client._refresh_clients)
+        monkeypatch.setattr(client, "_refresh_clients", mock_refresh)
+        mock_discovery([("10.0.0.2", 11211)])
+
+        deadline = time.monotonic() + 5.0
+        while set(client.clients.keys()) != {"10.0.0.2:11211"} and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert set(client.clients.keys()) == {"10.0.0.2:11211"}
+        assert all(call.kwargs == {"force": True} for call in mock_refresh.call_args_list)
+    finally:
+        client.close()
+
+    assert client._discovery_thread is None
+
+
+def test_background_discovery_skips_refresh_on_key_routing(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211)])
+    client = make_client(discovery_interval=3600.0, background_discovery=True)
+    try:
+        mock_discovery([("10.0.0.2", 11211)])
+        client._last_discovery_time = 0.0
+
+        client._get_client("test")
+
+        assert set(client.clients.keys()) == {"10.0.0.1:11211"}
+    finally:
+        client.close()
+
+
+def _patch_node_get_many(
+    client: AWSElastiCacheClient, get_many: Callable[[tuple[str, int], list[str]], dict[str, Any]]
+) -> None:
+    for node in client.clients.values():
+        node.get_many = lambda keys, *args, _server=node.server, **kwargs: get_many(_server, keys)
+
+
+def test_multi_node_workers_fan_out_get_many_concurrently(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211), ("10.0.0.3", 11211)])
+    client = make_client(multi_node_workers=4)
+    barrier = threading.Barrier(3, timeout=5.0)
+
+    def get_many(server: tuple[str, int], keys: list[str]) -> dict[str, Any]:
+        # Only passes when the batches of all three nodes are in flight at once.
+        barrier.wait()
+        return dict.fromkeys(keys, server)
+
+    _patch_node_get_many(client, get_many)
+    keys = [f"key{i}" for i in range(60)]
+    try:
+        result = client.get_many(keys)
+    finally:
+        client.close()
+
+    assert set(result) == set(keys)
+    assert set(result.values()) == {("10.0.0.1", 11211), ("10.0.0.2", 11211), ("10.0.0.3", 11211)}
+
+
+@pytest.mark.parametrize("multi_node_workers", [0, 4])
+def test_get_many_partial_failure_respects_ignore_exc(
+    multi_node_workers: int,
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    failing = ("10.0.0.1", 11211)
+
+    def get_many(server: tuple[str, int], keys: list[str]) -> dict[str, Any]:
+        if server == failing:
+            raise OSError("boom")
+        return dict.fromkeys(keys, "value")
+
+    keys = [f"key{i}" for i in range(40)]
+
+    client = make_client(multi_node_workers=multi_node_workers, ignore_exc=True)
+    _patch_node_get_many(client, get_many)
+    result = client.get_many(keys)
+    assert result
+    assert all(client.clients[client.hasher.get_node(key)].server != failing for key in result)
+    assert failing in client._failed_clients
+    client.close()
+
+    client = make_client(multi_node_workers=multi_node_workers, ignore_exc=False)
+    _patch_node_get_many(client, get_many)
+    with pytest.raises(OSError):
+        client.get_many(keys)
+    client.close()
+
+
+def test_delete_many_batches_per_node(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    client = make_client(multi_node_workers=2)
+    for node in client.clients.values():
+        node.delete_many = Mock(return_value=True)
+        node.delete = Mock(return_value=True)
+
+    keys = [f"key{i}" for i in range(20)]
+    assert client.delete_multi(keys) is True
+    client.close()
+
+    deleted = [
+        key for node in client.clients.values() for call in node.delete_many.call_args_list for key in call.args[0]
+    ]
+    assert sorted(deleted) == sorted(keys)
+    assert all(node.delete_many.call_count == 1 for node in client.clients.values())
+    assert all(not node.delete.called for node in client.clients.values())
+
+
+def test_refresh_publishes_new_topology_snapshot(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    client = make_client()
+    before = client._topology
+
+    mock_discovery([("10.0.0.2", 11211), ("10.0.0.3", 11211)])
+    client._refresh_clients(force=True)
+
+    assert client._topology is not before
+    assert set(before.clients) == {"10.0.0.1:11211", "10.0.0.2:11211"}
+    assert before.nodes == {"10.0.0.1:11211", "10.0.0.2:11211"}
+    assert set(client.clients) == {"10.0.0.2:11211", "10.0.0.3:11211"}
+    assert client.clients["10.0.0.2:11211"] is before.clients["10.0.0.2:11211"]
+    assert {client.hasher.get_node(f"key{i}") for i in range(50)} == {"10.0.0.2:11211", "10.0.0.3:11211"}
+
+
+def test_refresh_keeps_failures_recorded_during_it(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    client = make_client()
+    failed_clients = client._failed_clients
+    dead_clients = client._dead_clients
+    failed_clients[("10.0.0.1", 11211)] = {"attempts": 1, "failed_time": 0.0}
+    dead_clients[("10.0.0.1", 11211)] = 0.0
+
+    mock_discovery([("10.0.0.2", 11211), ("10.0.0.3", 11211)])
+    client._refresh_clients(force=True)
+
+    # Pruned in place, so that a failure recorded by a concurrent command is not lost.
+    assert client._failed_clients is failed_clients
+    assert client._dead_clients is dead_clients
+    assert not failed_clients
+    assert not dead_clients
+
+
+def test_dead_node_leaves_ring_until_revived(
+    monkeypatch: MonkeyPatch,
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    client = make_client(dead_timeout=60)
+    before = client._topology
+    dead_client = client.clients["10.0.0.1:11211"]
+
+    client.remove_server("10.0.0.1", 11211)
+
+    assert before.nodes == {"10.0.0.1:11211", "10.0.0.2:11211"}
+    assert client._topology.nodes == {"10.0.0.2:11211"}
+    assert client.clients["10.0.0.1:11211"] is dead_client
+    assert all(client._get_client(f"key{i}") is client.clients["10.0.0.2:11211"] for i in range(20))
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", Mock(return_value=now + 120))
+    client._retry_dead()
+
+    assert client._topology.nodes == {"10.0.0.1:11211", "10.0.0.2:11211"}
+    assert client.clients["10.0.0.1:11211"] is dead_client
+    assert not client._dead_clients
+
+
+def test_get_many_routes_batch_against_one_snapshot(
+    monkeypatch: MonkeyPatch,
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    client = make_client()
+    topology = client._topology
+    routed = []
+
+    def route_many(snapshot: Any, keys: list[str]) -> Any:
+        routed.append(snapshot)
+        # A concurrent refresh must not change the snapshot used by the rest of the batch.
+        mock_discovery([("10.0.0.3", 11211)])
+        client._refresh_clients(force=True)
+        return [snapshot.clients[snapshot.hasher.get_node(key)] for key in keys]
+
+    monkeypatch.setattr(client, "_route_many", route_many)
+    for node in topology.clients.values():
+        monkeypatch.setattr(node, "get_many", Mock(return_value={}))
+
+    client.get_many([f"key{i}" for i in range(10)])
+
+    assert all(snapshot is topology for snapshot in routed)
+    assert set(client.clients) == {"10.0.0.3:11211"}
+
+
+def test_unchanged_config_version_skips_topology_work(monkeypatch: MonkeyPatch) -> None:
+    responses = {
+        1: b"CONFIG cluster 0 1\r\n1\n10.0.0.1|10.0.0.1|11211\n\r\nEND\r\n",
+        2: b"CONFIG cluster 0 1\r\n2\n10.0.0.1|10.0.0.1|11211 10.0.0.2|10.0.0.2|11211\n\r\nEND\r\n",
+    }
+    version = 1
+    monkeypatch.setattr(
+        "django_elastipymemcache.client._ConfigurationEndpointClient._raw_config_get_cluster",
+        lambda self, client: responses[version],
+    )
+    monkeypatch.setattr(time, "time", Mock(return_value=1000.0))
+
+    client = make_client()
+    assert client.config_version == 1
+    assert client.topology_changed_at == 1000.0
+    topology = client._topology
+
+    apply_client_keys = Mock(wraps=client._apply_client_keys)
+    monkeypatch.setattr(client, "_apply_client_keys", apply_client_keys)
+    time.time.return_value = 2000.0  # type: ignore[attr-defined]
+    for _ in range(3):
+        client._refresh_clients(force=True)
+
+    assert not apply_client_keys.called
+    assert client._topology is topology
+    assert client.topology_changed_at == 1000.0
+
+    version = 2
+    client._refresh_clients(force=True)
+
+    assert apply_client_keys.call_count == 1
+    assert client.config_version == 2
+    assert client.topology_changed_at == 2000.0
+    assert set(client.clients) == {"10.0.0.1:11211", "10.0.0.2:11211"}
+
+
+def test_get_topology_fast_path_skips_refresh_when_not_due(
+    monkeypatch: MonkeyPatch,
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    now = time.monotonic()
+    mock_monotonic = Mock(return_value=now)
+    monkeypatch.setattr(time, "monotonic", mock_monotonic)
+    client = make_client(discovery_interval=10.0)
+    refresh = Mock(wraps=client._refresh_topology)
+    monkeypatch.setattr(client, "_refresh_topology", refresh)
+
+    assert client._get_topology() is client._topology
+    refresh.assert_not_called()
+
+    mock_monotonic.return_value = now + 20.0
+    mock_discovery([("10.0.0.3", 11211)])
+    assert client._get_topology().nodes == {"10.0.0.3:11211"}
+    refresh.assert_called_once()
+
+
+def test_route_cache_is_bounded_and_follows_the_topology(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    client, reference = make_client(route_cache=8), make_client()
+    keys = [f"key{i}" for i in range(20)]
+
+    def servers(routed: Iterable[Any]) -> list[Any]:
+        return [node_client.server for node_client in routed]
+
+    topology = client._get_topology()
+    assert servers(client._route_many(topology, keys)) == servers(reference._route_many(reference._topology, keys))
+    assert servers(client._route(topology, key) for key in keys) == servers(
+        reference._route(reference._topology, key) for key in keys
+    )
+    assert topology.routes is not None and 0 < len(topology.routes) <= 8
+    assert reference._topology.routes is None
+
+    mock_discovery([("10.0.0.3", 11211)])
+    client._refresh_clients(force=True)
+    assert client._topology.routes == {}
+    assert set(servers(client._route_many(client._topology, keys))) == {("10.0.0.3", 11211)}
+
+
+def test_trusted_keys_are_only_encoded(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211)])
+    client = make_client(trusted_keys=True, key_prefix=b"p:")
+    node_client = client._get_client("a key")
+    assert node_client is not None
+    assert node_client.check_key("a key", b"p:") == b"p:a key"
+
+    with pytest.raises(MemcacheError):
+        make_client(key_prefix=b"p:")._get_client("a key")
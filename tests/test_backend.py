@@ -1,12 +1,17 @@
+import asyncio
 from typing import Callable
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from django.core.cache import InvalidCacheBackendError
+from django.core.cache.backends.base import InvalidCacheKey
+from django.core.exceptions import ImproperlyConfigured
 from pytest import MonkeyPatch
 
 from django_elastipymemcache.backend import ElastiPymemcache
 
+from .conftest import FakeMemcachedServer
+
 
 @pytest.fixture
 def mock_discovery(monkeypatch: MonkeyPatch) -> Callable[[list[tuple[str, int]]], None]:
@@ -90,3 +95,184 @@ def test_failed_to_connect_servers(monkeypatch: MonkeyPatch) -> None:
 
     client = backend._cache._get_client("test")
     assert client is not None
+
+
+@pytest.mark.parametrize("option", ["chunking", "hot_keys", "handoff", "write_behind"])
+def test_native_async_refuses_blocking_client_options(option: str) -> None:
+    with pytest.raises(ImproperlyConfigured):
+        ElastiPymemcache("test.0000.use1.cache.amazonaws.com:11211", {"OPTIONS": {"native_async": True, option: True}})
+
+
+def test_native_async_methods(monkeypatch: MonkeyPatch) -> None:
+    async def run() -> None:
+        node = FakeMemcachedServer()
+        server = await node.start()
+        monkeypatch.setattr(
+            "django_elastipymemcache.async_client._AsyncConfigurationEndpointClient.async_config_get_cluster",
+            AsyncMock(return_value=[server]),
+        )
+
+        backend = ElastiPymemcache("test.0000.use1.cache.amazonaws.com:11211", {"OPTIONS": {"native_async": True}})
+        try:
+            await backend.aset("key", {"a": 1})
+            assert await backend.aget("key") == {"a": 1}
+            assert await backend.aadd("key", "other") is False
+            assert await backend.aset_many({"k1": 1, "k2": 2}) == []
+            assert await backend.aget_many(["k1", "k2", "k3"]) == {"k1": 1, "k2": 2}
+            assert await backend.aincr("k1", 10) == 11
+            assert await backend.aincr("k1", -1) == 10
+            assert await backend.atouch("k1") is True
+            assert await backend.adelete("key") is True
+            await backend.adelete_many(["k1", "k2"])
+            assert await backend.aget_or_set("key", "computed") == "computed"
+            assert await backend.ahas_key("key") is True
+            await backend.aclear()
+            assert not node.data
+        finally:
+            await backend.aclose()
+            await node.stop()
+
+        assert not backend._async_caches
+        assert "_cache" not in backend.__dict__
+
+    asyncio.run(run())
+
+
+def test_async_methods_fall_back_to_sync_client_by_default() -> None:
+    with patch("django_elastipymemcache.backend.AWSElastiCacheClient") as MockClient:
+        mock_client = Mock()
+        mock_client.get.return_value = "val"
+        MockClient.return_value = mock_client
+
+        backend = ElastiPymemcache("test.0000.use1.cache.amazonaws.com:11211", {})
+
+        assert asyncio.run(backend.aget("key1")) == "val"
+        assert mock_client.get.call_count == 1
+
+
+def test_near_cache_serves_hot_keys_locally(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211)])
+    params = {"OPTIONS": {"near_cache": {"max_entries": 10, "ttl": 60, "key_prefixes": ["flags:"]}}}
+
+    with patch("django_elastipymemcache.backend.AWSElastiCacheClient") as MockClient:
+        mock_client = Mock()
+        mock_client.get_multi.side_effect = lambda keys: {key: "on" for key in keys}
+        MockClient.return_value = mock_client
+
+        backend = ElastiPymemcache("near.0000.use1.cache.amazonaws.com:11211", params)
+        assert backend.near_cache is not None
+
+        assert backend.get("flags:beta") == "on"
+        assert backend.get("flags:beta") == "on"
+        assert backend.get_many(["flags:beta"]) == {"flags:beta": "on"}
+        assert mock_client.get_multi.call_count == 1
+
+        backend.get("user:1")
+        assert mock_client.get.call_count == 1
+
+        # Another thread's backend shares the near cache, and local writes invalidate it.
+        other = ElastiPymemcache("near.0000.use1.cache.amazonaws.com:11211", params)
+        assert other.near_cache is backend.near_cache
+        other.set("flags:beta", "off")
+        backend.get("flags:beta")
+        assert mock_client.get_multi.call_count == 2
+
+        backend.delete("flags:beta")
+        backend.get("flags:beta")
+        assert mock_client.get_multi.call_count == 3
+
+        stats = backend.near_cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 3
+
+
+def test_compression_option_wraps_serde(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211)])
+    params = {"OPTIONS": {"compression": {"threshold": 100, "codec": "zlib"}, "near_cache": {"ttl": 1}}}
+    backend = ElastiPymemcache("compress.0000.use1.cache.amazonaws.com:11211", params)
+
+    assert backend.compression is not None
+    assert backend._cache.default_kwargs["serde"] is backend.compression
+    assert backend.near_cache is not None
+    assert backend.near_cache.serde is backend.compression.serde
+    assert ElastiPymemcache("compress.0000.use1.cache.amazonaws.com:11211", params).compression is backend.compression
+
+
+def test_get_or_set_stampede_option(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211)])
+    params = {"OPTIONS": {"stampede": {"lease_timeout": 3}}}
+
+    with patch("django_elastipymemcache.backend.AWSElastiCacheClient") as MockClient:
+        mock_client = Mock()
+        mock_client.get.side_effect = lambda key, default=None: default
+        mock_client.add.return_value = True
+        mock_client.gets.side_effect = lambda key: (mock_client.add.call_args.args[1], 1)
+        MockClient.return_value = mock_client
+
+        backend = ElastiPymemcache("stampede.0000.use1.cache.amazonaws.com:11211", params)
+        assert backend.stampede is not None
+        assert "stampede" not in backend._options  # type: ignore[attr-defined]
+
+        assert backend.get_or_set("key", "value") == "value"
+        lease_key, token, expire = mock_client.add.call_args.args
+        assert lease_key.endswith("key:lease")
+        assert expire == 3
+        mock_client.cas.assert_called_once_with(lease_key, token, 1, expire=-1, noreply=False)
+
+        # Disabled per call, it behaves like Django's get_or_set.
+        mock_client.add.reset_mock()
+        assert backend.get_or_set("other", "value", stampede=False) == "value"
+        assert not mock_client.add.call_args.args[0].endswith(":lease")
+
+
+def test_trusted_keys_skip_validation_and_map_results_back(
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211)])
+    params = {"KEY_PREFIX": "app", "VERSION": 2, "OPTIONS": {"trusted_keys": {"validate": False}}}
+
+    with patch("django_elastipymemcache.backend.AWSElastiCacheClient") as MockClient:
+        mock_client = Mock()
+        mock_client.get_multi.side_effect = lambda keys: {key: key.upper() for key in keys[::2]}
+        mock_client.set_multi.side_effect = lambda data, expire: list(data)[:1]
+        MockClient.return_value = mock_client
+
+        backend = ElastiPymemcache("trusted.0000.use1.cache.amazonaws.com:11211", params)
+        assert backend.make_key("key") == "app:2:key"
+        assert backend.make_key(7, version=3) == "app:3:7"
+        # Not validated: memcached would refuse it, but the caller vouches for its keys.
+        assert backend.make_and_validate_key("a key") == "app:2:a key"
+
+        assert backend.get_many(["a", "b", "c"]) == {"a": "APP:2:A", "c": "APP:2:C"}
+        mock_client.get_multi.assert_called_once_with(["app:2:a", "app:2:b", "app:2:c"])
+        assert MockClient.call_args.kwargs["trusted_keys"] == {"validate": False}
+
+        assert backend.set_many({"a": 1, "b": 2}, version=5) == ["a"]
+        assert mock_client.set_multi.call_args.args[0] == {"app:5:a": 1, "app:5:b": 2}
+
+        backend.delete_many(["a", "b"])
+        mock_client.delete_multi.assert_called_once_with(["app:2:a", "app:2:b"])
+
+
+def test_trusted_keys_validate_in_debug(
+    monkeypatch: MonkeyPatch,
+    mock_discovery: Callable[[list[tuple[str, int]]], None],
+) -> None:
+    mock_discovery([("10.0.0.1", 11211)])
+    params = {"KEY_FUNCTION": lambda key, prefix, version: f"custom:{key}", "OPTIONS": {"trusted_keys": True}}
+
+    monkeypatch.setattr("django.conf.settings.DEBUG", True)
+    backend = ElastiPymemcache("trusted.0000.use1.cache.amazonaws.com:11211", params)
+    assert backend.make_key("key") == "custom:key"
+    with pytest.raises(InvalidCacheKey):
+        backend.make_and_validate_key("a key")
+
+    monkeypatch.setattr("django.conf.settings.DEBUG", False)
+    backend = ElastiPymemcache("trusted.0000.use1.cache.amazonaws.com:11211", params)
+    assert backend.make_and_validate_key("a key") == "custom:a key"
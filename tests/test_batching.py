@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.backend import ElastiPymemcache
+from django_elastipymemcache.batching import _scope, batching
+from django_elastipymemcache.middleware import BatchingMiddleware
+
+
+@pytest.fixture
+def cluster() -> Any:
+    with LocalCluster(nodes=1) as cluster:
+        yield cluster
+
+
+def test_batching_coalesces_and_dedupes_reads(cluster: LocalCluster) -> None:
+    backend = ElastiPymemcache(cluster.configuration_endpoint, {})
+    backend.set_many({"a": 1, "b": 2, "c": 3})
+    node = cluster.nodes[0]
+
+    with backend.batch():
+        loader = backend._batch_loader()
+        assert loader is not None
+        first, second, again, missing = (backend.get_deferred(key, "default") for key in ("a", "b", "a", "x"))
+
+        commands = node.commands
+        assert first.value == 1
+        assert node.commands == commands + 1
+        assert (second.value, again.value, missing.value) == (2, 1, "default")
+        assert backend.get("a") == 1
+        assert loader.batches == 1
+
+        # A read of a new key loads it, and dedupes the keys already loaded.
+        assert backend.get_many(["a", "c"]) == {"a": 1, "c": 3}
+        assert loader.batches == 2
+
+        # Writes through the cache drop the keys from the scope.
+        backend.set("a", 10)
+        assert backend.get("a") == 10
+        assert loader.batches == 3
+
+        with batching():
+            assert backend._batch_loader() is loader
+
+    assert backend._batch_loader() is None
+    assert backend.get_deferred("b").value == 2
+    backend.close()
+
+
+def test_batched_reads_get_their_own_copy(cluster: LocalCluster) -> None:
+    backend = ElastiPymemcache(cluster.configuration_endpoint, {})
+    backend.set("a", {"items": [1]})
+
+    with backend.batch():
+        first = backend.get("a")
+        first["items"].append(2)
+        assert backend.get("a") == {"items": [1]}
+        assert backend.get_deferred("a").value == {"items": [1]}
+    backend.close()
+
+
+def test_batching_middleware() -> None:
+    def view(request: Any) -> Any:
+        return _scope.get()
+
+    assert BatchingMiddleware(view)(None) == {}
+
+    async def async_view(request: Any) -> Any:
+        return _scope.get()
+
+    middleware = BatchingMiddleware(async_view)
+    assert asyncio.run(middleware(None)) == {}
+    assert _scope.get() is None
@@ -0,0 +1,114 @@
+import pytest
+
+from benchmarks import bench_client, bench_routing, churn
+from benchmarks.common import percentile, summarize
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.client import AWSElastiCacheClient
+
+
+def test_local_cluster_serves_discovery_and_commands() -> None:
+    with LocalCluster(nodes=2) as cluster:
+        client = AWSElastiCacheClient(cluster.configuration_endpoint, default_noreply=False)
+        try:
+            assert set(client.clients) == {node.key for node in cluster.nodes}
+            assert client.config_version == 1
+
+            values = {f"key{i}": b"value%d" % i for i in range(20)}
+            assert client.set_many(values) == []
+            assert client.get_many(list(values)) == values
+            assert all(node.data for node in cluster.nodes)
+
+            value, cas = client.gets("key0")
+            assert value == b"value0"
+            assert client.cas("key0", b"new", cas) is True
+            assert client.cas("key0", b"newer", cas) is False
+            assert client.delete("key0") is True
+            assert client.get("key0") is None
+
+            cluster.add_node()
+            client._refresh_clients(force=True)
+            assert client.config_version == 2
+            assert len(client.clients) == 3
+        finally:
+            client.close()
+
+
+def test_client_benchmark_results_are_machine_readable() -> None:
+    results = bench_client.run(nodes=2, threads=[1, 2], duration=0.05, scenarios=["get", "get_many"])
+
+    assert results["benchmark"] == "client"
+    assert results["params"]["nodes"] == 2
+    assert len(results["results"]) == 2 * 3 * 2
+    for row in results["results"]:
+        assert row["ops"] > 0
+        assert row["errors"] == 0
+        assert row["p50_us"] <= row["p99_us"]
+
+
+def test_percentiles() -> None:
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+    assert summarize([0.001, 0.002], 1.0)["ops_per_sec"] == 2.0
+
+
+def test_churn_reports_time_series() -> None:
+    results = churn.run(
+        nodes=2,
+        threads=2,
+        duration=1.0,
+        bucket=0.5,
+        events="0.2:add,0.4:replace,0.6:faults,0.8:heal",
+        options={"discovery_interval": 0.1},
+        timeout_rate=0.0,
+        reset_rate=0.5,
+    )
+
+    assert [event["action"] for event in results["events"]] == ["add", "replace", "faults", "heal"]
+    assert [bucket["t"] for bucket in results["buckets"]] == [0.0, 0.5]
+    summary = results["summary"]
+    assert summary["ops"] == sum(bucket["ops"] for bucket in results["buckets"])
+    assert summary["discoveries"] > 0
+    # The replaced node comes back empty, so some keys are missed after the churn.
+    assert summary["misses"] > 0
+
+
+def test_churn_plan_parsing() -> None:
+    assert churn.parse_events("0.5:remove,0.1:add") == [(0.1, "add"), (0.5, "remove")]
+    assert churn.parse_option("retry_attempts=3") == ("retry_attempts", 3)
+    assert churn.parse_option("hasher=ketama") == ("hasher", "ketama")
+    with pytest.raises(ValueError):
+        churn.parse_events("0.5:explode")
+
+
+def test_cooperative_benchmark_results_are_machine_readable() -> None:
+    pytest.importorskip("gevent")
+    from benchmarks import bench_cooperative
+
+    results = bench_cooperative.run(library="gevent", nodes=2, greenlets=[1, 10], duration=0.05, scenarios=["get"])
+
+    assert results["benchmark"] == "cooperative"
+    assert results["params"]["library"] == "gevent"
+    assert [(row["mode"], row["greenlets"]) for row in results["results"]] == [
+        ("blocking", 1),
+        ("blocking", 10),
+        ("cooperative", 1),
+        ("cooperative", 10),
+    ]
+    assert all(row["ops"] > 0 and row["errors"] == 0 for row in results["results"])
+
+
+def test_routing_benchmark_results_are_machine_readable() -> None:
+    results = bench_routing.run(nodes=2, hashers=["ketama"], duration=0.01, batch=5)
+
+    assert results["benchmark"] == "routing"
+    assert [(row["scenario"], row["mode"]) for row in results["results"]] == [
+        ("get", "legacy"),
+        ("get", "fast_path"),
+        ("get", "memo"),
+        ("get_many", "per_key"),
+        ("get_many", "batched"),
+        ("get_many", "batched_memo"),
+    ]
+    assert all(row["keys"] > 0 and row["ns_per_key"] > 0 for row in results["results"])
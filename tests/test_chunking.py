@@ -0,0 +1,114 @@
+import os
+
+import pytest
+from pymemcache.serde import pickle_serde
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.backend import ElastiPymemcache
+from django_elastipymemcache.chunking import FLAG_CHUNK, FLAG_CHUNKED, ChunkingSerde, ChunkManifest, Serialized
+from django_elastipymemcache.client import AWSElastiCacheClient
+
+LARGE_VALUE = {"blob": os.urandom(5000)}
+
+
+def test_split_and_assemble() -> None:
+    serde = ChunkingSerde(pickle_serde, chunk_size=1000)
+    assert serde.split("small", "value") == (Serialized(*pickle_serde.serialize("small", "value")), {})
+
+    manifest_value, chunks = serde.split("key", LARGE_VALUE)
+    assert manifest_value.flags == FLAG_CHUNKED
+    manifest = serde.deserialize("key", manifest_value.data, manifest_value.flags)
+    assert isinstance(manifest, ChunkManifest)
+    assert list(chunks) == manifest.chunk_keys("key")
+    assert manifest.chunks == len(chunks) == -(-manifest.size // 1000)
+    assert all(chunk.flags == FLAG_CHUNK and len(chunk.data) <= 1000 for chunk in chunks.values())
+
+    data = [serde.deserialize(key, chunk.data, chunk.flags) for key, chunk in chunks.items()]
+    assert serde.assemble("key", manifest, data) == LARGE_VALUE
+
+    # Torn writes: a missing chunk, or chunks of another write.
+    with pytest.raises(ValueError):
+        serde.assemble("key", manifest, [*data[:-1], None])
+    with pytest.raises(ValueError):
+        serde.assemble("key", manifest, [*data[:-1], b"x" * len(data[-1])])
+
+    with pytest.raises(ValueError):
+        ChunkingSerde(chunk_size=0)
+
+
+def test_large_values_are_stored_in_chunks() -> None:
+    with LocalCluster(nodes=3) as cluster:
+        client = AWSElastiCacheClient(
+            cluster.configuration_endpoint,
+            serde=pickle_serde,
+            default_noreply=False,
+            chunking={"chunk_size": 1000},
+        )
+        try:
+            assert client.set("large", LARGE_VALUE)
+            assert client.get("large") == LARGE_VALUE
+            manifest = client._get_value("large")
+            assert isinstance(manifest, ChunkManifest)
+            # Chunks are spread over the nodes, and fetched with the other keys.
+            assert (
+                sum(any(key.encode() in node.data for key in manifest.chunk_keys("large")) for node in cluster.nodes)
+                > 1
+            )
+
+            assert client.set_many({"small": "value", "other": LARGE_VALUE}) == []
+            assert client.get_many(["large", "small", "other", "missing"]) == {
+                "large": LARGE_VALUE,
+                "small": "value",
+                "other": LARGE_VALUE,
+            }
+            value, cas = client.get_many(["large"], gets=True)["large"]
+            assert value == LARGE_VALUE and cas
+            assert client.gets("large") == (LARGE_VALUE, cas)
+
+            # A lost chunk makes the value a miss.
+            for node in cluster.nodes:
+                node.data.pop(manifest.chunk_keys("large")[0].encode(), None)
+            assert client.get("large", "default") == "default"
+            assert client.get_many(["large", "small"]) == {"small": "value"}
+            assert client.gets("large") == (None, None)
+
+            assert client.set("large", "small now")
+            assert client.get("large") == "small now"
+        finally:
+            client.close()
+
+
+def test_chunks_of_long_keys() -> None:
+    with LocalCluster(nodes=2) as cluster:
+        client = AWSElastiCacheClient(
+            cluster.configuration_endpoint,
+            serde=pickle_serde,
+            default_noreply=False,
+            chunking={"chunk_size": 1000},
+        )
+        try:
+            key = "k" * 240
+            assert client.set(key, b"x" * 5000)
+            assert client.get(key) == b"x" * 5000
+            assert all(len(chunk_key) < 100 for chunk_key in client._get_value(key).chunk_keys(key))
+            assert client.set_many({key.encode(): LARGE_VALUE}) == []
+            assert client.get(key.encode()) == LARGE_VALUE
+        finally:
+            client.close()
+
+
+def test_backend_chunking_with_compression() -> None:
+    with LocalCluster(nodes=2) as cluster:
+        backend = ElastiPymemcache(
+            cluster.configuration_endpoint,
+            {"OPTIONS": {"chunking": {"chunk_size": 1000}, "compression": {"threshold": 100}}},
+        )
+        try:
+            value = {"random": os.urandom(3000), "text": "fragment" * 1000}
+            backend.set("key", value)
+            assert backend.get("key") == value
+            assert backend.get_many(["key"]) == {"key": value}
+            backend.delete("key")
+            assert backend.get("key") is None
+        finally:
+            backend.close()
@@ -87,3 +87,11 @@ def test_parse_errors_via_raw_command(payload: bytes) -> None:
 
     with pytest.raises(MemcacheError):
         client.config_get_cluster()
+
+
+def test_config_version_is_recorded() -> None:
+    client = _client(use_vpc_ip=True, socket_module=FakeSocketModule([EXAMPLE_RESPONSE]))
+    assert client.config_version is None
+
+    client.config_get_cluster()
+    assert client.config_version == 12
@@ -0,0 +1,122 @@
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.backend import ElastiPymemcache
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.cooperative import (
+    CooperativeObjectPool,
+    CooperativeOptions,
+    get_cooperative_runtime,
+)
+
+
+@pytest.fixture(params=["gevent", "eventlet"])
+def library(request: Any) -> str:
+    pytest.importorskip(request.param)
+    return str(request.param)
+
+
+def test_options() -> None:
+    assert CooperativeOptions.from_option(None) is None
+    assert CooperativeOptions.from_option(True) == CooperativeOptions()
+    assert CooperativeOptions.from_option("eventlet") == CooperativeOptions(library="eventlet")
+    assert CooperativeOptions.from_option({"pool_size": 4}).pool_size == 4  # type: ignore[union-attr]
+    with pytest.raises(ValueError):
+        get_cooperative_runtime("asyncio")
+
+
+def test_greenlets_share_bounded_pools(library: str) -> None:
+    runtime = get_cooperative_runtime(library)
+    with LocalCluster(nodes=2) as cluster:
+        client = AWSElastiCacheClient(
+            cluster.configuration_endpoint,
+            default_noreply=False,
+            cooperative={"library": library, "pool_size": 4},
+            multi_node_workers=2,
+        )
+        try:
+            assert client.use_pooling
+            pools = [node_client.client_pool for node_client in client.clients.values()]
+            assert all(isinstance(pool, CooperativeObjectPool) for pool in pools)
+
+            values = {f"key{i}": b"value" for i in range(20)}
+            assert client.set_many(values) == []
+
+            # Node round trips of concurrent greenlets overlap, 4 connections per node at most.
+            for node in cluster.nodes:
+                node.latency = 0.02
+            start = time.perf_counter()
+            greenlets = [runtime.spawn(client.get_many, list(values)) for _ in range(16)]
+            assert all(runtime.wait(greenlet) == values for greenlet in greenlets)
+            assert time.perf_counter() - start < 16 * 0.02
+            assert all(len(pool._free_objs) + len(pool._used_objs) <= 4 for pool in pools)
+        finally:
+            client.close()
+
+
+def test_warm_up_opens_connections_in_the_hub(library: str) -> None:
+    runtime = get_cooperative_runtime(library)
+    with LocalCluster(nodes=3) as cluster:
+        client = AWSElastiCacheClient(
+            cluster.configuration_endpoint,
+            default_noreply=False,
+            cooperative=library,
+            warmup={"connections": 2},
+        )
+        try:
+            assert all(len(node.client_pool._free_objs) == 2 for node in client.clients.values())
+
+            # Greenlets use the warmed up connections of the hub.
+            values = {f"key{i}": b"value" for i in range(10)}
+            greenlets = [runtime.spawn(client.set, key, value) for key, value in values.items()]
+            assert all(runtime.wait(greenlet) for greenlet in greenlets)
+            greenlets = [runtime.spawn(client.get, key) for key in values]
+            assert [runtime.wait(greenlet) for greenlet in greenlets] == list(values.values())
+        finally:
+            client.close()
+
+
+def test_pool_waits_for_a_free_connection(library: str) -> None:
+    runtime = get_cooperative_runtime(library)
+    pool = CooperativeObjectPool(SimpleNamespace, max_size=1, semaphore=runtime.semaphore(1), wait_timeout=0.01)
+    first = pool.get()
+    with pytest.raises(RuntimeError):
+        pool.get()
+
+    waiter = runtime.spawn(pool.get)
+    runtime.sleep(0)
+    pool.release(first)
+    assert runtime.wait(waiter) is first
+
+
+def test_backend_shares_a_client_per_hub(library: str) -> None:
+    with LocalCluster(nodes=2) as cluster:
+        params = {"OPTIONS": {"cooperative": library, "discovery_interval": 0.05, "background_discovery": True}}
+        backend, other = (
+            ElastiPymemcache(cluster.configuration_endpoint, params),
+            ElastiPymemcache(cluster.configuration_endpoint, params),
+        )
+        client = backend._cache
+        try:
+            assert other._cache is client
+            backend.set("key", "value")
+            backend.close()
+            assert other.get("key") == "value"
+
+            # Discovery runs in a greenlet.
+            cluster.add_node()
+            get_cooperative_runtime(library).sleep(0.2)
+            assert len(client.clients) == 3
+        finally:
+            client.close()
+
+
+def test_write_behind_workers_do_not_use_the_hub(library: str) -> None:
+    params = {"OPTIONS": {"cooperative": library, "write_behind": True}}
+    backend = ElastiPymemcache("workers.0000.use1.cache.amazonaws.com:11211", params)
+    assert backend.write_behind is not None
+    assert "cooperative" not in backend.write_behind.client_factory.keywords  # type: ignore[attr-defined]
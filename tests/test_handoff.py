@@ -0,0 +1,83 @@
+from typing import Any
+
+import pytest
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.handoff import HandoffOptions
+
+KEYS = [f"key{i}" for i in range(200)]
+
+
+def _scale_out(cluster: LocalCluster, client: AWSElastiCacheClient) -> tuple[str, list[str]]:
+    """Add a node; returns it and the keys it now owns, all held by their previous owner."""
+    client.set_many({key: key.encode() for key in KEYS})
+    node = cluster.add_node().key
+    client._refresh_clients(force=True)
+    return node, [key for key in KEYS if client._topology.hasher.get_node(key) == node]
+
+
+def test_options() -> None:
+    assert HandoffOptions.from_option(None) is None
+    assert HandoffOptions.from_option(True) == HandoffOptions()
+    assert HandoffOptions.from_option({"window": 5}) == HandoffOptions(window=5)
+
+
+@pytest.mark.parametrize("hasher", ["rendezvous", "ketama"])
+def test_misses_on_remapped_keys_fall_back_to_the_previous_owner(hasher: str) -> None:
+    with LocalCluster(nodes=2) as cluster:
+        client = AWSElastiCacheClient(cluster.configuration_endpoint, handoff=True, hasher=hasher)
+        try:
+            assert client.handoff_state()["active"] is False
+            node, moved = _scale_out(cluster, client)
+            assert moved
+
+            assert client.get(moved[0]) == moved[0].encode()
+            assert client.get_many(KEYS) == {key: key.encode() for key in KEYS}
+            state = client.handoff_state()
+            assert state["active"] is True
+            assert state["rescued"] == state["rescued_total"] == len(moved)
+            assert state["copied_bytes"] > 0
+
+            # Hits were copied forward, so the next reads hit the new owner.
+            assert client.clients[node].get_many(moved) == {key: key.encode() for key in moved}
+            assert client.get_many(moved) == {key: key.encode() for key in moved}
+            assert client.rescued_keys == len(moved)
+        finally:
+            client.close()
+
+
+def test_writes_delete_the_previous_owners_copy() -> None:
+    with LocalCluster(nodes=2) as cluster:
+        client = AWSElastiCacheClient(cluster.configuration_endpoint, handoff=True)
+        try:
+            _, moved = _scale_out(cluster, client)
+            deleted, overwritten, *rest = moved
+
+            client.delete(deleted)
+            client.delete_many(rest)
+            client.set(overwritten, b"new")
+            client.clients[client._topology.hasher.get_node(overwritten)].delete(overwritten)
+
+            assert client.get(deleted) is None
+            assert client.get_many(rest) == {}
+            assert client.get(overwritten) is None
+            assert client.rescued_keys == 0
+        finally:
+            client.close()
+
+
+@pytest.mark.parametrize(("options", "rescued"), [({"window": 0}, 0), ({"max_bytes": 1}, 1), (None, 0)])
+def test_window_ends_on_time_or_bytes(options: Any, rescued: int) -> None:
+    with LocalCluster(nodes=2) as cluster:
+        client = AWSElastiCacheClient(cluster.configuration_endpoint, handoff=options)
+        try:
+            _, moved = _scale_out(cluster, client)
+            assert len(moved) > 1
+
+            for key in moved:
+                client.get(key)
+            assert client.rescued_keys == rescued
+            assert client.handoff_state()["active"] is False
+        finally:
+            client.close()
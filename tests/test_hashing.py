@@ -0,0 +1,98 @@
+import hashlib
+from collections import Counter
+
+import pytest
+from pymemcache.client.rendezvous import RendezvousHash
+from pytest import MonkeyPatch
+
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.hashing import KetamaHash, get_hasher_class, get_nodes, ketama_key_hash
+
+
+def test_key_hash_is_little_endian_md5_prefix() -> None:
+    # md5("foo") = acbd18db...
+    assert ketama_key_hash("foo") == 0xDB18BDAC
+    assert ketama_key_hash(b"foo") == 0xDB18BDAC
+
+
+def test_points_follow_libmemcached_naming() -> None:
+    default_port = KetamaHash._node_points("10.0.0.1:11211")
+    assert len(default_port) == 160
+    digest = hashlib.md5(b"10.0.0.1-0").digest()
+    assert default_port[:4] == [int.from_bytes(digest[i : i + 4], "little") for i in range(0, 16, 4)]
+
+    digest = hashlib.md5(b"10.0.0.1:11212-39").digest()
+    assert KetamaHash._node_points("10.0.0.1:11212")[-1] == int.from_bytes(digest[12:16], "little")
+
+
+def test_key_belongs_to_next_point_on_continuum() -> None:
+    hasher = KetamaHash(["10.0.0.1:11211", "10.0.0.2:11211", "10.0.0.3:11211"])
+    ring = sorted((point, node) for node in hasher.nodes for point in KetamaHash._node_points(node))
+
+    for i in range(200):
+        key = f"key{i}"
+        expected = next((node for point, node in ring if point >= ketama_key_hash(key)), ring[0][1])
+        assert hasher.get_node(key) == expected
+
+
+def test_empty_ring_and_remove_unknown_node() -> None:
+    hasher = KetamaHash()
+    assert hasher.get_node("key") is None
+    with pytest.raises(ValueError):
+        hasher.remove_node("10.0.0.1:11211")
+
+
+@pytest.mark.parametrize("hasher_class", [KetamaHash, RendezvousHash])
+def test_batched_lookup_matches_get_node(hasher_class: type) -> None:
+    keys = [f"key{i}" for i in range(500)] + [b"bytes-key"]
+    hasher = hasher_class()
+    assert get_nodes(hasher, keys) == [None] * len(keys)
+    for i in range(1, 6):
+        hasher.add_node(f"10.0.0.{i}:11211")
+    assert get_nodes(hasher, keys) == [hasher.get_node(key) for key in keys]
+
+
+def test_placement_does_not_depend_on_insertion_order() -> None:
+    nodes = [f"10.0.0.{i}:11211" for i in range(1, 6)]
+    forward, backward = KetamaHash(nodes), KetamaHash(reversed(nodes))
+    assert all(forward.get_node(f"key{i}") == backward.get_node(f"key{i}") for i in range(1000))
+
+
+@pytest.mark.parametrize("node_count", [3, 5, 10])
+def test_scale_out_remaps_about_one_in_n_keys(node_count: int) -> None:
+    keys = [f"key:{i}" for i in range(20000)]
+    hasher = KetamaHash(f"10.0.0.{i}:11211" for i in range(1, node_count + 1))
+    before = {key: hasher.get_node(key) for key in keys}
+
+    hasher.add_node(f"10.0.0.{node_count + 1}:11211")
+    moved = [key for key in keys if hasher.get_node(key) != before[key]]
+
+    # Only keys taken over by the new node move, roughly 1/(N+1) of them.
+    assert all(hasher.get_node(key) == f"10.0.0.{node_count + 1}:11211" for key in moved)
+    assert len(moved) / len(keys) == pytest.approx(1 / (node_count + 1), rel=0.35)
+
+    counts = Counter(hasher.get_node(key) for key in keys)
+    assert min(counts.values()) > len(keys) / (node_count + 1) / 2
+
+
+def test_get_hasher_class() -> None:
+    assert get_hasher_class("ketama") is KetamaHash
+    assert get_hasher_class("rendezvous") is RendezvousHash
+    assert get_hasher_class(KetamaHash) is KetamaHash
+    with pytest.raises(ValueError):
+        get_hasher_class("crc32")
+
+
+def test_client_routes_with_selected_hasher(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        "django_elastipymemcache.client._ConfigurationEndpointClient.config_get_cluster",
+        lambda self: [("10.0.0.1", 11211), ("10.0.0.2", 11211)],
+    )
+    client = AWSElastiCacheClient("test.0000.use1.cache.amazonaws.com:11211", hasher="ketama")
+    reference = KetamaHash(["10.0.0.1:11211", "10.0.0.2:11211"])
+
+    assert isinstance(client.hasher, KetamaHash)
+    for i in range(50):
+        node = reference.get_node(f"key{i}")
+        assert node is not None
+        assert client._get_client(f"key{i}") is client.clients[node]
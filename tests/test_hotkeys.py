@@ -0,0 +1,109 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from pytest import MonkeyPatch
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.hotkeys import HotKeyDetector, get_hot_key_detector
+
+
+def test_detector_finds_heavy_hitters() -> None:
+    detector = HotKeyDetector(sample_rate=1.0, min_rate=1.0, window=3.0, capacity=2)
+    assert detector.threshold == 3
+
+    for _ in range(3):
+        detector.record("viral")
+    detector.record("cold")
+    assert detector.is_hot("viral")
+    assert not detector.is_hot("cold")
+
+    # Space-saving: a new key takes over the smallest counter, with its count as error.
+    detector.record("other")
+    assert "cold" not in detector._counters
+    assert detector._counters["other"] == [2, 1]
+
+    # The hot keys of a window stay hot during the next one.
+    with patch("django_elastipymemcache.hotkeys.time.monotonic", return_value=detector._window_ends_at):
+        detector.record("other")
+    assert detector.hot_keys() == {"viral"}
+    assert detector._counters == {"other": [1, 0]}
+
+
+def test_detector_patterns_and_options() -> None:
+    detector = HotKeyDetector(keys=["*:flags:*"], sample_rate=0.0, replica_ttl=10)
+
+    assert detector.is_hot(":1:flags:beta")
+    assert detector.is_hot(b":1:flags:beta")
+    assert not detector.is_hot(":1:user:1")
+    assert detector.replica_expire(0) == 10
+    assert detector.replica_expire(5) == 5
+    assert detector.replica_expire(3600) == 10
+
+    with pytest.raises(ValueError):
+        HotKeyDetector(replicas=0)
+    assert get_hot_key_detector("a:11211", {"keys": ["x"]}) is get_hot_key_detector("a:11211", {"keys": ["x"]})
+
+
+def test_hot_keys_are_replicated_on_other_nodes() -> None:
+    with LocalCluster(nodes=3) as cluster:
+        client = AWSElastiCacheClient(
+            cluster.configuration_endpoint,
+            default_noreply=False,
+            hot_keys={"keys": ["hot:*"], "replicas": 2, "sample_rate": 0.0},
+        )
+        try:
+            topology = client._get_topology()
+            replicas = client._replica_keys(topology, "hot:1")
+            nodes = {topology.hasher.get_node(key) for key in ("hot:1", *replicas)}
+            assert len(replicas) == 2
+            assert len(nodes) == 3
+
+            def stored(key: str) -> bool:
+                # Read through the client: replicas are written without waiting for replies.
+                return key in client._get_many_from_nodes([key])
+
+            client.set("hot:1", b"v1")
+            client.set("cold:1", b"v1")
+            assert all(stored(key) for key in replicas)
+            assert not any(stored(key) for key in client._replica_keys(topology, "cold:1"))
+
+            # Reads are spread over the primary and the replicas.
+            before = {node.key: node.commands for node in cluster.nodes}
+            assert all(client.get("hot:1") == b"v1" for _ in range(60))
+            assert all(node.commands > before[node.key] for node in cluster.nodes)
+
+            # A missing replica is refilled from the primary.
+            for node in cluster.nodes:
+                node.data.pop(replicas[0].encode(), None)
+            for _ in range(30):
+                assert client.get_many(["hot:1", "cold:1"]) == {"hot:1": b"v1", "cold:1": b"v1"}
+            assert stored(replicas[0])
+
+            client.set_many({"hot:1": b"v2"})
+            assert all(client.get("hot:1") == b"v2" for _ in range(30))
+
+            client.delete("hot:1")
+            assert not any(stored(key) for key in ("hot:1", *replicas))
+            assert client.get("hot:1") is None
+        finally:
+            client.close()
+
+
+def test_replicas_are_not_written_when_the_primary_refuses_the_value(monkeypatch: MonkeyPatch) -> None:
+    with LocalCluster(nodes=3) as cluster:
+        client = AWSElastiCacheClient(
+            cluster.configuration_endpoint,
+            default_noreply=False,
+            hot_keys={"keys": ["hot:*"], "replicas": 2, "sample_rate": 0.0},
+        )
+        try:
+            topology = client._get_topology()
+            primary = topology.clients[topology.hasher.get_node("hot:1")]
+            monkeypatch.setattr(primary, "set", Mock(return_value=False))
+
+            assert client.set("hot:1", b"v1") is False
+            replicas = client._replica_keys(topology, "hot:1")
+            assert client._get_many_from_nodes(replicas) == {}
+        finally:
+            client.close()
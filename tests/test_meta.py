@@ -0,0 +1,138 @@
+from typing import Any
+
+import pytest
+from pymemcache.exceptions import MemcacheError
+from pymemcache.serde import pickle_serde
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.backend import ElastiPymemcache
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.meta import MetaClient, MetaPooledClient
+
+
+@pytest.fixture
+def cluster() -> Any:
+    with LocalCluster(nodes=2) as cluster:
+        yield cluster
+
+
+@pytest.mark.parametrize("use_pooling", [False, True])
+def test_meta_protocol_commands(cluster: LocalCluster, use_pooling: bool) -> None:
+    client = AWSElastiCacheClient(
+        cluster.configuration_endpoint,
+        protocol="meta",
+        use_pooling=use_pooling,
+        serde=pickle_serde,
+        default_noreply=False,
+    )
+    try:
+        assert all(
+            isinstance(node_client, MetaPooledClient if use_pooling else MetaClient)
+            for node_client in client.clients.values()
+        )
+
+        values = {f"key{i}": f"value{i}" for i in range(10)}
+        assert client.set_many(values) == []
+        assert client.get_many(list(values) + ["missing"]) == values
+        assert client.get("key0") == "value0"
+        assert client.get("missing", "default") == "default"
+
+        assert client.add("key0", "other") is False
+        assert client.add("new", "value") is True
+        assert client.replace("missing", "value") is False
+
+        value, cas = client.gets("key1")
+        assert value == "value1"
+        assert client.cas("key1", "new", cas) is True
+        assert client.cas("key1", "newer", cas) is False
+        assert client.get("key1") == "new"
+
+        assert client.touch("key2", 100) is True
+        assert client.touch("missing", 100) is False
+        assert client.delete("key2") is True
+        assert client.delete("key2") is False
+        client.delete_many(["key3", "key4"])
+        assert client.get_many(["key3", "key4"]) == {}
+
+        # noreply commands are pipelined in quiet mode.
+        client.set("quiet", "value", noreply=True)
+        client.delete("missing", noreply=True)
+        assert client.get("quiet") == "value"
+    finally:
+        client.close()
+
+
+def test_meta_get_and_stale_while_revalidate(cluster: LocalCluster) -> None:
+    client = AWSElastiCacheClient(
+        cluster.configuration_endpoint,
+        protocol="meta",
+        serde=pickle_serde,
+        default_noreply=False,
+    )
+    try:
+        client.set("key", "value", 100)
+        result = client.meta_get("key")
+        assert result.hit and result.value == "value"
+        assert result.ttl is not None and 0 < result.ttl <= 100
+        assert result.cas is not None
+        assert not (result.won or result.stale or result.pending)
+
+        # Touch on read.
+        assert (client.meta_get("key", touch=1000).ttl or 0) > 100
+
+        # Invalidated: the first reader wins the recompute, the others get the stale value.
+        assert client.invalidate("key", stale_ttl=30) is True
+        first, second = client.meta_get("key"), client.meta_get("key")
+        assert first.won and first.stale and first.value == "value"
+        assert second.pending and second.stale and second.value == "value"
+        client.set("key", "fresh", 100)
+        assert client.meta_get("key") == client.meta_get("key")
+
+        # Recache: the first reader seeing less than 200 seconds left wins.
+        assert client.meta_get("key", recache=200).won
+        assert client.meta_get("key", recache=200).pending
+
+        # Vivify: a miss creates a placeholder, won by the first reader only.
+        first, second = client.meta_get("new", "default", vivify=30), client.meta_get("new", "default", vivify=30)
+        assert first.won and not first.hit and first.value == "default"
+        assert second.pending and not second.hit
+        assert not client.meta_get("missing").hit
+    finally:
+        client.close()
+
+
+def test_meta_commands_require_meta_protocol(cluster: LocalCluster) -> None:
+    client = AWSElastiCacheClient(cluster.configuration_endpoint)
+    try:
+        with pytest.raises(MemcacheError):
+            client.meta_get("key")
+        with pytest.raises(MemcacheError):
+            client.invalidate("key")
+    finally:
+        client.close()
+
+    with pytest.raises(ValueError):
+        AWSElastiCacheClient(cluster.configuration_endpoint, protocol="binary")
+
+
+@pytest.mark.parametrize("protocol", ["meta", "text"])
+def test_backend_get_or_revalidate(cluster: LocalCluster, protocol: str) -> None:
+    backend = ElastiPymemcache(cluster.configuration_endpoint, {"OPTIONS": {"protocol": protocol}})
+    calls = []
+
+    def compute() -> str:
+        calls.append(1)
+        return f"value{len(calls)}"
+
+    try:
+        assert backend.get_or_revalidate("key", compute) == "value1"
+        assert backend.get_or_revalidate("key", compute) == "value1"
+        assert backend.get_and_touch("key", timeout=100) == "value1"
+        assert backend.get_and_touch("missing", "default") == "default"
+
+        assert backend.invalidate("key") is True
+        assert backend.get_or_revalidate("key", compute) == "value2"
+        assert backend.get("key") == "value2"
+        assert len(calls) == 2
+    finally:
+        backend.close()
@@ -0,0 +1,121 @@
+import time
+from typing import Any
+from unittest.mock import Mock
+
+from pytest import MonkeyPatch
+
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.metrics import (
+    LATENCY_BUCKETS,
+    CallbackMetrics,
+    InMemoryMetrics,
+    MetricsHook,
+    SignalMetrics,
+    get_metrics_hooks,
+    metrics_event,
+)
+
+from .conftest import FakeSocketModule
+
+
+def make_client(monkeypatch: MonkeyPatch, **options: Any) -> AWSElastiCacheClient:
+    monkeypatch.setattr(
+        "django_elastipymemcache.client._ConfigurationEndpointClient.config_get_cluster",
+        lambda self: [("10.0.0.1", 11211)],
+    )
+    return AWSElastiCacheClient("test.0000.use1.cache.amazonaws.com:11211", **options)
+
+
+def test_in_memory_metrics_aggregate_node_operations(monkeypatch: MonkeyPatch) -> None:
+    metrics = InMemoryMetrics()
+    responses = [b"STORED\r\n", b"VALUE key 0 5\r\nvalue\r\nEND\r\n", b"END\r\n"]
+    client = make_client(
+        monkeypatch,
+        metrics=metrics,
+        socket_module=FakeSocketModule(responses),
+        use_pooling=True,
+        default_noreply=False,
+    )
+
+    assert client.set("key", b"value") is True
+    assert client.get("key", b"default") == b"value"
+    assert client.get("missing", b"default") == b"default"
+
+    snapshot = metrics.snapshot()
+    node = snapshot["nodes"]["10.0.0.1:11211"]
+    assert node["ops"] == {"set": 1, "get": 2}
+    assert node["errors"] == {}
+    assert sum(count for _, count in node["latency"]) == 3
+    assert node["latency"][-1][0] == float("inf")
+    assert len(node["latency"]) == len(LATENCY_BUCKETS) + 1
+    assert (node["hits"], node["misses"]) == (1, 1)
+    assert node["bytes_received"] == sum(map(len, responses))
+    assert node["bytes_sent"] > 0
+    assert node["pool_checkouts"] == 3
+    assert node["pool_connections_created"] == 1
+    assert snapshot["discovery"]["success"] == 1
+    assert snapshot["discovery"]["changed"] == 1
+
+    metrics.reset()
+    assert metrics.snapshot() == {"nodes": {}, "discovery": {"success": 0, "failure": 0, "changed": 0, "duration": 0.0}}
+
+
+def test_failed_and_dead_transitions(monkeypatch: MonkeyPatch) -> None:
+    metrics = InMemoryMetrics()
+    client = make_client(
+        monkeypatch,
+        metrics=metrics,
+        socket_module=FakeSocketModule([OSError("connection reset")]),  # type: ignore[list-item]
+        ignore_exc=True,
+        retry_attempts=1,
+        retry_timeout=0,
+        dead_timeout=60,
+    )
+
+    # Fails, fails again on retry, then is removed from the ring (HashClient still runs that last call).
+    for _ in range(3):
+        assert client.get("key") is None
+
+    node = metrics.snapshot()["nodes"]["10.0.0.1:11211"]
+    assert node["errors"] == {"get": 3}
+    assert node["states"] == {"failed": 1, "dead": 1}
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", Mock(return_value=now + 120))
+    client._retry_dead()
+    assert metrics.snapshot()["nodes"]["10.0.0.1:11211"]["states"]["revived"] == 1
+
+
+def test_callback_and_signal_adapters(monkeypatch: MonkeyPatch) -> None:
+    callback = Mock()
+    received = []
+
+    def receiver(sender: Any, signal: Any, event: str, **fields: Any) -> None:
+        received.append((event, fields))
+
+    metrics_event.connect(receiver)
+    try:
+        client = make_client(monkeypatch, metrics=[CallbackMetrics(callback), SignalMetrics()])
+        client.close()
+    finally:
+        metrics_event.disconnect(receiver)
+
+    events = [call.args for call in callback.call_args_list]
+    assert [event for event, _ in events] == ["discovery"]
+    assert events[0][1]["success"] is True
+    assert received == events
+
+
+def test_failing_hook_does_not_fail_operations() -> None:
+    class BrokenMetrics(MetricsHook):
+        def command(self, node: str, name: str, duration: float, success: bool) -> None:
+            raise RuntimeError("boom")
+
+    aggregator = InMemoryMetrics()
+    hooks = get_metrics_hooks([BrokenMetrics(), aggregator])
+    assert hooks is not None
+    hooks.command("10.0.0.1:11211", "get", 0.001, True)
+
+    assert aggregator.snapshot()["nodes"]["10.0.0.1:11211"]["ops"] == {"get": 1}
+    assert get_metrics_hooks([]) is None
+    assert get_metrics_hooks(None) is None
@@ -0,0 +1,102 @@
+import time
+from unittest.mock import Mock
+
+import pytest
+from pytest import MonkeyPatch
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.backend import ElastiPymemcache
+from django_elastipymemcache.namespaces import GenerationCache, NamespaceOptions
+
+
+def test_generation_cache_lookup(monkeypatch: MonkeyPatch) -> None:
+    now = time.monotonic()
+    mock_monotonic = Mock(return_value=now)
+    monkeypatch.setattr(time, "monotonic", mock_monotonic)
+    generations = GenerationCache(ttl=1.0, max_entries=2)
+
+    assert generations.lookup(["a"]) == (None, False)
+    generations.update([("a", 1), ("b", 2)])
+    assert generations.lookup(["a", "b"]) == ([1, 2], True)
+
+    mock_monotonic.return_value = now + 2.0
+    assert generations.lookup(["a", "b"]) == ([1, 2], False)
+
+    generations.update([("c", 3)])
+    assert generations.lookup(["a"]) == (None, False)
+    assert generations.lookup(["c"]) == ([3], True)
+
+
+def test_options() -> None:
+    assert NamespaceOptions.from_option(None) == NamespaceOptions()
+    assert NamespaceOptions.from_option({"generation_ttl": 5}).generation_ttl == 5
+
+
+def test_invalidate_makes_the_keys_of_a_namespace_unreachable() -> None:
+    with LocalCluster(nodes=2) as cluster:
+        backend = ElastiPymemcache(cluster.configuration_endpoint, {"OPTIONS": {"namespaces": {"generation_ttl": 60}}})
+        try:
+            tenant, other = backend.namespace("tenant:1"), backend.namespace("tenant:2")
+            tenant.set("a", 1)
+            assert tenant.set_many({"b": 2, "c": 3}) == []
+            other.set("a", "other")
+            backend.set("a", "global")
+
+            assert tenant.get_many(["a", "b", "c", "d"]) == {"a": 1, "b": 2, "c": 3}
+            assert other.get("a") == "other"
+
+            tenant.invalidate()
+            assert tenant.get_many(["a", "b", "c"]) == {}
+            assert tenant.get("a", "missing") == "missing"
+            assert other.get("a") == "other"
+            assert backend.get("a") == "global"
+
+            # A key under several namespaces is invalidated with any of them.
+            both = backend.namespace("tenant:2", "model:user")
+            both.set("a", "both")
+            assert both.get("a") == "both"
+            backend.namespace("model:user").invalidate()
+            assert both.get("a") is None
+            assert other.get("a") == "other"
+
+            assert tenant.add("a", 1)
+            assert tenant.incr("a", 2) == 3
+            assert tenant.get_or_set("x", "computed") == "computed"
+            assert tenant.has_key("x")
+            tenant.delete_many(["a", "x"])
+            assert not tenant.has_key("a")
+        finally:
+            backend.close()
+
+
+def test_reads_check_stale_generations_in_the_same_multi_get(monkeypatch: MonkeyPatch) -> None:
+    with LocalCluster(nodes=2) as cluster:
+        location = cluster.configuration_endpoint
+        backend = ElastiPymemcache(location, {"OPTIONS": {"namespaces": {"generation_ttl": 0}}})
+        # Another process, whose generations are cached for long
+        other = ElastiPymemcache(location, {"OPTIONS": {"namespaces": {"generation_ttl": 60}}})
+        try:
+            namespace = backend.namespace("tenant:1")
+            namespace.set_many({"a": 1, "b": 2})
+            namespace.get("a")
+
+            get_multi = Mock(wraps=backend._cache.get_multi)
+            monkeypatch.setattr(backend._cache, "get_multi", get_multi)
+            assert namespace.get_many(["a", "b"]) == {"a": 1, "b": 2}
+            assert get_multi.call_count == 1
+            assert set(get_multi.call_args.args[0]) >= set(namespace._generation_keys)
+
+            # After an invalidation, the data keys of the new generation are read in a second round trip.
+            other.namespace("tenant:1").invalidate()
+            get_multi.reset_mock()
+            assert namespace.get_many(["a", "b"]) == {}
+            assert get_multi.call_count == 2
+        finally:
+            backend.close()
+            other.close()
+
+
+def test_namespace_requires_a_name() -> None:
+    backend = ElastiPymemcache("names.0000.use1.cache.amazonaws.com:11211", {})
+    with pytest.raises(ValueError):
+        backend.namespace()
@@ -0,0 +1,78 @@
+import time
+from unittest.mock import Mock
+
+import pytest
+from pymemcache.serde import pickle_serde
+from pytest import MonkeyPatch
+
+from django_elastipymemcache.near_cache import NearCache, get_near_cache
+
+
+def test_get_many_returns_copies_and_counts_hits() -> None:
+    near_cache = NearCache(pickle_serde)
+    value = {"a": [1, 2]}
+    near_cache.set_many({"key": value})
+
+    found = near_cache.get_many(["key", "missing"])
+
+    assert found == {"key": value}
+    assert found["key"] is not value
+    assert near_cache.stats()["hits"] == 1
+    assert near_cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_by_entries() -> None:
+    near_cache = NearCache(pickle_serde, max_entries=2)
+    near_cache.set_many({"k1": 1, "k2": 2})
+    near_cache.get_many(["k1"])
+    near_cache.set_many({"k3": 3})
+
+    assert set(near_cache.get_many(["k1", "k2", "k3"])) == {"k1", "k3"}
+    assert near_cache.stats()["evictions"] == 1
+
+
+def test_evicts_by_bytes() -> None:
+    near_cache = NearCache(pickle_serde, max_bytes=100)
+    near_cache.set_many({"k1": b"x" * 60})
+    near_cache.set_many({"k2": b"y" * 60})
+    near_cache.set_many({"too-big": b"z" * 101})
+
+    assert set(near_cache.get_many(["k1", "k2", "too-big"])) == {"k2"}
+    assert near_cache.stats()["bytes"] == 60
+
+
+def test_entries_expire_after_ttl(monkeypatch: MonkeyPatch) -> None:
+    now = time.monotonic()
+    mock_monotonic = Mock(return_value=now)
+    monkeypatch.setattr(time, "monotonic", mock_monotonic)
+
+    near_cache = NearCache(pickle_serde, ttl=2.0)
+    near_cache.set_many({"key": "value"})
+    assert near_cache.get_many(["key"]) == {"key": "value"}
+
+    mock_monotonic.return_value = now + 2.0
+    assert near_cache.get_many(["key"]) == {}
+    assert near_cache.stats()["entries"] == 0
+
+
+def test_key_prefix_allowlist() -> None:
+    near_cache = NearCache(pickle_serde, key_prefixes=["flags:", "site:"])
+
+    assert near_cache.accepts("flags:beta")
+    assert near_cache.accepts("site:config")
+    assert not near_cache.accepts("user:1")
+
+
+def test_invalid_options() -> None:
+    with pytest.raises(ValueError):
+        NearCache(pickle_serde, max_entries=0)
+
+
+def test_get_near_cache_is_shared_per_configuration() -> None:
+    options = {"max_entries": 10, "key_prefixes": ["flags:"]}
+
+    near_cache = get_near_cache("shared.cache.amazonaws.com:11211", pickle_serde, options)
+
+    assert get_near_cache("shared.cache.amazonaws.com:11211", pickle_serde, dict(options)) is near_cache
+    assert get_near_cache("shared.cache.amazonaws.com:11211", pickle_serde, {"max_entries": 20}) is not near_cache
+    assert get_near_cache("other.cache.amazonaws.com:11211", pickle_serde, options) is not near_cache
@@ -0,0 +1,152 @@
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from pytest import MonkeyPatch
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.outliers import LatencyOutlierDetector, get_outlier_detector
+
+
+def _record(detector: LatencyOutlierDetector, latencies: dict[str, float], count: int = 10) -> None:
+    for node, latency in latencies.items():
+        for _ in range(count):
+            detector.record(node, latency)
+
+
+def test_detector_ejects_and_readmits_outliers() -> None:
+    detector = LatencyOutlierDetector(
+        min_samples=10,
+        ratio=3.0,
+        ejection_time=10.0,
+        readmit_time=10.0,
+        adaptive_timeouts=True,
+        min_timeout=0.01,
+    )
+    now = time.monotonic()
+
+    def evaluate_at(offset: float) -> None:
+        with patch("django_elastipymemcache.outliers.time.monotonic", return_value=now + offset):
+            assert detector.evaluate()
+
+    _record(detector, {"a:1": 0.001, "b:1": 0.001, "c:1": 0.3})
+    evaluate_at(0)
+    assert detector.ejected == {"c:1"}
+    assert detector.generation == 1
+    state = detector.state()
+    assert state["c:1"]["state"] == "ejected" and state["c:1"]["ejections"] == 1
+    assert state["a:1"]["p99"] == 0.001
+    assert detector.timeouts() == {"a:1": 0.01, "b:1": 0.01}
+
+    # Back on probation: its keys return to it gradually, each one once.
+    evaluate_at(10)
+    assert detector.ejected == frozenset() and set(detector.probation) == {"c:1"}
+    keys = [f"key{i}" for i in range(1000)]
+    with patch("django_elastipymemcache.outliers.time.monotonic", return_value=now + 15):
+        admitted = {key for key in keys if detector.admit("c:1", key)}
+        assert 400 < len(admitted) < 600
+        assert all(detector.admit("a:1", key) for key in keys)
+    with patch("django_elastipymemcache.outliers.time.monotonic", return_value=now + 18):
+        assert admitted <= {key for key in keys if detector.admit("c:1", key)}
+
+    # Still slow: ejected again, for longer.
+    _record(detector, {"a:1": 0.001, "b:1": 0.001, "c:1": 0.3})
+    evaluate_at(12)
+    assert detector.ejected == {"c:1"}
+    assert detector._nodes["c:1"].ejected_until == now + 32
+
+    # Recovered: healthy at the end of the probation.
+    evaluate_at(32)
+    _record(detector, {"a:1": 0.001, "b:1": 0.001, "c:1": 0.0012})
+    evaluate_at(42)
+    assert detector.state()["c:1"]["state"] == "healthy"
+    assert detector.probation == {}
+
+
+def test_detector_limits() -> None:
+    detector = LatencyOutlierDetector(min_samples=10, ratio=3.0, max_ejected_fraction=0.34)
+    # Two nodes: ejecting one would leave no spare capacity.
+    _record(detector, {"a:1": 0.001, "b:1": 0.3})
+    detector.evaluate()
+    assert detector.ejected == frozenset()
+
+    # Slow, but under min_latency, or without enough samples.
+    _record(detector, {"c:1": 0.001, "d:1": 0.004})
+    _record(detector, {"e:1": 0.3}, count=5)
+    detector.forget(["b:1"])
+    detector.evaluate()
+    assert detector.ejected == frozenset()
+
+    with pytest.raises(ValueError):
+        LatencyOutlierDetector(min_samples=300)
+    with pytest.raises(ValueError):
+        LatencyOutlierDetector(ratio=1.0)
+    assert get_outlier_detector("a:11211", {"ratio": 3}) is get_outlier_detector("a:11211", {"ratio": 3})
+
+
+def test_slow_node_is_ejected_from_the_ring() -> None:
+    with LocalCluster(nodes=3) as cluster:
+        client = AWSElastiCacheClient(
+            cluster.configuration_endpoint,
+            default_noreply=False,
+            timeout=1.0,
+            outlier_detection={
+                "window": 20,
+                "min_samples": 5,
+                "interval": 0.05,
+                "ratio": 3.0,
+                "ejection_time": 0.3,
+                "readmit_time": 0.3,
+                "adaptive_timeouts": True,
+            },
+        )
+        try:
+            slow = cluster.nodes[0]
+            slow.latency = 0.02
+            keys = [f"key{i}" for i in range(30)]
+            client.set_many(dict.fromkeys(keys, b"value"))
+
+            deadline = time.monotonic() + 5
+            while slow.key in client._get_topology().nodes and time.monotonic() < deadline:
+                client.get_many(keys)
+            assert client.outlier_state()[slow.key]["state"] == "ejected"
+            assert all(client._get_client(key).server != slow.address for key in keys)  # type: ignore[union-attr]
+            assert 0.05 <= client.clients[cluster.nodes[1].key].timeout < 1.0
+
+            # Recovered: back on probation, then healthy.
+            slow.latency = 0.0
+            deadline = time.monotonic() + 5
+            while client.outlier_state()[slow.key]["state"] != "healthy" and time.monotonic() < deadline:
+                client.get_many(keys)
+                time.sleep(0.01)
+            assert slow.key in client._get_topology().nodes
+            assert any(client._get_client(key).server == slow.address for key in keys)  # type: ignore[union-attr]
+        finally:
+            client.close()
+
+
+def test_rebuilds_do_not_consume_readmissions(monkeypatch: MonkeyPatch) -> None:
+    nodes = [("10.0.0.1", 11211), ("10.0.0.2", 11211), ("10.0.0.3", 11211)]
+    monkeypatch.setattr(
+        "django_elastipymemcache.client._ConfigurationEndpointClient.config_get_cluster",
+        Mock(return_value=nodes),
+    )
+    client = AWSElastiCacheClient("readmit.0000.use1.cache.amazonaws.com:11211", outlier_detection=True)
+    outliers = client._outliers
+    assert outliers is not None
+    monkeypatch.setattr(outliers, "due", Mock(return_value=False))
+
+    outliers.ejected = frozenset({"10.0.0.1:11211"})
+    outliers.generation += 1
+    assert "10.0.0.1:11211" not in client._get_topology().nodes
+
+    # The shared detector readmits the node, then this client retries a dead node before applying it.
+    outliers.ejected = frozenset()
+    outliers.generation += 1
+    client._dead_clients[("10.0.0.2", 11211)] = 0.0
+    client._last_dead_check_time = 0.0
+    client._retry_dead()
+
+    assert client._get_topology().nodes == {"10.0.0.1:11211", "10.0.0.2:11211", "10.0.0.3:11211"}
+    assert client._outlier_generation == outliers.generation
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from pymemcache.serde import FLAG_COMPRESSED, FLAG_PICKLE, CompressedSerde, pickle_serde
+
+from django_elastipymemcache.serde import CODECS, CompressingSerde, get_compressing_serde
+
+LARGE_VALUE = {"html": "<div>fragment</div>" * 1000}
+
+
+@pytest.mark.parametrize("codec", sorted(CODECS))
+def test_round_trip_above_threshold(codec: str) -> None:
+    serde = CompressingSerde(threshold=1024, codec=codec)
+    data, flags = serde.serialize("key", LARGE_VALUE)
+
+    assert flags & CODECS[codec].flag
+    assert flags & FLAG_PICKLE
+    assert len(data) < len(pickle_serde.serialize("key", LARGE_VALUE)[0])
+    assert serde.deserialize("key", data, flags) == LARGE_VALUE
+
+
+def test_small_and_incompressible_values_are_stored_as_is() -> None:
+    serde = CompressingSerde(threshold=1024)
+    assert serde.serialize("key", "small") == pickle_serde.serialize("key", "small")
+
+    data, flags = serde.serialize("key", os.urandom(4096))
+    assert not flags & FLAG_COMPRESSED
+    assert serde.stats()["skipped"] == 1
+
+
+def test_values_written_with_any_codec_stay_readable() -> None:
+    reader = CompressingSerde(codec="zlib")
+    for codec in CODECS:
+        data, flags = CompressingSerde(threshold=0, codec=codec).serialize("key", LARGE_VALUE)
+        assert reader.deserialize("key", data, flags) == LARGE_VALUE
+
+    data, flags = pickle_serde.serialize("key", LARGE_VALUE)
+    assert reader.deserialize("key", data, flags) == LARGE_VALUE
+
+
+def test_zlib_is_compatible_with_pymemcache_compressed_serde() -> None:
+    data, flags = CompressedSerde().serialize("key", LARGE_VALUE)
+    assert CompressingSerde().deserialize("key", data, flags) == LARGE_VALUE
+
+    data, flags = CompressingSerde().serialize("key", LARGE_VALUE)
+    assert CompressedSerde().deserialize("key", data, flags) == LARGE_VALUE
+
+
+def test_stats() -> None:
+    serde = CompressingSerde(threshold=1024)
+    serde.serialize("key", LARGE_VALUE)
+    serde.serialize("key", "small")
+
+    stats = serde.stats()
+    assert stats["compressed"] == 1
+    assert stats["bytes_out"] < stats["bytes_in"]
+    assert stats["ratio"] == stats["bytes_out"] / stats["bytes_in"]
+
+
+def test_invalid_options() -> None:
+    with pytest.raises(ValueError):
+        CompressingSerde(codec="snappy")
+    with pytest.raises(ValueError):
+        CompressingSerde(threshold=-1)
+
+
+def test_registry_shares_serde_per_configuration() -> None:
+    first = get_compressing_serde("registry.0000.use1.cache.amazonaws.com:11211", pickle_serde, {"threshold": 10})
+    assert (
+        get_compressing_serde("registry.0000.use1.cache.amazonaws.com:11211", pickle_serde, {"threshold": 10}) is first
+    )
+    assert get_compressing_serde("registry.0000.use1.cache.amazonaws.com:11211", pickle_serde, {}) is not first
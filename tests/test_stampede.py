@@ -0,0 +1,164 @@
+import threading
+import time
+from typing import Any
+
+from django.core.cache.backends.locmem import LocMemCache
+from pytest import MonkeyPatch
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.backend import ElastiPymemcache
+from django_elastipymemcache.stampede import StampedeOptions, StampedeProtection, get_stampede_protection
+
+
+def _cache(name: str) -> LocMemCache:
+    return LocMemCache(name, {"TIMEOUT": 60})
+
+
+def test_single_flight_shares_one_computation() -> None:
+    cache = _cache("stampede-single-flight")
+    protection = StampedeProtection()
+    options = StampedeOptions(lease_timeout=0)
+    calls = []
+    release = threading.Event()
+
+    def compute() -> str:
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results: list[Any] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(protection.get_or_set(cache, "key", compute, options=options)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+    assert cache.get("key") == "value"
+
+
+def test_lease_waits_for_the_holder() -> None:
+    cache = _cache("stampede-lease")
+    protection = StampedeProtection()
+    options = StampedeOptions(single_flight=False, lease_wait=2.0, poll_interval=0.01)
+
+    # Another process holds the lease and stores the value a bit later.
+    assert cache.add("key:lease", "other", 10)
+    threading.Timer(0.1, cache.set, args=("key", "theirs")).start()
+
+    assert protection.get_or_set(cache, "key", lambda: "ours", options=options) == "theirs"
+
+
+def test_lease_is_released_after_computing() -> None:
+    cache = _cache("stampede-lease-release")
+    options = StampedeOptions(single_flight=False)
+
+    assert StampedeProtection().get_or_set(cache, "key", "value", options=options) == "value"
+    assert cache.get("key:lease") is None
+
+
+def test_expired_lease_taken_by_another_process_is_kept() -> None:
+    cache = _cache("stampede-lease-stolen")
+    options = StampedeOptions(single_flight=False)
+
+    def compute() -> str:
+        # The lease expires during the computation and another process takes it.
+        cache.set("key:lease", "other", 10)
+        return "value"
+
+    assert StampedeProtection().get_or_set(cache, "key", compute, options=options) == "value"
+    assert cache.get("key:lease") == "other"
+
+
+def test_backend_releases_its_own_lease_only() -> None:
+    with LocalCluster(nodes=2) as cluster:
+        backend = ElastiPymemcache(cluster.configuration_endpoint, {"OPTIONS": {"stampede": {"single_flight": False}}})
+        try:
+            assert backend.get_or_set("key", "value") == "value"
+            assert backend.get("key:lease") is None
+
+            def compute() -> str:
+                backend.set("key2:lease", "other", 10)
+                return "value"
+
+            assert backend.get_or_set("key2", compute) == "value"
+            assert backend.get("key2:lease") == "other"
+        finally:
+            backend.close()
+
+
+def test_backend_keeps_the_value_when_the_node_fails_during_compute() -> None:
+    with LocalCluster(nodes=1) as cluster:
+        backend = ElastiPymemcache(
+            cluster.configuration_endpoint,
+            {"OPTIONS": {"stampede": {"single_flight": False}, "ignore_exc": True}},
+        )
+        try:
+
+            def compute() -> str:
+                cluster.nodes[0].stop()
+                return "value"
+
+            assert backend.get_or_set("key", compute) == "value"
+            assert backend._release_lease("key:lease", "token") is False
+        finally:
+            backend.close()
+
+
+def test_failed_lease_release_does_not_lose_the_value(monkeypatch: MonkeyPatch) -> None:
+    cache = _cache("stampede-lease-release-failure")
+    monkeypatch.setattr(cache, "delete", lambda *args, **kwargs: 1 / 0, raising=False)
+
+    options = StampedeOptions(single_flight=False)
+    assert StampedeProtection().get_or_set(cache, "key", "value", options=options) == "value"
+    assert cache.get("key") == "value"
+
+
+def test_lease_wait_timeout_computes_anyway() -> None:
+    cache = _cache("stampede-lease-timeout")
+    options = StampedeOptions(single_flight=False, lease_wait=0.05, poll_interval=0.01)
+    assert cache.add("key:lease", "other", 10)
+
+    assert StampedeProtection().get_or_set(cache, "key", lambda: "ours", options=options) == "ours"
+    assert cache.get("key:lease") == "other"
+
+
+def test_xfetch_refreshes_before_expiry() -> None:
+    cache = _cache("stampede-xfetch")
+    protection = StampedeProtection()
+    options = StampedeOptions(xfetch_beta=1.0)
+
+    assert protection.get_or_set(cache, "key", "v1", options=options) == "v1"
+    delta, expires_at = cache.get("key:xfetch")
+    assert expires_at > time.time() + 50
+    # Far from the expiry, the cached value is served.
+    assert protection.get_or_set(cache, "key", "v2", options=options) == "v1"
+
+    # A slow computation close to its expiry is refreshed early.
+    cache.set("key:xfetch", (3600.0, time.time() + 1))
+    assert protection.get_or_set(cache, "key", "v2", options=options) == "v2"
+
+
+def test_xfetch_keeps_serving_while_another_process_refreshes() -> None:
+    cache = _cache("stampede-xfetch-lease")
+    options = StampedeOptions(xfetch_beta=1.0)
+    cache.set_many({"key": "v1", "key:xfetch": (3600.0, time.time() + 1)})
+    assert cache.add("key:lease", "other", 10)
+
+    assert StampedeProtection().get_or_set(cache, "key", "v2", options=options) == "v1"
+
+
+def test_options() -> None:
+    base = StampedeOptions(lease_timeout=3)
+
+    assert StampedeOptions.from_option(None) is None
+    assert StampedeOptions.from_option(False, base) is None
+    assert StampedeOptions.from_option(True, base) is base
+    assert StampedeOptions.from_option({"xfetch_beta": 2.0}, base) == base._replace(xfetch_beta=2.0)
+    assert get_stampede_protection("a:11211") is get_stampede_protection("a:11211")
@@ -0,0 +1,153 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+from pytest import MonkeyPatch
+
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.topology_store import TopologyStore
+
+ENDPOINT = "test.0000.use1.cache.amazonaws.com:11211"
+
+
+def test_snapshot_round_trip(tmp_path: Path) -> None:
+    store = TopologyStore(ENDPOINT, str(tmp_path))
+    assert store.load() is None
+
+    store.save(3, ["10.0.0.2:11211", "10.0.0.1:11211"])
+    snapshot = TopologyStore(ENDPOINT, str(tmp_path)).load()
+
+    assert snapshot is not None
+    assert snapshot.version == 3
+    assert snapshot.nodes == {"10.0.0.1:11211", "10.0.0.2:11211"}
+    assert snapshot.age < 5
+    assert TopologyStore("other.0000.use1.cache.amazonaws.com:11211", str(tmp_path)).load() is None
+
+
+def test_snapshot_freshness_and_unreadable_files(tmp_path: Path) -> None:
+    store = TopologyStore(ENDPOINT, str(tmp_path), max_age=10)
+    store.save(1, ["10.0.0.1:11211"])
+    assert store.load_fresh() is not None
+
+    with open(store.path, "w") as f:
+        json.dump({"endpoint": ENDPOINT, "version": 1, "nodes": ["10.0.0.1:11211"], "updated_at": time.time() - 20}, f)
+    assert store.load() is not None
+    assert store.load_fresh() is None
+
+    with open(store.path, "w") as f:
+        f.write("{")
+    os.utime(store.path, ns=(0, 0))
+    assert store.load() is None
+
+
+def test_refresh_is_exclusive_between_stores(tmp_path: Path) -> None:
+    first = TopologyStore(ENDPOINT, str(tmp_path))
+    second = TopologyStore(ENDPOINT, str(tmp_path))
+
+    assert first.acquire_refresh(blocking=False) is True
+    assert second.acquire_refresh(blocking=False) is False
+    first.release_refresh()
+    assert second.acquire_refresh(blocking=False) is True
+    second.release_refresh()
+
+
+def mock_discovery(monkeypatch: MonkeyPatch, nodes: list[tuple[str, int]]) -> Mock:
+    mock_config_get = Mock(return_value=list(nodes))
+    monkeypatch.setattr(
+        "django_elastipymemcache.client._ConfigurationEndpointClient.config_get_cluster",
+        mock_config_get,
+    )
+    return mock_config_get
+
+
+def test_workers_start_from_shared_snapshot(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    mock_config_get = mock_discovery(monkeypatch, [("10.0.0.1", 11211), ("10.0.0.2", 11211)])
+    options: dict[str, Any] = {"topology_cache": {"path": str(tmp_path)}, "discovery_interval": 30}
+
+    first = AWSElastiCacheClient(ENDPOINT, **options)
+    workers = [AWSElastiCacheClient(ENDPOINT, **options) for _ in range(4)]
+
+    assert mock_config_get.call_count == 1
+    assert all(set(worker.clients) == set(first.clients) for worker in workers)
+    snapshot = TopologyStore(ENDPOINT, str(tmp_path)).load()
+    assert snapshot is not None
+    assert snapshot.nodes == {"10.0.0.1:11211", "10.0.0.2:11211"}
+
+
+def test_stale_snapshot_is_used_while_another_process_refreshes(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    store = TopologyStore(ENDPOINT, str(tmp_path), max_age=1)
+    store.save(1, ["10.0.0.1:11211"])
+    os.utime(store.path)
+    monkeypatch.setattr(time, "time", Mock(return_value=time.time() + 60))
+    mock_config_get = mock_discovery(monkeypatch, [("10.0.0.2", 11211)])
+
+    assert store.acquire_refresh(blocking=False)
+    try:
+        client = AWSElastiCacheClient(ENDPOINT, topology_cache={"path": str(tmp_path), "max_age": 1})
+    finally:
+        store.release_refresh()
+
+    assert not mock_config_get.called
+    assert set(client.clients) == {"10.0.0.1:11211"}
+
+
+def test_retry_refresh_bypasses_snapshot(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    TopologyStore(ENDPOINT, str(tmp_path)).save(1, ["10.0.0.1:11211"])
+    mock_config_get = mock_discovery(monkeypatch, [("10.0.0.2", 11211)])
+
+    client = AWSElastiCacheClient(ENDPOINT, topology_cache={"path": str(tmp_path)})
+    assert set(client.clients) == {"10.0.0.1:11211"}
+
+    client._refresh_clients(force=True, use_snapshot=False)
+    assert mock_config_get.call_count == 1
+    assert set(client.clients) == {"10.0.0.2:11211"}
+    snapshot = TopologyStore(ENDPOINT, str(tmp_path)).load()
+    assert snapshot is not None
+    assert snapshot.nodes == {"10.0.0.2:11211"}
+
+
+def test_invalid_max_age() -> None:
+    with pytest.raises(ValueError):
+        TopologyStore(ENDPOINT, max_age=0)
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_snapshots_writable_by_others_are_ignored(tmp_path: Path) -> None:
+    store = TopologyStore(ENDPOINT, str(tmp_path))
+    store.save(1, ["10.0.0.1:11211"])
+    assert os.stat(store.path).st_mode & 0o077 == 0
+
+    os.chmod(store.path, 0o666)
+    assert TopologyStore(ENDPOINT, str(tmp_path)).load() is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_default_directory_is_private(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    store = TopologyStore(ENDPOINT)
+    store.save(1, ["10.0.0.1:11211"])
+
+    directory = os.path.dirname(store.path)
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    assert store.load() is not None
+
+    # A directory others can write to, e.g. created first by another user, is not used.
+    os.chmod(directory, 0o777)
+    assert TopologyStore(ENDPOINT).load() is None
+
+
+def test_lock_file_does_not_follow_symlinks(tmp_path: Path) -> None:
+    target = tmp_path / "target"
+    target.write_bytes(b"data")
+    store = TopologyStore(ENDPOINT, str(tmp_path))
+    os.symlink(target, store._lock_path)
+
+    store.acquire_refresh(blocking=False)
+    store.release_refresh()
+    assert target.read_bytes() == b"data"
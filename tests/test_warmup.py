@@ -0,0 +1,67 @@
+from typing import Any
+
+import pytest
+
+from benchmarks.server import LocalCluster
+from django_elastipymemcache.backend import ElastiPymemcache
+from django_elastipymemcache.client import AWSElastiCacheClient
+from django_elastipymemcache.metrics import InMemoryMetrics
+from django_elastipymemcache.warmup import WarmupOptions
+
+
+@pytest.fixture
+def cluster() -> Any:
+    with LocalCluster(nodes=2) as cluster:
+        yield cluster
+
+
+def test_warmup_opens_connections_before_nodes_are_routable(cluster: LocalCluster) -> None:
+    metrics = InMemoryMetrics()
+    client = AWSElastiCacheClient(
+        cluster.configuration_endpoint,
+        use_pooling=True,
+        max_pool_size=5,
+        warmup={"connections": 3, "workers": 2},
+        metrics=metrics,
+    )
+    try:
+        assert [len(node.connections) for node in cluster.nodes] == [3, 3]
+
+        new_node = cluster.add_node()
+        client._refresh_clients(force=True)
+        assert len(new_node.connections) == 3
+        assert new_node.key in client._get_topology().nodes
+        assert metrics.snapshot()["nodes"][new_node.key]["pool_connections_created"] == 3
+
+        # A node failing its check starts as dead and is revived after dead_timeout.
+        broken = cluster.add_node()
+        broken.reset_rate = 1.0
+        client._refresh_clients(force=True)
+        assert broken.key in client.clients
+        assert broken.key not in client._get_topology().nodes
+        assert metrics.snapshot()["nodes"][broken.key]["states"] == {"dead": 1}
+    finally:
+        client.close()
+
+
+def test_warm_up_after_start(cluster: LocalCluster) -> None:
+    backend = ElastiPymemcache(cluster.configuration_endpoint, {})
+    try:
+        assert backend.warm_up() == set()
+        assert all(len(node.connections) == 1 for node in cluster.nodes)
+    finally:
+        backend.close()
+
+    cluster.nodes[0].reset_rate = 1.0
+    client = AWSElastiCacheClient(cluster.configuration_endpoint)
+    try:
+        assert client.warm_up() == {cluster.nodes[0].key}
+        assert len(client._get_topology().nodes) == 2
+    finally:
+        client.close()
+
+
+def test_warmup_options() -> None:
+    assert WarmupOptions.from_option(None) is None
+    assert WarmupOptions.from_option(True) == WarmupOptions()
+    assert WarmupOptions.from_option({"connections": 2}) == WarmupOptions(connections=2)
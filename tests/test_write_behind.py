@@ -0,0 +1,220 @@
+import threading
+from typing import Any
+from unittest.mock import Mock, call, patch
+
+import pytest
+
+from django_elastipymemcache.backend import ElastiPymemcache
+from django_elastipymemcache.write_behind import WriteBehindQueue, get_write_behind_queue
+
+
+def _writes(client: Mock) -> list[tuple[Any, ...]]:
+    """Commands sent by the workers, one per key."""
+    writes: list[tuple[Any, ...]] = []
+    for name, args, _ in client.mock_calls:
+        if name == "set_many":
+            writes.extend(("set", key, value, args[1]) for key, value in args[0].items())
+        elif name == "delete_many":
+            writes.extend(("delete", key) for key in args[0])
+        elif name == "touch":
+            writes.append(("touch", *args))
+    return writes
+
+
+def test_batches_are_written_in_order_by_kind_and_expiration() -> None:
+    client = Mock()
+    WriteBehindQueue._write(
+        client,
+        [
+            ("set", "a", 1, 60),
+            ("set", "b", 2, 60),
+            ("set", "c", 3, 0),
+            ("delete", "a"),
+            ("delete", "b"),
+            ("touch", "c", 10),
+            ("set", "a", 4, 0),
+        ],
+    )
+
+    assert client.mock_calls == [
+        call.set_many({"a": 1, "b": 2}, 60, noreply=True),
+        call.set_many({"c": 3}, 0, noreply=True),
+        call.delete_many(["a", "b"], noreply=True),
+        call.touch("c", 10, noreply=True),
+        call.set_many({"a": 4}, 0, noreply=True),
+    ]
+
+
+def test_workers_drain_the_queue_with_their_own_client() -> None:
+    client = Mock()
+    factory = Mock(return_value=client)
+    write_behind = WriteBehindQueue(factory, workers=2, batch_size=10)
+
+    for index in range(25):
+        assert write_behind.put(("set", f"key{index}", index, 0))
+    assert write_behind.flush(timeout=5)
+
+    assert sorted(_writes(client)) == sorted(("set", f"key{index}", index, 0) for index in range(25))
+    assert write_behind.stats() == {"depth": 0, "written": 25, "dropped": 0, "synchronous": 0, "errors": 0}
+
+    threads = [thread for thread in write_behind._threads if thread is not None]
+    assert write_behind.close(timeout=5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert write_behind._threads == [None, None]
+    assert factory.call_count <= 2
+    assert client.close.call_count == factory.call_count
+
+
+def _blocked_queue(overflow: str) -> tuple[WriteBehindQueue, threading.Event]:
+    """A full queue of one command, whose worker is blocked writing another one until the event is set."""
+    release = threading.Event()
+    client = Mock()
+    client.set_many.side_effect = lambda *args, **kwargs: release.wait(5)
+    write_behind = WriteBehindQueue(Mock(return_value=client), max_size=1, batch_size=1, overflow=overflow)
+
+    assert write_behind.put(("set", "a", 1, 0))
+    while client.set_many.call_count == 0:
+        threading.Event().wait(0.001)
+    assert write_behind.put(("set", "b", 2, 0))
+    return write_behind, release
+
+
+def test_drop_overflow() -> None:
+    write_behind, release = _blocked_queue("drop")
+
+    assert write_behind.put(("set", "c", 3, 0)) is True
+    assert write_behind.stats()["dropped"] == 1
+    assert not write_behind.flush(timeout=0)
+
+    release.set()
+    assert write_behind.flush(timeout=5)
+    write_behind.close()
+
+
+def test_sync_overflow_waits_for_the_queued_commands_of_the_shard() -> None:
+    write_behind, release = _blocked_queue("sync")
+    threading.Timer(0.05, release.set).start()
+
+    # Written by the caller, after the commands queued before it.
+    assert write_behind.put(("set", "c", 3, 0)) is False
+    assert write_behind.stats() == {"depth": 0, "written": 2, "dropped": 0, "synchronous": 1, "errors": 0}
+    write_behind.close()
+
+
+def test_close_drops_what_a_stuck_worker_left_in_a_full_queue() -> None:
+    write_behind, release = _blocked_queue("drop")
+
+    assert write_behind.close(timeout=0.05) is False
+    assert write_behind.stats()["dropped"] == 1
+    release.set()
+
+
+def test_put_after_close_keeps_the_running_worker_of_the_shard() -> None:
+    release = threading.Event()
+    client = Mock()
+    client.set_many.side_effect = lambda *args, **kwargs: release.wait(5)
+    write_behind = WriteBehindQueue(Mock(return_value=client), batch_size=1)
+    assert write_behind.put(("set", "a", 1, 0))
+    while client.set_many.call_count == 0:
+        threading.Event().wait(0.001)
+    worker = write_behind._threads[0]
+    assert write_behind.close(timeout=0) is False
+
+    # The stopping worker picks the command up, rather than a second worker racing it for the queue.
+    assert write_behind.put(("set", "c", 3, 0))
+    assert write_behind._threads == [worker]
+    release.set()
+    assert write_behind.flush(timeout=5)
+    assert _writes(client) == [("set", "a", 1, 0), ("set", "c", 3, 0)]
+    assert write_behind._threads == [worker]
+    write_behind.close()
+
+
+def test_commands_of_a_key_are_written_in_order_by_one_worker() -> None:
+    client = Mock()
+    write_behind = WriteBehindQueue(Mock(return_value=client), workers=4, batch_size=3)
+    for index in range(50):
+        write_behind.put(("set", f"key{index}", index, 0))
+        write_behind.put(("delete", f"key{index}"))
+    assert write_behind.flush(timeout=5)
+
+    last: dict[str, str] = {}
+    for command in _writes(client):
+        last[command[1]] = command[0]
+    assert last == {f"key{index}": "delete" for index in range(50)}
+    write_behind.close()
+
+
+def test_blocking_overflow_waits_for_room() -> None:
+    write_behind = WriteBehindQueue(Mock(), max_size=1, overflow="block", block_timeout=0.01)
+    write_behind._threads = [Mock()]  # no worker draining the queue
+
+    assert write_behind.put(("delete", "a"))
+    assert write_behind.put(("delete", "b"))
+    assert write_behind.stats() == {"depth": 1, "written": 0, "dropped": 1, "synchronous": 0, "errors": 0}
+
+
+def test_failed_writes_are_counted() -> None:
+    client = Mock()
+    client.delete_many.side_effect = OSError("connection reset")
+    write_behind = WriteBehindQueue(Mock(return_value=client))
+
+    write_behind.put(("delete", "a"))
+    assert write_behind.flush(timeout=5)
+    assert write_behind.stats()["errors"] == 1
+    write_behind.close()
+
+
+def test_invalid_options() -> None:
+    with pytest.raises(ValueError):
+        WriteBehindQueue(Mock(), overflow="ignore")
+    with pytest.raises(ValueError):
+        WriteBehindQueue(Mock(), max_size=0)
+
+
+def test_registry_shares_queues_by_location_and_options() -> None:
+    first = get_write_behind_queue("registry:11211", {"max_size": 5}, Mock())
+    assert get_write_behind_queue("registry:11211", {"max_size": 5}, Mock()) is first
+    assert get_write_behind_queue("registry:11211", {"max_size": 6}, Mock()) is not first
+
+
+def test_backend_queues_writes_without_flushing_on_close() -> None:
+    params = {"KEY_PREFIX": "p", "OPTIONS": {"write_behind": {"workers": 1, "max_size": 100}}}
+
+    with patch("django_elastipymemcache.backend.AWSElastiCacheClient") as MockClient:
+        backend = ElastiPymemcache("writes.0000.use1.cache.amazonaws.com:11211", params)
+        assert backend.write_behind is not None
+        assert "write_behind" not in backend._options  # type: ignore[attr-defined]
+
+        backend.set("a", 1, timeout=60)
+        assert backend.touch("a", timeout=120) is True
+        assert backend.set_many({"b": 2, "c": 3}, timeout=60) == []
+        assert backend.delete("b") is True
+        backend.delete_many(["c"])
+        # Django closes the caches after every request, which does not wait for the workers.
+        with patch.object(backend.write_behind, "flush") as flush:
+            backend.close()
+        flush.assert_not_called()
+        assert backend.write_behind.flush(timeout=5)
+
+        assert _writes(MockClient.return_value) == [
+            ("set", "p:1:a", 1, 60),
+            ("touch", "p:1:a", 120),
+            ("set", "p:1:b", 2, 60),
+            ("set", "p:1:c", 3, 60),
+            ("delete", "p:1:b"),
+            ("delete", "p:1:c"),
+        ]
+        assert backend.write_behind_stats() == {"depth": 0, "written": 6, "dropped": 0, "synchronous": 0, "errors": 0}
+        MockClient.return_value.get.assert_not_called()
+
+
+def test_backend_synchronous_writes_wait_for_the_queued_ones() -> None:
+    params = {"OPTIONS": {"write_behind": True}}
+    with patch("django_elastipymemcache.backend.AWSElastiCacheClient"):
+        backend = ElastiPymemcache("ordered.0000.use1.cache.amazonaws.com:11211", params)
+        assert backend.write_behind is not None
+        with patch.object(backend.write_behind, "wait_for") as wait_for:
+            backend.add("a", 1)
+            backend.incr("a")
+        assert wait_for.call_args_list == [call(backend.make_key("a"))] * 2